@@ -1,5 +1,6 @@
 from logging.config import fileConfig
 import os
+import re
 import sys
 
 from sqlalchemy import engine_from_config, pool
@@ -10,7 +11,8 @@ config = context.config
 
 # Logging
 if config.config_file_name is not None:
-    fileConfig(config.config_file_name)
+    # Migrations also run in-process (tests); keep the app's loggers enabled
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
 
 # Make app importable
 sys.path.append("/app")
@@ -19,6 +21,16 @@ from app.db.models import Base  # noqa
 
 target_metadata = Base.metadata
 
+# order_events partitions are created and dropped at runtime by
+# app.tasks.event_partitions, not by migrations
+PARTITION_TABLE = re.compile(r"order_events_(\d{6}|default)")
+
+
+def include_name(name, type_, parent_names):
+    if type_ == "table":
+        return not PARTITION_TABLE.fullmatch(name)
+    return True
+
 # 🔥 IMPORTANT: override DB URL from environment variable
 db_url = os.getenv("DATABASE_URL")
 if db_url:
@@ -32,6 +44,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -52,6 +65,7 @@ def run_migrations_online() -> None:
         context.configure(
             connection=connection,
             target_metadata=target_metadata,
+            include_name=include_name,
         )
 
         with context.begin_transaction():
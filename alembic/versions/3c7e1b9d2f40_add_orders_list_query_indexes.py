@@ -0,0 +1,67 @@
+"""add orders list query indexes
+
+Revision ID: 3c7e1b9d2f40
+Revises: a48c25c7ec7d
+Create Date: 2026-10-18 10:12:41.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7e1b9d2f40'
+down_revision: Union[str, Sequence[str], None] = 'a48c25c7ec7d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BTREE_INDEXES = [
+    ('ix_orders_user_id_id', ['user_id', 'id']),
+    ('ix_orders_user_id_created_at_id', ['user_id', 'created_at', 'id']),
+    ('ix_orders_user_id_quantity_id', ['user_id', 'quantity', 'id']),
+    ('ix_orders_created_at_id', ['created_at', 'id']),
+    ('ix_orders_quantity_id', ['quantity', 'id']),
+    ('ix_orders_status', ['status']),
+]
+
+TRGM_INDEXES = [
+    ('ix_orders_customer_name_trgm', 'customer_name'),
+    ('ix_orders_item_name_trgm', 'item_name'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # CONCURRENTLY keeps orders writable while the indexes build, but it
+    # cannot run inside the migration transaction.
+    with op.get_context().autocommit_block():
+        for name, columns in BTREE_INDEXES:
+            op.create_index(name, 'orders', columns, unique=False, postgresql_concurrently=True)
+
+        for name, column in TRGM_INDEXES:
+            op.create_index(
+                name,
+                'orders',
+                [column],
+                unique=False,
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+            )
+
+        # Superseded by the (user_id, id) prefix above
+        op.drop_index('ix_orders_user_id', table_name='orders', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_orders_user_id', 'orders', ['user_id'], unique=False, postgresql_concurrently=True)
+
+        for name, _ in TRGM_INDEXES + BTREE_INDEXES:
+            op.drop_index(name, table_name='orders', postgresql_concurrently=True)
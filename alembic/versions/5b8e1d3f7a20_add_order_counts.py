@@ -0,0 +1,50 @@
+"""add order counts
+
+Revision ID: 5b8e1d3f7a20
+Revises: 9c4d2f7a6e18
+Create Date: 2026-10-18 21:36:10.010692
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e1d3f7a20'
+down_revision: Union[str, Sequence[str], None] = '9c4d2f7a6e18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('order_counts',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('order_count', sa.BigInteger(), nullable=False),
+    sa.Column('archived_count', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Backfill from existing orders; the write paths keep it current from here
+    op.execute(
+        """
+        INSERT INTO order_counts (user_id, order_count, archived_count)
+        SELECT user_id, sum(live), sum(archived)
+        FROM (
+            SELECT user_id, count(*) AS live, 0 AS archived
+            FROM orders WHERE deleted_at IS NULL GROUP BY user_id
+            UNION ALL
+            SELECT user_id, 0, count(*)
+            FROM orders_archive WHERE deleted_at IS NULL GROUP BY user_id
+        ) AS totals
+        GROUP BY user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('order_counts')
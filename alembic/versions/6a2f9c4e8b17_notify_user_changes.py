@@ -0,0 +1,42 @@
+"""notify user changes
+
+Revision ID: 6a2f9c4e8b17
+Revises: 5b8e1d3f7a20
+Create Date: 2026-10-18 21:05:12.418203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a2f9c4e8b17'
+down_revision: Union[str, Sequence[str], None] = '5b8e1d3f7a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Every worker LISTENs on user_changes and drops the cached principal,
+    # whatever made the change (the ORM, raw SQL, admin tooling)
+    op.execute("""
+        CREATE FUNCTION notify_user_change() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('user_changes', OLD.email);
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER users_notify_change
+        AFTER UPDATE OF email, role OR DELETE ON users
+        FOR EACH ROW EXECUTE FUNCTION notify_user_change()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER users_notify_change ON users")
+    op.execute("DROP FUNCTION notify_user_change()")
@@ -0,0 +1,64 @@
+"""soft delete and orders archive
+
+Revision ID: 7e3b5c1a9d42
+Revises: d4f8a2c6e913
+Create Date: 2026-10-18 20:41:09.518263
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e3b5c1a9d42'
+down_revision: Union[str, Sequence[str], None] = 'd4f8a2c6e913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = 'id, customer_name, item_name, quantity, status, user_id, created_at, version'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Nullable without a default: no table rewrite
+    op.add_column('orders', sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+
+    op.create_table('orders_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('customer_name', sa.String(length=200), nullable=False),
+    sa.Column('item_name', sa.String(length=200), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('simple', customer_name || ' ' || item_name)", persisted=True),
+        nullable=True,
+    ),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_orders_archive_user_id_id', 'orders_archive', ['user_id', 'id'], unique=False)
+
+    # Events outlive their order's row in orders
+    op.drop_constraint('order_events_order_id_fkey', 'order_events', type_='foreignkey')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Archived orders go back to orders. Soft-deleted ones become visible
+    # again: their events still reference them.
+    op.execute(f'INSERT INTO orders ({COLUMNS}) SELECT {COLUMNS} FROM orders_archive')
+    op.create_foreign_key('order_events_order_id_fkey', 'order_events', 'orders', ['order_id'], ['id'])
+
+    op.drop_index('ix_orders_archive_user_id_id', table_name='orders_archive')
+    op.drop_table('orders_archive')
+    op.drop_column('orders', 'deleted_at')
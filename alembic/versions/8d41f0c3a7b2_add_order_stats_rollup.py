@@ -0,0 +1,47 @@
+"""add order stats rollup
+
+Revision ID: 8d41f0c3a7b2
+Revises: 3c7e1b9d2f40
+Create Date: 2026-10-18 14:02:17.904512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d41f0c3a7b2'
+down_revision: Union[str, Sequence[str], None] = '3c7e1b9d2f40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('order_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('item_name', sa.String(length=200), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('quantity_sum', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'day', 'status', 'item_name')
+    )
+
+    # Backfill from existing orders; the write paths keep it current from here
+    op.execute(
+        """
+        INSERT INTO order_stats (user_id, day, status, item_name, order_count, quantity_sum)
+        SELECT user_id, (created_at AT TIME ZONE 'UTC')::date, status, item_name, count(*), sum(quantity)
+        FROM orders
+        GROUP BY 1, 2, 3, 4
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('order_stats')
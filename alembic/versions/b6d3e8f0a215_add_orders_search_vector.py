@@ -0,0 +1,52 @@
+"""add orders search vector
+
+Revision ID: b6d3e8f0a215
+Revises: f1c7d2a94b58
+Create Date: 2026-10-18 18:05:12.334907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d3e8f0a215'
+down_revision: Union[str, Sequence[str], None] = 'f1c7d2a94b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Adding a stored generated column rewrites orders under an exclusive
+    # lock; schedule this migration for a quiet window on large tables.
+    op.add_column(
+        'orders',
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('simple', customer_name || ' ' || item_name)", persisted=True),
+            nullable=True,
+        ),
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_orders_search_vector',
+            'orders',
+            ['search_vector'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_orders_search_vector', table_name='orders', postgresql_concurrently=True)
+
+    op.drop_column('orders', 'search_vector')
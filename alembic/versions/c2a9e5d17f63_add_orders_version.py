@@ -0,0 +1,29 @@
+"""add orders version
+
+Revision ID: c2a9e5d17f63
+Revises: 8d41f0c3a7b2
+Create Date: 2026-10-18 15:21:09.366170
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2a9e5d17f63'
+down_revision: Union[str, Sequence[str], None] = '8d41f0c3a7b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Constant default: no table rewrite on Postgres 11+
+    op.add_column('orders', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('orders', 'version')
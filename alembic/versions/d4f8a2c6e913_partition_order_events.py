@@ -0,0 +1,127 @@
+"""partition order events
+
+Revision ID: d4f8a2c6e913
+Revises: b6d3e8f0a215
+Create Date: 2026-10-18 19:22:47.105382
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f8a2c6e913'
+down_revision: Union[str, Sequence[str], None] = 'b6d3e8f0a215'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same default as EVENTS_PARTITION_MONTHS_AHEAD; the maintenance job
+# keeps creating them from here on
+MONTHS_AHEAD = 3
+
+COLUMNS = 'id, order_id, changed_by_user_id, old_status, new_status, note, created_at'
+
+
+def _add_months(month: date, months: int) -> date:
+    total = month.year * 12 + month.month - 1 + months
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def _create_partition(month: date) -> None:
+    upper = _add_months(month, 1)
+    op.execute(
+        f"CREATE TABLE order_events_{month:%Y%m} PARTITION OF order_events "
+        f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00') TO ('{upper:%Y-%m-%d} 00:00:00+00')"
+    )
+
+
+def _rename_constraints(table: str, new_prefix: str) -> None:
+    # Frees the names (pkey, fkeys, not-null) for the table that replaces it
+    names = op.get_bind().scalars(
+        sa.text("SELECT conname FROM pg_constraint WHERE conrelid = CAST(:table AS regclass)"),
+        {"table": table},
+    ).all()
+    for name in names:
+        if name.startswith('order_events_'):
+            new_name = new_prefix + name.removeprefix('order_events_')
+            op.execute(f'ALTER TABLE {table} RENAME CONSTRAINT {name} TO {new_name}')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Copies the whole table under an exclusive lock: plan a maintenance
+    # window if order_events is large.
+    op.execute('LOCK TABLE order_events IN ACCESS EXCLUSIVE MODE')
+    op.rename_table('order_events', 'order_events_old')
+    _rename_constraints('order_events_old', 'order_events_old_')
+    op.execute('ALTER SEQUENCE order_events_id_seq RENAME TO order_events_old_id_seq')
+
+    op.create_table('order_events',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('changed_by_user_id', sa.Integer(), nullable=False),
+    sa.Column('old_status', sa.String(length=50), nullable=False),
+    sa.Column('new_status', sa.String(length=50), nullable=False),
+    sa.Column('note', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['changed_by_user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)',
+    )
+    op.create_index(
+        'ix_order_events_order_id_created_at',
+        'order_events',
+        ['order_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+
+    oldest = op.get_bind().scalar(sa.text("SELECT min(created_at) FROM order_events_old"))
+    # Bounds are in UTC
+    this_month = datetime.now(timezone.utc).date().replace(day=1)
+    month = oldest.astimezone(timezone.utc).date().replace(day=1) if oldest is not None else this_month
+    while month <= _add_months(this_month, MONTHS_AHEAD):
+        _create_partition(month)
+        month = _add_months(month, 1)
+    # Catches rows no monthly partition covers, so inserts never fail if
+    # the maintenance job falls behind
+    op.execute('CREATE TABLE order_events_default PARTITION OF order_events DEFAULT')
+
+    op.execute(f'INSERT INTO order_events ({COLUMNS}) SELECT {COLUMNS} FROM order_events_old')
+    op.execute("SELECT setval('order_events_id_seq', coalesce((SELECT max(id) FROM order_events), 0) + 1, false)")
+    op.drop_table('order_events_old')
+    # The new partitions have no statistics until autovacuum gets to them
+    op.execute('ANALYZE order_events')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('LOCK TABLE order_events IN ACCESS EXCLUSIVE MODE')
+    op.rename_table('order_events', 'order_events_partitioned')
+    _rename_constraints('order_events_partitioned', 'order_events_partitioned_')
+    op.execute('ALTER SEQUENCE order_events_id_seq RENAME TO order_events_partitioned_id_seq')
+
+    op.create_table('order_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('changed_by_user_id', sa.Integer(), nullable=False),
+    sa.Column('old_status', sa.String(length=50), nullable=False),
+    sa.Column('new_status', sa.String(length=50), nullable=False),
+    sa.Column('note', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    # Named: the partitions' copies of the old names are still around
+    sa.ForeignKeyConstraint(['changed_by_user_id'], ['users.id'], name='order_events_changed_by_user_id_fkey'),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], name='order_events_order_id_fkey'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(f'INSERT INTO order_events ({COLUMNS}) SELECT {COLUMNS} FROM order_events_partitioned')
+    op.execute("SELECT setval('order_events_id_seq', coalesce((SELECT max(id) FROM order_events), 0) + 1, false)")
+    op.create_index(op.f('ix_order_events_changed_by_user_id'), 'order_events', ['changed_by_user_id'], unique=False)
+    op.create_index(op.f('ix_order_events_id'), 'order_events', ['id'], unique=False)
+    op.create_index(op.f('ix_order_events_order_id'), 'order_events', ['order_id'], unique=False)
+
+    # Drops the partitions with it
+    op.drop_table('order_events_partitioned')
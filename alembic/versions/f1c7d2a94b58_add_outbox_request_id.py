@@ -0,0 +1,28 @@
+"""add outbox request id
+
+Revision ID: f1c7d2a94b58
+Revises: e5b3f8a61c24
+Create Date: 2026-10-18 16:47:30.552871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c7d2a94b58'
+down_revision: Union[str, Sequence[str], None] = 'e5b3f8a61c24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('outbox', sa.Column('request_id', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('outbox', 'request_id')
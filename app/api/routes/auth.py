@@ -5,8 +5,10 @@ from sqlalchemy import select
 from app.db.session import get_db
 from app.db.models import User
 from app.schemas.auth import UserCreate, Token
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.security import create_access_token
+from app.core.hashing import hash_password, verify_and_update_password
 from app.core.limiter import limiter
+from app.core.user_cache import cache_user
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -38,13 +40,24 @@ def register(request: Request, payload: UserCreate, db: Session = Depends(get_db
 def login(request: Request, payload: UserCreate, db: Session = Depends(get_db)):
     user = db.scalar(select(User).where(User.email == payload.email))
 
-    if not user or not verify_password(payload.password, user.hashed_password):
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = verify_and_update_password(payload.password, user.hashed_password)
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
         )
 
-    token = create_access_token(subject=user.email)
+    # Stored hash uses an old cost factor: upgrade it while we have the password
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+
+    # Login has just read the row, so refresh the cached principal with it
+    cache_user(user)
+    token = create_access_token(subject=user.email, user_id=user.id, role=user.role)
 
     return Token(
         access_token=token,
@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.db.session import get_async_db
+from app.db.models import User
+from app.schemas.auth import UserCreate, Token
+from app.core.security import create_access_token
+from app.core.hashing import ahash_password, averify_and_update_password
+from app.core.limiter import limiter
+from app.core.user_cache import cache_user
+
+router = APIRouter(prefix="/auth", tags=["auth"])
+
+
+# bcrypt is CPU-bound, so it runs in the hashing pool, off the event loop
+@router.post("/register", status_code=201)
+@limiter.limit("3/minute")
+async def register(request: Request, payload: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing = await db.scalar(select(User).where(User.email == payload.email))
+
+    if existing:
+        raise HTTPException(
+            status_code=409,
+            detail="Email already registered"
+        )
+
+    user = User(
+        email=payload.email,
+        hashed_password=await ahash_password(payload.password)
+    )
+
+    db.add(user)
+    await db.commit()
+
+    return {"message": "registered"}
+
+
+@router.post("/login", response_model=Token)
+@limiter.limit("5/minute")
+async def login(request: Request, payload: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(User).where(User.email == payload.email))
+
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await averify_and_update_password(payload.password, user.hashed_password)
+
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid credentials"
+        )
+
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+
+    cache_user(user)
+    token = create_access_token(subject=user.email, user_id=user.id, role=user.role)
+
+    return Token(
+        access_token=token,
+        role=user.role,
+        token_type="bearer"
+    )
@@ -1,43 +1,103 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import csv
+import io
+import json
+import re
+
+import orjson
+from datetime import date
+from typing import AsyncIterator, Awaitable, Callable, Iterator, Literal
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.orm.exc import StaleDataError
 from sqlalchemy import select
 
-from app.db.session import get_db
-from app.db.models import Order, User, OrderEvent
-from app.schemas.orders import OrderCreate, OrderOut, OrderStatusUpdate, OrderStatus, OrderEventOut
-from app.core.security import decode_access_token
-#from app.tasks.notifications import send_order_notification
+from app.db.session import get_db, mark_written, read_session
+from app.db.explain import estimated_rows
+from app.db.order_stats import OrderStatsDeltas, bump_order_stats, cached_order_count
+from app.db.outbox import enqueue_task
+from app.db.models import Order, OrderArchive, User, OrderEvent, OrderStat
+from app.schemas.orders import (
+    OrderCreate, OrderOut, OrderStatusUpdate, OrderStatus, OrderEventOut,
+    BulkOrderCreated, BulkOrderError, BulkOrderResult,
+    OrderStatusBatchUpdate, OrderStatusBatchResult, OrderStatusRejection,
+    OrderStatsRow, ALLOWED_PREVIOUS_STATUSES, ORDER_OUT_FIELDS, can_transition, can_transition_many, dump_orders_json,
+)
+from app.core.config import settings
+from app.core.limiter import bulk_limit, export_limit, limit_orders, limiter
+from app.core.offload import run_blocking
+from app.core.order_cache import (
+    CachedResponse, mark_orders_changed, order_cache, order_events_key, order_key, order_ttl,
+)
+from app.core.security import decode_access_token_claims
+from app.core.user_cache import CurrentUser, cache_user, cached_user
+from app.core.pagination import encode_cursor, decode_cursor
+from app.tasks.notifications import send_order_notification
 from typing import Optional
-from sqlalchemy import select, or_
+from sqlalchemy import select, insert, inspect, update, cast, func, literal, or_, tuple_, union_all
+from sqlalchemy.dialects.postgresql import REAL
+from pydantic import TypeAdapter, ValidationError
 
 
-router = APIRouter(prefix="/orders", tags=["orders"])
+router = APIRouter(prefix="/orders", tags=["orders"], dependencies=[Depends(limit_orders)])
 bearer = HTTPBearer()
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
 
-def get_current_user(
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
-    db: Session = Depends(get_db),
-) -> User:
+
+def principal_from_token(token: str) -> tuple[str, Optional[CurrentUser]]:
+    """Decode a bearer token into its subject and, when it can be resolved
+    without a DB round trip, the principal."""
     try:
-        email = decode_access_token(creds.credentials)
+        claims = decode_access_token_claims(token)
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
         )
 
-    user = db.scalar(select(User).where(User.email == email))
+    email = claims["sub"]
+
+    if settings.AUTH_TRUST_TOKEN_CLAIMS and "uid" in claims and "role" in claims:
+        return email, CurrentUser(id=claims["uid"], email=email, role=claims["role"])
+
+    return email, cached_user(email)
+
+
+def principal_from_user(user: Optional[User]) -> CurrentUser:
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
-    return user
+    return cache_user(user)
+
+
+def get_current_user(
+    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    db: Session = Depends(get_db),
+) -> CurrentUser:
+    email, principal = principal_from_token(creds.credentials)
+    if principal is None:
+        principal = principal_from_user(db.scalar(select(User).where(User.email == email)))
 
+    # Writes committed on this session pin the user's next reads to the primary
+    db.info["user_id"] = principal.id
+    return principal
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
+
+def get_read_db(current_user: CurrentUser = Depends(get_current_user)):
+    db = read_session(current_user.id)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def require_admin(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     if current_user.role != "ADMIN":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -50,7 +110,7 @@ def require_admin(current_user: User = Depends(get_current_user)) -> User:
 def create_order(
     payload: OrderCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     order = Order(
         customer_name=payload.customer_name,
@@ -60,23 +120,358 @@ def create_order(
     )
 
     db.add(order)
+    db.flush()
+    bump_order_stats(db, [(order.user_id, order.created_at, order.status, order.item_name, 1, order.quantity)])
+    enqueue_task(
+        db,
+        send_order_notification.name,
+        order_id=order.id,
+        customer_name=order.customer_name,
+        item_name=order.item_name,
+    )
     db.commit()
     db.refresh(order)
 
     return order
 
+def insert_order_rows(db: Session, rows: list[dict], stats: OrderStatsDeltas) -> list[int]:
+    """Insert a chunk of orders as one multi-row INSERT ... RETURNING id.
+
+    Their rollup deltas are added to stats, for the caller to apply before
+    it commits.
+    """
+    result = db.execute(
+        insert(Order).returning(Order.id, Order.created_at, sort_by_parameter_order=True),
+        rows,
+    ).all()
+
+    stats.add((
+        (row["user_id"], created_at, row["status"], row["item_name"], 1, row["quantity"])
+        for row, (_, created_at) in zip(rows, result)
+    ))
+    return [order_id for order_id, _ in result]
+
+
+def _validation_errors(e: ValidationError) -> list[dict]:
+    return [
+        {"loc": list(err["loc"]), "msg": err["msg"], "type": err["type"]}
+        for err in e.errors()
+    ]
+
+
+async def iter_bulk_items(request: Request) -> AsyncIterator[tuple[int, object]]:
+    """Yield (index, raw item) from a JSON array or a streamed NDJSON body.
+
+    A raw item is None when its NDJSON line was not valid JSON.
+    """
+    content_type = request.headers.get("content-type", "")
+
+    if content_type.startswith(NDJSON_MEDIA_TYPE):
+        index = 0
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield index, _parse_ndjson_line(line)
+                    index += 1
+        if buffer.strip():
+            yield index, _parse_ndjson_line(buffer)
+        return
+
+    try:
+        items = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Request body is not valid JSON")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=422, detail="Expected a JSON array of orders")
+    if len(items) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.BULK_MAX_ITEMS} orders per request")
+
+    for index, item in enumerate(items):
+        yield index, item
+
+
+def _parse_ndjson_line(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+async def ingest_bulk_orders(
+    request: Request,
+    current_user: CurrentUser,
+    insert_rows: Callable[[list[dict]], Awaitable[list[int]]],
+) -> BulkOrderResult:
+    """Validate every item and hand valid ones to insert_rows in chunks.
+
+    The caller owns the transaction and commits once everything is inserted.
+    """
+    created: list[BulkOrderCreated] = []
+    errors: list[BulkOrderError] = []
+    pending: list[tuple[int, dict]] = []
+
+    async def flush():
+        ids = await insert_rows([row for _, row in pending])
+        created.extend(BulkOrderCreated(index=i, id=order_id) for (i, _), order_id in zip(pending, ids))
+        pending.clear()
+
+    async for index, item in iter_bulk_items(request):
+        if index >= settings.BULK_MAX_ITEMS:
+            raise HTTPException(status_code=413, detail=f"At most {settings.BULK_MAX_ITEMS} orders per request")
+
+        if item is None:
+            errors.append(BulkOrderError(index=index, errors=[{"loc": [], "msg": "Invalid JSON", "type": "json_invalid"}]))
+            continue
+
+        try:
+            order = OrderCreate.model_validate(item)
+        except ValidationError as e:
+            errors.append(BulkOrderError(index=index, errors=_validation_errors(e)))
+            continue
+
+        pending.append((index, {**order.model_dump(), "user_id": current_user.id, "status": OrderStatus.PENDING.value}))
+        if len(pending) >= settings.BULK_CHUNK_SIZE:
+            await flush()
+
+    if pending:
+        await flush()
+
+    return BulkOrderResult(created=created, errors=errors)
+
+
+BULK_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {"type": "array", "items": {"$ref": "#/components/schemas/OrderCreate"}},
+            },
+            NDJSON_MEDIA_TYPE: {
+                "schema": {"$ref": "#/components/schemas/OrderCreate"},
+            },
+        },
+    }
+}
+
+
+@router.post("/bulk", response_model=BulkOrderResult, openapi_extra=BULK_OPENAPI)
+@limiter.limit(bulk_limit)
+async def create_orders_bulk(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    # async so the body can be streamed; the sync session is only ever
+    # touched from the threadpool
+    stats = OrderStatsDeltas()
+    result = await ingest_bulk_orders(
+        request,
+        current_user,
+        lambda rows: run_in_threadpool(insert_order_rows, db, rows, stats),
+    )
+    await run_in_threadpool(commit_bulk_orders, db, stats)
+    return result
+
+
+def commit_bulk_orders(db: Session, stats: OrderStatsDeltas) -> None:
+    # The rollup rows are shared with the user's other writes: lock them
+    # only now the whole body has been read, not while it is uploading
+    stats.apply(db)
+    db.commit()
+
+
+SearchMode = Literal["substring", "fulltext"]
+# How list_orders' X-Total-Count is worked out: a COUNT(*) of the filtered
+# orders, the planner's row estimate for them, or the per-user
+# order_counts totals (unfiltered lists only)
+CountMode = Literal["exact", "estimated", "cached"]
+
+ORDER_COLUMN_NAMES = [col.key for col in Order.__table__.c]
+
+
+def orders_source(include_archived: bool = False):
+    """Order, or Order aliased over orders UNION ALL orders_archive.
+
+    Postgres pushes filters and ORDER BY ... LIMIT into both branches,
+    so the hot table keeps using its indexes.
+    """
+    if not include_archived:
+        return Order
+    archived = OrderArchive.__table__.c
+    rows = union_all(
+        select(*Order.__table__.c),
+        select(*(archived[name] for name in ORDER_COLUMN_NAMES)),
+    )
+    return aliased(Order, rows.subquery("all_orders"))
+
+
+def search_vector(source=Order):
+    # Unmapped (see Order), so taken from the table or union behind source
+    return inspect(source).selectable.c.search_vector
+
+
+def fulltext_query(search: Optional[str]):
+    """tsquery matching every word of search as a prefix ("ann lam" -> ann:* & lam:*).
+
+    Only letters and digits are kept, so user input can't inject tsquery
+    operators. Returns None when there are no words.
+    """
+    words = re.findall(r"[^\W_]+", (search or "").lower())
+    if not words:
+        return None
+    return func.to_tsquery("simple", " & ".join(f"{word}:*" for word in words))
+
+
+def filter_orders_query(
+    stmt,
+    current_user: CurrentUser,
+    search: Optional[str] = None,
+    min_qty: Optional[int] = None,
+    max_qty: Optional[int] = None,
+    search_mode: SearchMode = "substring",
+    source=Order,
+):
+    stmt = stmt.where(source.deleted_at.is_(None))
+
+    # RBAC filter
+    if current_user.role != "ADMIN":
+        stmt = stmt.where(source.user_id == current_user.id)
+
+    # Search filter
+    if search_mode == "fulltext":
+        ts_query = fulltext_query(search)
+        if ts_query is not None:
+            # The planner can't estimate prefix matches, so given a LIMIT it
+            # tends to walk a sort index and filter, reading the whole table
+            # when few rows match. Materializing the matches first keeps
+            # the cost proportional to the number of matches instead.
+            matches = select(source.id).where(search_vector(source).bool_op("@@")(ts_query))
+            if current_user.role != "ADMIN":
+                matches = matches.where(source.user_id == current_user.id)
+            matches = matches.cte("search_matches").prefix_with("MATERIALIZED")
+            stmt = stmt.join(matches, matches.c.id == source.id)
+    elif search and search.strip():
+        q = f"%{search.strip()}%"
+        stmt = stmt.where(
+            or_(
+                source.customer_name.ilike(q),
+                source.item_name.ilike(q),
+            )
+        )
+
+    # Quantity filters
+    if min_qty is not None:
+        stmt = stmt.where(source.quantity >= min_qty)
+    if max_qty is not None:
+        stmt = stmt.where(source.quantity <= max_qty)
+
+    return stmt
+
+
+SORT_COLUMNS = ("id", "quantity", "created_at")
+
+
+def normalize_sort(
+    sort_by: str,
+    sort_order: str,
+    search: Optional[str] = None,
+    search_mode: SearchMode = "substring",
+) -> tuple[str, str]:
+    # Relevance needs a full-text query to rank against
+    ranked = search_mode == "fulltext" and fulltext_query(search) is not None
+    if sort_by not in SORT_COLUMNS and not (sort_by == "relevance" and ranked):
+        sort_by = "id"
+    return sort_by, "asc" if sort_order.lower() == "asc" else "desc"
+
+
+def sort_column(sort_by: str, search: Optional[str] = None, source=Order):
+    if sort_by == "relevance":
+        return func.ts_rank(search_vector(source), fulltext_query(search), type_=REAL)
+    return getattr(source, sort_by)
+
+
+def sort_orders_query(
+    stmt,
+    sort_by: str,
+    sort_order: str,
+    cursor: Optional[str] = None,
+    search: Optional[str] = None,
+    source=Order,
+):
+    """Apply ORDER BY (with id as the tiebreak) and an optional keyset cursor."""
+    col = sort_column(sort_by, search, source)
+    descending = sort_order == "desc"
+
+    if cursor is not None:
+        try:
+            last_value, last_id = decode_cursor(cursor, sort_by, sort_order)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+        if sort_by == "id":
+            stmt = stmt.where(source.id < last_id if descending else source.id > last_id)
+        else:
+            # Row-value comparison so Postgres can seek on (col, id) indexes
+            key = tuple_(col, source.id)
+            if sort_by == "relevance":
+                # ts_rank is a float4; compare as one, or the cursor's
+                # decimal round trip would skip or repeat rows
+                last_value = cast(last_value, REAL)
+            position = tuple_(last_value, last_id)
+            stmt = stmt.where(key < position if descending else key > position)
+
+    if sort_by == "id":
+        return stmt.order_by(source.id.desc() if descending else source.id.asc())
+
+    if descending:
+        return stmt.order_by(col.desc(), source.id.desc())
+    return stmt.order_by(col.asc(), source.id.asc())
+
+
+def count_orders(
+    db: Session,
+    mode: CountMode,
+    current_user: CurrentUser,
+    search: Optional[str] = None,
+    min_qty: Optional[int] = None,
+    max_qty: Optional[int] = None,
+    search_mode: SearchMode = "substring",
+    include_archived: bool = False,
+) -> int:
+    """Total orders a list_orders query matches, across all its pages."""
+    if mode == "cached":
+        return cached_order_count(db, None if current_user.role == "ADMIN" else current_user.id, include_archived)
+
+    source = orders_source(include_archived)
+    stmt = filter_orders_query(select(source.id), current_user, search, min_qty, max_qty, search_mode, source)
+    if mode == "estimated":
+        return estimated_rows(db, stmt)
+    return db.scalar(select(func.count()).select_from(stmt.subquery()))
+
+
 @router.get("", response_model=list[OrderOut])
 def list_orders(
+    response: Response,
     search: Optional[str] = None,
+    search_mode: SearchMode = "substring",
     min_qty: Optional[int] = None,
     max_qty: Optional[int] = None,
-    sort_by: str = "id",          # id | quantity | created_at
+    sort_by: str = "id",          # id | quantity | created_at | relevance (fulltext only)
     sort_order: str = "desc",     # asc | desc
     limit: int = 20,
     offset: int = 0,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = None,  # opaque, from a previous X-Next-Cursor header
+    include_archived: bool = False,  # also list orders moved to orders_archive
+    count: Optional[CountMode] = None,  # add an X-Total-Count header, worked out this way
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
+    if count == "cached" and ((search and search.strip()) or min_qty is not None or max_qty is not None):
+        raise HTTPException(status_code=400, detail="count=cached is only available without search or quantity filters")
+
     # Safety limits
     if limit < 1:
         limit = 1
@@ -85,86 +480,375 @@ def list_orders(
     if offset < 0:
         offset = 0
 
-    stmt = select(Order)
+    sort_by, sort_order = normalize_sort(sort_by, sort_order, search, search_mode)
+
+    # The sort key is selected alongside each order for the next cursor
+    # (relevance isn't an Order attribute)
+    source = orders_source(include_archived)
+    fast = settings.FAST_JSON_RESPONSES
+    if fast:
+        # Plain tuples, encoded without loading or validating models
+        columns = [getattr(source, name) for name in ORDER_OUT_FIELDS]
+    else:
+        columns = [source]
+    stmt = select(*columns, sort_column(sort_by, search, source))
+    stmt = filter_orders_query(stmt, current_user, search, min_qty, max_qty, search_mode, source)
+    stmt = sort_orders_query(stmt, sort_by, sort_order, cursor, search, source)
+
+    # Keyset mode ignores offset: the cursor already marks the position
+    if cursor is None and offset:
+        stmt = stmt.offset(offset)
+
+    # Fetch one extra row to know whether another page exists
+    rows = db.execute(stmt.limit(limit + 1)).all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last, last_value = rows[-1][0], rows[-1][-1]
+        last_id = last if fast else last.id
+        response.headers["X-Next-Cursor"] = encode_cursor(sort_by, sort_order, last_value, last_id)
+
+    if count is not None:
+        response.headers["X-Total-Count"] = str(
+            count_orders(db, count, current_user, search, min_qty, max_qty, search_mode, include_archived)
+        )
+
+    if fast:
+        # A returned Response skips the response_model (and the injected
+        # response's headers, hence passing them on)
+        return Response(run_blocking(dump_orders_json, rows), media_type="application/json", headers=dict(response.headers))
+    return [order for order, _ in rows]
+
+EXPORT_COLUMNS = (
+    Order.id,
+    Order.customer_name,
+    Order.item_name,
+    Order.quantity,
+    Order.status,
+    Order.created_at,
+)
+EXPORT_FIELDS = [col.key for col in EXPORT_COLUMNS]
+EXPORT_MEDIA_TYPES = {"ndjson": NDJSON_MEDIA_TYPE, "csv": "text/csv"}
+
+
+def export_orders_query(
+    current_user: CurrentUser,
+    search: Optional[str],
+    min_qty: Optional[int],
+    max_qty: Optional[int],
+    sort_by: str,
+    sort_order: str,
+    search_mode: SearchMode = "substring",
+):
+    sort_by, sort_order = normalize_sort(sort_by, sort_order, search, search_mode)
+    stmt = filter_orders_query(select(*EXPORT_COLUMNS), current_user, search, min_qty, max_qty, search_mode)
+    # yield_per streams through a server-side cursor, one batch in memory at a time
+    return sort_orders_query(stmt, sort_by, sort_order, search=search).execution_options(
+        yield_per=settings.EXPORT_BATCH_SIZE
+    )
+
+
+def encode_export_header(fmt: str) -> bytes:
+    if fmt != "csv":
+        return b""
+    buf = io.StringIO()
+    csv.writer(buf).writerow(EXPORT_FIELDS)
+    return buf.getvalue().encode("utf-8")
+
+
+def encode_export_rows(rows, fmt: str) -> bytes:
+    rows = [(*row[:-1], row[-1].isoformat()) for row in rows]
+
+    if fmt == "csv":
+        buf = io.StringIO()
+        csv.writer(buf).writerows(rows)
+        return buf.getvalue().encode("utf-8")
+
+    if settings.FAST_JSON_RESPONSES:
+        return b"".join(orjson.dumps(dict(zip(EXPORT_FIELDS, row))) + b"\n" for row in rows)
+    return "".join(json.dumps(dict(zip(EXPORT_FIELDS, row))) + "\n" for row in rows).encode("utf-8")
+
+
+def iter_export(stmt, fmt: str, user_id: int) -> Iterator[bytes]:
+    # The export outlives the request's dependencies, so it owns its session
+    db = read_session(user_id)
+    try:
+        yield encode_export_header(fmt)
+        for partition in db.execute(stmt).partitions():
+            yield encode_export_rows(partition, fmt)
+    finally:
+        db.close()
+
+
+def export_response(body, fmt: str) -> StreamingResponse:
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="orders.{fmt}"'},
+    )
+
+
+EXPORT_RESPONSES = {
+    200: {"content": {NDJSON_MEDIA_TYPE: {}, "text/csv": {}}, "description": "Streamed orders"},
+}
+
+
+@router.get("/export", response_class=StreamingResponse, responses=EXPORT_RESPONSES)
+@limiter.limit(export_limit)
+def export_orders(
+    request: Request,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    search: Optional[str] = None,
+    search_mode: SearchMode = "substring",
+    min_qty: Optional[int] = None,
+    max_qty: Optional[int] = None,
+    sort_by: str = "id",          # id | quantity | created_at | relevance (fulltext only)
+    sort_order: str = "asc",      # asc | desc
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    stmt = export_orders_query(current_user, search, min_qty, max_qty, sort_by, sort_order, search_mode)
+    return export_response(iter_export(stmt, format, current_user.id), format)
+
+
+STATS_DIMENSIONS = {
+    "status": OrderStat.status,
+    "day": OrderStat.day,
+    "item": OrderStat.item_name,
+}
+
+
+@router.get("/stats", response_model=list[OrderStatsRow], response_model_exclude_none=True)
+def order_stats(
+    group_by: list[Literal["status", "day", "item"]] = Query(["status"]),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    # Reads the order_stats rollup, so cost scales with groups, not orders
+    dims = [STATS_DIMENSIONS[d] for d in dict.fromkeys(group_by)]
+    order_count = func.sum(OrderStat.order_count)
+
+    stmt = (
+        select(*dims, order_count.label("order_count"), func.sum(OrderStat.quantity_sum).label("quantity_sum"))
+        .group_by(*dims)
+        .having(order_count > 0)
+        .order_by(*dims)
+    )
 
     # RBAC filter
     if current_user.role != "ADMIN":
-        stmt = stmt.where(Order.user_id == current_user.id)
+        stmt = stmt.where(OrderStat.user_id == current_user.id)
 
-    # Search filter
-    if search and search.strip():
-        q = f"%{search.strip()}%"
-        stmt = stmt.where(
-            or_(
-                Order.customer_name.ilike(q),
-                Order.item_name.ilike(q),
-            )
-        )
+    if date_from is not None:
+        stmt = stmt.where(OrderStat.day >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(OrderStat.day <= date_to)
 
-    # Quantity filters
-    if min_qty is not None:
-        stmt = stmt.where(Order.quantity >= min_qty)
-    if max_qty is not None:
-        stmt = stmt.where(Order.quantity <= max_qty)
-
-    # Sorting
-    sort_map = {
-        "id": Order.id,
-        "quantity": Order.quantity,
-        "created_at": Order.created_at,
-    }
-    col = sort_map.get(sort_by, Order.id)
+    return [OrderStatsRow(**row._mapping) for row in db.execute(stmt)]
 
-    if sort_order.lower() == "asc":
-        stmt = stmt.order_by(col.asc())
-    else:
-        stmt = stmt.order_by(col.desc())
 
-    stmt = stmt.limit(limit).offset(offset)
+def find_order(db: Session, order_id: int, include_archived: bool = False) -> Order | OrderArchive:
+    """The order, unless deleted; 404 otherwise. Archived orders are read-only."""
+    order = db.scalar(select(Order).where(Order.id == order_id, Order.deleted_at.is_(None)))
+    if order is None and include_archived:
+        order = db.scalar(
+            select(OrderArchive).where(OrderArchive.id == order_id, OrderArchive.deleted_at.is_(None))
+        )
+    if order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order
 
-    orders = db.scalars(stmt).all()
-    return list(orders)
 
 @router.get("/{order_id}", response_model=OrderOut)
 def get_order(
     order_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
-    order = db.scalar(select(Order).where(Order.id == order_id))
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
+    key = order_key(order_id)
+    cached = order_cache.get(key)
+    if cached is None:
+        order = find_order(db, order_id, include_archived=True)
+
+        cached = CachedResponse(
+            order.user_id,
+            order_etag(order),
+            OrderOut.model_validate(order).model_dump_json().encode(),
+        )
+        order_cache.set(key, cached, order_ttl(order.status))
 
-    if current_user.role != "ADMIN" and order.user_id != current_user.id:
+    if current_user.role != "ADMIN" and cached.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not allowed")
 
-    return order
-def validate_status_transition(current_status: str, new_status: OrderStatus) -> None:
-    allowed_transitions = {
-        "PENDING": {"PROCESSING", "CANCELLED"},
-        "PROCESSING": {"SHIPPED", "CANCELLED"},
-        "SHIPPED": {"DELIVERED"},
-        "DELIVERED": set(),
-        "CANCELLED": set(),
-    }
+    return cached_json_response(cached, if_none_match)
+
+
+def order_etag(order: Order) -> str:
+    # version changes on every write, so it identifies the representation
+    return f'"{order.id}.{order.version}"'
+
+
+def etag_matches(header: str, etag: str, weak: bool = False) -> bool:
+    candidates = [tag.strip() for tag in header.split(",")]
+    if weak:
+        # If-None-Match compares weakly: W/"x" matches "x"
+        candidates = [tag.removeprefix("W/") for tag in candidates]
+    return "*" in candidates or etag in candidates
 
-    allowed_next_statuses = allowed_transitions.get(current_status, set())
 
-    if new_status.value not in allowed_next_statuses:
+def cached_json_response(cached: CachedResponse, if_none_match: Optional[str]) -> Response:
+    headers = {"ETag": cached.etag, **dict(cached.headers)}
+    if if_none_match is not None and etag_matches(if_none_match, cached.etag, weak=True):
+        return Response(status_code=304, headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
+
+
+def concurrent_modification() -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail="Order was modified concurrently, reload it and retry",
+    )
+
+def validate_status_transition(current_status: str, new_status: OrderStatus) -> None:
+    if not can_transition(current_status, new_status.value):
         raise HTTPException(
             status_code=400,
             detail=f"Invalid status transition from {current_status} to {new_status.value}",
         )
+
+
+def allowed_predecessors(new_status: OrderStatus) -> list[str]:
+    return [status.value for status in ALLOWED_PREVIOUS_STATUSES[new_status.value]]
+
+
+def apply_status_batch(
+    db: Session,
+    ids: list[int],
+    new_status: OrderStatus,
+    current_user: CurrentUser,
+) -> OrderStatusBatchResult:
+    ids = list(dict.fromkeys(ids))
+    target = new_status.value
+
+    # One statement: lock the rows whose current status may move to the
+    # target (in id order, so concurrent batches can't deadlock), update
+    # them, and write their audit rows from the UPDATE's RETURNING. The
+    # moved rows come back for the stats rollup.
+    locked = (
+        select(Order.id, Order.status)
+        .where(
+            Order.id.in_(ids),
+            Order.status.in_(allowed_predecessors(new_status)),
+            Order.deleted_at.is_(None),
+        )
+        .order_by(Order.id)
+        .with_for_update()
+        .cte("locked")
+    )
+    moved = (
+        update(Order)
+        .where(Order.id == locked.c.id)
+        .values(status=target, version=Order.version + 1)
+        .returning(
+            Order.id.label("order_id"),
+            locked.c.status.label("old_status"),
+            Order.user_id,
+            Order.item_name,
+            Order.quantity,
+            Order.created_at,
+        )
+        .cte("moved")
+    )
+    events = (
+        insert(OrderEvent)
+        .from_select(
+            ["order_id", "changed_by_user_id", "old_status", "new_status", "note"],
+            select(
+                moved.c.order_id,
+                literal(current_user.id),
+                moved.c.old_status,
+                literal(target),
+                func.concat("Order status changed from ", moved.c.old_status, f" to {target}"),
+            ),
+        )
+        .cte("events")
+    )
+    moved_rows = db.execute(
+        select(moved).add_cte(events),
+        execution_options={"synchronize_session": False},
+    ).all()
+    updated = {row.order_id for row in moved_rows}
+    # The UPDATE and INSERT hide in CTEs of a SELECT, which the session
+    # doesn't count as a write
+    mark_written(db)
+    mark_orders_changed(db, updated)
+
+    bump_order_stats(db, [
+        change
+        for row in moved_rows
+        for change in (
+            (row.user_id, row.created_at, row.old_status, row.item_name, -1, -row.quantity),
+            (row.user_id, row.created_at, target, row.item_name, 1, row.quantity),
+        )
+    ])
+
+    rejected_ids = [i for i in ids if i not in updated]
+    current = {}
+    if rejected_ids:
+        current = dict(db.execute(
+            select(Order.id, Order.status).where(Order.id.in_(rejected_ids), Order.deleted_at.is_(None))
+        ).all())
+
+    # An order that may move to the target now was in another state when
+    # the UPDATE ran: a concurrent change got there first
+    found = [order_id for order_id in rejected_ids if order_id in current]
+    movable = dict(zip(found, can_transition_many((current[order_id], target) for order_id in found)))
+
+    rejected = []
+    for order_id in rejected_ids:
+        if order_id not in current:
+            reason = "Order not found"
+        elif movable[order_id]:
+            reason = f"Order changed concurrently, now {current[order_id]}; retry"
+        else:
+            reason = f"Invalid status transition from {current[order_id]} to {target}"
+        rejected.append(OrderStatusRejection(id=order_id, reason=reason))
+
+    db.commit()
+
+    return OrderStatusBatchResult(
+        updated=[i for i in ids if i in updated],
+        rejected=rejected,
+    )
+
+
+@router.patch("/status:batch", response_model=OrderStatusBatchResult)
+def update_order_status_batch(
+    payload: OrderStatusBatchUpdate,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(require_admin),
+):
+    if len(payload.ids) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.BULK_MAX_ITEMS} orders per request")
+
+    return apply_status_batch(db, payload.ids, payload.status, current_user)
+
+
 @router.patch("/{order_id}", response_model=OrderOut)
 def update_order_status(
     order_id: int,
     payload: OrderStatusUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin),
+    current_user: CurrentUser = Depends(require_admin),
 ):
-    order = db.scalar(select(Order).where(Order.id == order_id))
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
+    order = find_order(db, order_id)
+
+    if if_match is not None and not etag_matches(if_match, order_etag(order)):
+        raise HTTPException(status_code=412, detail="Order has changed since it was read")
 
     old_status = order.status
 
@@ -172,6 +856,19 @@ def update_order_status(
 
     order.status = payload.status.value
 
+    # UPDATE ... WHERE version = <read version>: a concurrent transition
+    # that committed first makes this match no rows
+    try:
+        db.flush()
+    except StaleDataError:
+        db.rollback()
+        raise concurrent_modification()
+
+    bump_order_stats(db, [
+        (order.user_id, order.created_at, old_status, order.item_name, -1, -order.quantity),
+        (order.user_id, order.created_at, order.status, order.item_name, 1, order.quantity),
+    ])
+
     event = OrderEvent(
         order_id=order.id,
         changed_by_user_id=current_user.id,
@@ -181,44 +878,107 @@ def update_order_status(
     )
 
     db.add(event)
+    enqueue_task(
+        db,
+        send_order_notification.name,
+        order_id=order.id,
+        customer_name=order.customer_name,
+        item_name=order.item_name,
+        status=order.status,
+    )
     db.commit()
     db.refresh(order)
 
+    response.headers["ETag"] = order_etag(order)
     return order
+
+
+order_events_adapter = TypeAdapter(list[OrderEventOut])
+
+EVENTS_PAGE_SIZE = 50
+
+
+def order_events_page(db: Session, order: Order, limit: int, cursor: Optional[str]) -> CachedResponse:
+    stmt = select(OrderEvent).where(
+        OrderEvent.order_id == order.id,
+        # Events can't predate their order, so this skips older partitions
+        OrderEvent.created_at >= order.created_at,
+    )
+    if cursor is not None:
+        try:
+            last_created_at, last_id = decode_cursor(cursor, "created_at", "desc")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+        stmt = stmt.where(tuple_(OrderEvent.created_at, OrderEvent.id) < tuple_(last_created_at, last_id))
+
+    # Fetch one extra row to know whether another page exists
+    events = db.scalars(
+        stmt.order_by(OrderEvent.created_at.desc(), OrderEvent.id.desc()).limit(limit + 1)
+    ).all()
+
+    headers = ()
+    if len(events) > limit:
+        events = events[:limit]
+        last = events[-1]
+        headers = (("X-Next-Cursor", encode_cursor("created_at", "desc", last.created_at, last.id)),)
+
+    # Every status change writes an event and bumps the version, so the
+    # order's ETag also identifies its history
+    return CachedResponse(
+        order.user_id,
+        order_etag(order),
+        order_events_adapter.dump_json(order_events_adapter.validate_python(events, from_attributes=True)),
+        headers,
+    )
+
+
 @router.get("/{order_id}/events", response_model=list[OrderEventOut])
 def get_order_events(
     order_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    limit: int = EVENTS_PAGE_SIZE,
+    cursor: Optional[str] = None,  # opaque, from a previous X-Next-Cursor header
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
-    order = db.scalar(select(Order).where(Order.id == order_id))
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
+    limit = min(max(limit, 1), 100)
+
+    # Only the default first page is cached: invalidation is per order
+    key = order_events_key(order_id) if cursor is None and limit == EVENTS_PAGE_SIZE else None
+    cached = order_cache.get(key) if key else None
+    if cached is None:
+        order = find_order(db, order_id, include_archived=True)
 
-    is_owner = order.user_id == current_user.id
+        cached = order_events_page(db, order, limit, cursor)
+        if key:
+            order_cache.set(key, cached, order_ttl(order.status))
+
+    is_owner = cached.owner_id == current_user.id
     is_admin = current_user.role == "ADMIN"
 
     if not (is_owner or is_admin):
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    events = db.scalars(
-        select(OrderEvent)
-        .where(OrderEvent.order_id == order_id)
-        .order_by(OrderEvent.created_at.desc())
-    ).all()
+    return cached_json_response(cached, if_none_match)
 
-    return list(events)
 
 @router.delete("/{order_id}", status_code=204)
 def delete_order(
     order_id: int,
     db: Session = Depends(get_db),
-    _admin: User = Depends(require_admin),
+    _admin: CurrentUser = Depends(require_admin),
 ):
-    order = db.scalar(select(Order).where(Order.id == order_id))
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
+    order = find_order(db, order_id)
+
+    # Soft delete: the row is hidden from every read until the archive job
+    # moves it out. The version check still catches concurrent writes.
+    order.deleted_at = func.now()
+    try:
+        db.flush()
+    except StaleDataError:
+        db.rollback()
+        raise concurrent_modification()
 
-    db.delete(order)
+    bump_order_stats(db, [(order.user_id, order.created_at, order.status, order.item_name, -1, -order.quantity)])
     db.commit()
     return None
@@ -0,0 +1,244 @@
+"""Async versions of the orders routes, served when settings.DB_ASYNC is on.
+
+Each handler awaits the matching sync handler from orders.py through
+AsyncSession.run_sync, so the query logic lives in one place while the
+database I/O runs on asyncpg without occupying a threadpool thread. The
+handlers' other blocking work (the Redis tiers of the order cache and
+recent writers, page encoding) goes to the threadpool through
+app.core.offload.run_blocking.
+"""
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.api.routes import orders
+from app.api.routes.orders import bearer, principal_from_token, principal_from_user
+from app.core.limiter import bulk_limit, export_limit, limit_orders, limiter
+from app.core.user_cache import CurrentUser
+from app.db.models import User
+from app.db.order_stats import OrderStatsDeltas
+from app.db.session import async_read_session, get_async_db
+from app.schemas.orders import (
+    BulkOrderResult,
+    OrderCreate,
+    OrderEventOut,
+    OrderOut,
+    OrderStatsRow,
+    OrderStatusBatchResult,
+    OrderStatusBatchUpdate,
+    OrderStatusUpdate,
+)
+
+router = APIRouter(prefix="/orders", tags=["orders"], dependencies=[Depends(limit_orders)])
+
+
+async def get_current_user(
+    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    db: AsyncSession = Depends(get_async_db),
+) -> CurrentUser:
+    email, principal = principal_from_token(creds.credentials)
+    if principal is None:
+        principal = principal_from_user(await db.scalar(select(User).where(User.email == email)))
+
+    db.info["user_id"] = principal.id
+    return principal
+
+
+async def get_async_read_db(current_user: CurrentUser = Depends(get_current_user)):
+    async with await async_read_session(current_user.id) as db:
+        yield db
+
+
+async def require_admin(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
+    return orders.require_admin(current_user)
+
+
+@router.post("", response_model=OrderOut, status_code=201)
+async def create_order(
+    payload: OrderCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    return await db.run_sync(
+        lambda s: orders.create_order(payload=payload, db=s, current_user=current_user)
+    )
+
+
+@router.post("/bulk", response_model=BulkOrderResult, openapi_extra=orders.BULK_OPENAPI)
+@limiter.limit(bulk_limit)
+async def create_orders_bulk(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    stats = OrderStatsDeltas()
+    result = await orders.ingest_bulk_orders(
+        request,
+        current_user,
+        lambda rows: db.run_sync(orders.insert_order_rows, rows, stats),
+    )
+    await db.run_sync(orders.commit_bulk_orders, stats)
+    return result
+
+
+@router.get("", response_model=list[OrderOut])
+async def list_orders(
+    response: Response,
+    search: Optional[str] = None,
+    search_mode: orders.SearchMode = "substring",
+    min_qty: Optional[int] = None,
+    max_qty: Optional[int] = None,
+    sort_by: str = "id",          # id | quantity | created_at | relevance (fulltext only)
+    sort_order: str = "desc",     # asc | desc
+    limit: int = 20,
+    offset: int = 0,
+    cursor: Optional[str] = None,  # opaque, from a previous X-Next-Cursor header
+    include_archived: bool = False,  # also list orders moved to orders_archive
+    count: Optional[orders.CountMode] = None,  # add an X-Total-Count header, worked out this way
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    return await db.run_sync(
+        lambda s: orders.list_orders(
+            response=response,
+            search=search,
+            search_mode=search_mode,
+            min_qty=min_qty,
+            max_qty=max_qty,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+            include_archived=include_archived,
+            count=count,
+            db=s,
+            current_user=current_user,
+        )
+    )
+
+
+async def aiter_export(stmt, fmt: str, user_id: int):
+    async with await async_read_session(user_id) as db:
+        yield orders.encode_export_header(fmt)
+        result = await db.stream(stmt)
+        async for partition in result.partitions():
+            yield await run_in_threadpool(orders.encode_export_rows, partition, fmt)
+
+
+@router.get("/export", response_class=StreamingResponse, responses=orders.EXPORT_RESPONSES)
+@limiter.limit(export_limit)
+async def export_orders(
+    request: Request,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    search: Optional[str] = None,
+    search_mode: orders.SearchMode = "substring",
+    min_qty: Optional[int] = None,
+    max_qty: Optional[int] = None,
+    sort_by: str = "id",          # id | quantity | created_at | relevance (fulltext only)
+    sort_order: str = "asc",      # asc | desc
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    stmt = orders.export_orders_query(
+        current_user, search, min_qty, max_qty, sort_by, sort_order, search_mode
+    )
+    return orders.export_response(aiter_export(stmt, format, current_user.id), format)
+
+
+@router.get("/stats", response_model=list[OrderStatsRow], response_model_exclude_none=True)
+async def order_stats(
+    group_by: list[Literal["status", "day", "item"]] = Query(["status"]),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    return await db.run_sync(
+        lambda s: orders.order_stats(
+            group_by=group_by, date_from=date_from, date_to=date_to, db=s, current_user=current_user
+        )
+    )
+
+
+@router.get("/{order_id}", response_model=OrderOut)
+async def get_order(
+    order_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    return await db.run_sync(
+        lambda s: orders.get_order(
+            order_id=order_id, if_none_match=if_none_match, db=s, current_user=current_user
+        )
+    )
+
+
+@router.patch("/status:batch", response_model=OrderStatusBatchResult)
+async def update_order_status_batch(
+    payload: OrderStatusBatchUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(require_admin),
+):
+    return await db.run_sync(
+        lambda s: orders.update_order_status_batch(payload=payload, db=s, current_user=current_user)
+    )
+
+
+@router.patch("/{order_id}", response_model=OrderOut)
+async def update_order_status(
+    order_id: int,
+    payload: OrderStatusUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(require_admin),
+):
+    return await db.run_sync(
+        lambda s: orders.update_order_status(
+            order_id=order_id,
+            payload=payload,
+            response=response,
+            if_match=if_match,
+            db=s,
+            current_user=current_user,
+        )
+    )
+
+
+@router.get("/{order_id}/events", response_model=list[OrderEventOut])
+async def get_order_events(
+    order_id: int,
+    limit: int = orders.EVENTS_PAGE_SIZE,
+    cursor: Optional[str] = None,  # opaque, from a previous X-Next-Cursor header
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    return await db.run_sync(
+        lambda s: orders.get_order_events(
+            order_id=order_id,
+            limit=limit,
+            cursor=cursor,
+            if_none_match=if_none_match,
+            db=s,
+            current_user=current_user,
+        )
+    )
+
+
+@router.delete("/{order_id}", status_code=204)
+async def delete_order(
+    order_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    _admin: CurrentUser = Depends(require_admin),
+):
+    return await db.run_sync(
+        lambda s: orders.delete_order(order_id=order_id, db=s, _admin=_admin)
+    )
@@ -1,5 +0,0 @@
-from fastapi import APIRouter
-from app.api.routes.auth import router as auth_router
-
-api_router = APIRouter()
-api_router.include_router(auth_router)
\ No newline at end of file
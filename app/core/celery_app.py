@@ -1,9 +1,30 @@
 from celery import Celery
+from celery.signals import setup_logging as celery_setup_logging, task_postrun, task_prerun
+
 from app.core.config import settings
+from app.core.logging import request_id_var, setup_logging
 
 celery_app = Celery(
     "order_management_worker",
     broker=settings.REDIS_URL,
     backend=settings.REDIS_URL,
     include=["app.tasks.notifications"],
-)
\ No newline at end of file
+)
+
+
+@celery_setup_logging.connect
+def _setup_worker_logging(**kwargs):
+    # Connecting this signal stops Celery replacing the root logger's
+    # handlers; the worker logs through the same queue/JSON pipeline
+    setup_logging()
+
+
+@task_prerun.connect
+def _bind_request_id(task=None, **kwargs):
+    # Set by the outbox relay from the request that wrote the row
+    request_id_var.set(getattr(task.request, "request_id", None) or task.request.id)
+
+
+@task_postrun.connect
+def _unbind_request_id(**kwargs):
+    request_id_var.set(None)
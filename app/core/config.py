@@ -6,12 +6,131 @@ class Settings(BaseSettings):
     ENV: str = "dev"
 
     DATABASE_URL: str
+    # Serve the API from async routes on an asyncpg AsyncEngine instead of
+    # sync routes in Starlette's threadpool
+    DB_ASYNC: bool = False
+    # Defaults to DATABASE_URL with the driver swapped for asyncpg
+    ASYNC_DATABASE_URL: str | None = None
+
+    # Per engine (primary and each replica, sync and async)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    # Reconnect pooled connections older than this (seconds, -1 never)
+    DB_POOL_RECYCLE: int = 1800
+    # Read-only endpoints are served from these (JSON list in the env),
+    # except for users who committed a write in the last
+    # READ_YOUR_WRITES_SECONDS
+    DATABASE_REPLICA_URLS: list[str] = []
+    READ_YOUR_WRITES_SECONDS: float = 5.0
 
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     REDIS_URL: str
 
+    # bcrypt cost factor; hashes with another cost are upgraded on login
+    BCRYPT_ROUNDS: int = 12
+    # Worker processes for password hashing (0 hashes inline in the request)
+    HASH_POOL_SIZE: int = 2
+    # Hash jobs allowed to wait for a worker before requests get a 503
+    HASH_QUEUE_LIMIT: int = 32
+
+    # POST /orders/bulk: max items per request, rows per INSERT statement
+    BULK_MAX_ITEMS: int = 10000
+    BULK_CHUNK_SIZE: int = 1000
+
+    # Rows fetched per server-side cursor round trip in GET /orders/export
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Encode GET /orders pages and NDJSON exports with orjson straight from
+    # row tuples, skipping ORM loading and OrderOut validation. The
+    # documented response schema is the same either way.
+    FAST_JSON_RESPONSES: bool = False
+
+    # Production server (gunicorn -c gunicorn.conf.py): worker processes
+    # (one per available core when unset). Workers are replaced after
+    # WORKER_MAX_REQUESTS requests, plus up to the jitter so they don't all
+    # restart together, or once their RSS passes WORKER_MAX_MEMORY_MB
+    # (checked every WORKER_MEMORY_CHECK_SECONDS; 0 turns it off).
+    WEB_CONCURRENCY: int | None = None
+    WORKER_MAX_REQUESTS: int = 10000
+    WORKER_MAX_REQUESTS_JITTER: int = 1000
+    WORKER_MAX_MEMORY_MB: int = 1024
+    WORKER_MEMORY_CHECK_SECONDS: float = 10.0
+
+    # Outbox relay (python -m app.tasks.relay): rows per publish batch,
+    # idle poll interval, and the port its /metrics listens on
+    OUTBOX_BATCH_SIZE: int = 500
+    OUTBOX_POLL_SECONDS: float = 1.0
+    OUTBOX_METRICS_PORT: int = 9101
+
+    # order_events partition maintenance (python -m app.tasks.event_partitions):
+    # monthly partitions kept ready ahead of time, and partitions older
+    # than the retention window detached and archived as gzipped CSV
+    EVENTS_PARTITION_MONTHS_AHEAD: int = 3
+    EVENTS_RETENTION_MONTHS: int = 24
+    EVENTS_ARCHIVE_DIR: str = "archive/order_events"
+
+    # Order archival (python -m app.tasks.order_archive): delivered,
+    # cancelled and deleted orders created more than this many days ago
+    # move to orders_archive, this many rows per transaction
+    ORDER_ARCHIVE_AFTER_DAYS: int = 90
+    ORDER_ARCHIVE_BATCH_SIZE: int = 1000
+
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # json | text
+    # Records buffered for the log writer thread before new ones are dropped
+    LOG_QUEUE_SIZE: int = 10000
+    # Fraction of 2xx/3xx access log lines kept; 4xx/5xx are always logged
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0
+
+    # Rate limit counters; defaults to REDIS_URL ("memory://" keeps them
+    # per process)
+    RATE_LIMIT_STORAGE_URL: str | None = None
+    RATE_LIMIT_REDIS_TIMEOUT: float = 0.2
+    # Per user (per address when unauthenticated) across all /orders
+    # routes; bulk and export also draw on their own, smaller budgets
+    RATE_LIMIT_ORDERS: str = "600/minute"
+    RATE_LIMIT_BULK: str = "10/minute"
+    RATE_LIMIT_EXPORT: str = "5/minute"
+
+    # Idempotency-Key on POST /orders and PATCH /orders/{id}: where keys
+    # live (redis, falling back to the database while it is unreachable |
+    # database | memory, per process), how long a 2xx response is replayed,
+    # how long a claim holds off duplicates if its request never finishes,
+    # and how long a duplicate waits on an in-flight request before a 409
+    IDEMPOTENCY_STORE: str = "redis"
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_LOCK_SECONDS: float = 30.0
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0
+
+    # How long a sent notification's task id is remembered, so the outbox
+    # relay publishing it again doesn't send it twice
+    NOTIFICATION_DEDUP_SECONDS: int = 86400
+
+    # Per-route latency and per-request DB metrics on /metrics
+    METRICS_ENABLED: bool = True
+
+    # Authenticated principals; role changes and deletes evict them in every
+    # worker as they commit (app.core.user_cache.UserChangeListener)
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10000
+
+    # GET /orders/{id} and /orders/{id}/events response cache. Writes
+    # invalidate the writing process's copies; other workers' copies
+    # expire within ORDER_CACHE_TTL_SECONDS. Delivered and cancelled orders
+    # only change by deletion, so with ORDER_CACHE_REDIS they are kept
+    # longer in Redis, where deletes invalidate them for every worker.
+    ORDER_CACHE_MAX_SIZE: int = 10000
+    ORDER_CACHE_TTL_SECONDS: float = 5.0
+    ORDER_CACHE_TERMINAL_TTL_SECONDS: float = 3600.0
+    # Share entries and invalidations between workers through REDIS_URL
+    ORDER_CACHE_REDIS: bool = False
+    # Take user id/role from the token claims and skip the user lookup.
+    # Role changes then only apply once the user's token is reissued.
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False
+
     class Config:
         env_file = ".env"
         extra = "ignore"
@@ -0,0 +1,124 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException
+
+from app.core import security
+from app.core.config import settings
+from app.core.metrics import HASH_QUEUE_WAIT_SECONDS, HASH_REJECTED, HASH_SECONDS
+
+
+def _run_timed(fn, *args):
+    # Runs in the worker process; wall clock so the parent can compare
+    started = time.time()
+    result = fn(*args)
+    return result, started, time.time()
+
+
+class HashingPool:
+    """Runs bcrypt in worker processes so it never holds a request worker's GIL.
+
+    At most `workers + queue_limit` jobs are in flight; beyond that callers
+    get a 503 instead of queueing behind a login burst.
+    """
+
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + queue_limit)
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Created lazily so each server worker process gets its own
+                # pool after fork; spawn avoids forking a threaded server.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _reset_executor(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def submit(self, operation: str, fn, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            HASH_REJECTED.labels(operation=operation).inc()
+            raise HTTPException(
+                status_code=503,
+                detail="Authentication is busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+
+        submitted = time.time()
+        outer: Future = Future()
+
+        def on_done(inner: Future) -> None:
+            self._slots.release()
+            try:
+                result, started, finished = inner.result()
+            except BrokenProcessPool as e:
+                self._reset_executor()
+                outer.set_exception(e)
+                return
+            except BaseException as e:
+                outer.set_exception(e)
+                return
+
+            HASH_QUEUE_WAIT_SECONDS.labels(operation=operation).observe(max(started - submitted, 0))
+            HASH_SECONDS.labels(operation=operation).observe(finished - started)
+            outer.set_result(result)
+
+        if self.workers <= 0:
+            inner: Future = Future()
+            try:
+                inner.set_result(_run_timed(fn, *args))
+            except BaseException as e:
+                inner.set_exception(e)
+            on_done(inner)
+            return outer
+
+        try:
+            inner = self._get_executor().submit(_run_timed, fn, *args)
+        except BaseException:
+            self._slots.release()
+            self._reset_executor()
+            raise
+
+        inner.add_done_callback(on_done)
+        return outer
+
+    def shutdown(self) -> None:
+        self._reset_executor()
+
+
+hashing_pool = HashingPool(settings.HASH_POOL_SIZE, settings.HASH_QUEUE_LIMIT)
+
+
+# Blocking variants for the sync routes: the request thread waits on the
+# pool, but the hashing itself runs (and holds a GIL) in another process.
+
+def hash_password(password: str) -> str:
+    return hashing_pool.submit("hash", security.hash_password, password).result()
+
+
+def verify_and_update_password(password: str, hashed: str) -> tuple[bool, str | None]:
+    return hashing_pool.submit("verify", security.verify_and_update_password, password, hashed).result()
+
+
+async def ahash_password(password: str) -> str:
+    return await asyncio.wrap_future(hashing_pool.submit("hash", security.hash_password, password))
+
+
+async def averify_and_update_password(password: str, hashed: str) -> tuple[bool, str | None]:
+    return await asyncio.wrap_future(
+        hashing_pool.submit("verify", security.verify_and_update_password, password, hashed)
+    )
@@ -0,0 +1,256 @@
+"""Idempotency-Key store: the first response to a key, replayed for its repeats.
+
+A request claims its key before it runs. Duplicates that arrive while
+it is in flight find the claim and wait for it. A 2xx response is then
+stored under the key for IDEMPOTENCY_TTL_SECONDS; any other outcome
+releases the claim, so the client's retry runs again.
+
+The store is Redis (REDIS_URL), falling back to the idempotency_keys
+table while Redis is unreachable; IDEMPOTENCY_STORE can also select the
+table alone, or a per-process memory store for tests and development.
+"""
+import base64
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from datetime import timedelta
+from typing import Literal, NamedTuple, Optional
+
+import redis
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.db.models import IdempotencyKey
+from app.db.session import engine
+
+logger = logging.getLogger("app")
+
+
+class StoredResponse(NamedTuple):
+    status: int
+    headers: list[tuple[str, str]]
+    body: bytes
+
+
+class Claim(NamedTuple):
+    state: Literal["acquired", "in_flight", "done"]
+    # Body hash of the request that holds or completed the key
+    fingerprint: str
+    # When acquired: hand back to complete() or release()
+    token: Optional[str] = None
+    response: Optional[StoredResponse] = None
+
+
+class MemoryIdempotencyStore:
+    """Per-process store, for tests and single-process development."""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        # key -> (expires_at, fingerprint, token, response or None while in flight)
+        self._entries: dict[str, tuple[float, str, str, Optional[StoredResponse]]] = {}
+        self._lock = threading.Lock()
+
+    def claim(self, key: str, fingerprint: str, lock_seconds: float) -> Claim:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                _, held_fingerprint, _, response = entry
+                return Claim("done" if response else "in_flight", held_fingerprint, response=response)
+
+            if len(self._entries) >= self.maxsize:
+                self._entries = {k: e for k, e in self._entries.items() if e[0] > now}
+            token = uuid.uuid4().hex
+            self._entries[key] = (now + lock_seconds, fingerprint, token, None)
+            return Claim("acquired", fingerprint, token)
+
+    def complete(self, key: str, token: str, response: StoredResponse, ttl: float) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] == token:
+                self._entries[key] = (time.monotonic() + ttl, entry[1], token, response)
+
+    def release(self, key: str, token: str) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] == token:
+                del self._entries[key]
+
+
+class DatabaseIdempotencyStore:
+    """Claims and responses in the idempotency_keys table, one short transaction each."""
+
+    # Fraction of claims that also delete a batch of expired rows
+    PURGE_PROBABILITY = 0.01
+    PURGE_BATCH = 100
+
+    def __init__(self, db_engine: Engine = engine):
+        self.engine = db_engine
+
+    def claim(self, key: str, fingerprint: str, lock_seconds: float) -> Claim:
+        token = uuid.uuid4().hex
+        stmt = insert(IdempotencyKey).values(
+            key=key,
+            fingerprint=fingerprint,
+            lock_token=token,
+            expires_at=func.now() + timedelta(seconds=lock_seconds),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.key],
+            set_={
+                "fingerprint": stmt.excluded.fingerprint,
+                "lock_token": stmt.excluded.lock_token,
+                "status_code": None,
+                "headers": None,
+                "body": None,
+                "expires_at": stmt.excluded.expires_at,
+            },
+            # Only an abandoned claim or an expired response is taken over
+            where=IdempotencyKey.expires_at <= func.now(),
+        ).returning(IdempotencyKey.key)
+
+        with self.engine.begin() as conn:
+            if random.random() < self.PURGE_PROBABILITY:
+                self._purge_expired(conn)
+            if conn.execute(stmt).first() is not None:
+                return Claim("acquired", fingerprint, token)
+            row = conn.execute(
+                select(IdempotencyKey.fingerprint, IdempotencyKey.status_code, IdempotencyKey.headers, IdempotencyKey.body)
+                .where(IdempotencyKey.key == key)
+            ).first()
+
+        if row is None:
+            # Released between the two statements; the caller polls again
+            return Claim("in_flight", fingerprint)
+        if row.status_code is None:
+            return Claim("in_flight", row.fingerprint)
+        headers = [tuple(header) for header in row.headers]
+        return Claim("done", row.fingerprint, response=StoredResponse(row.status_code, headers, row.body))
+
+    def complete(self, key: str, token: str, response: StoredResponse, ttl: float) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.key == key, IdempotencyKey.lock_token == token)
+                .values(
+                    status_code=response.status,
+                    headers=[list(header) for header in response.headers],
+                    body=response.body,
+                    expires_at=func.now() + timedelta(seconds=ttl),
+                )
+            )
+
+    def release(self, key: str, token: str) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.lock_token == token))
+
+    def _purge_expired(self, conn) -> None:
+        expired = (
+            select(IdempotencyKey.key)
+            .where(IdempotencyKey.expires_at < func.now())
+            .limit(self.PURGE_BATCH)
+            .with_for_update(skip_locked=True)
+        )
+        conn.execute(delete(IdempotencyKey).where(IdempotencyKey.key.in_(expired)))
+
+
+# Replace a claim (ARGV[1]) with a response (ARGV[2], kept ARGV[3] ms), or
+# delete it when there is no response, unless the claim has since expired
+# and someone else's is there
+_SWAP_CLAIM = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+if ARGV[2] == '' then
+    redis.call('DEL', KEYS[1])
+else
+    redis.call('SET', KEYS[1], ARGV[2], 'PX', ARGV[3])
+end
+return 1
+"""
+
+_PENDING = "pending:"
+
+
+class RedisIdempotencyStore:
+    """Claims as SET NX keys with an expiry; falls back to another store on Redis errors."""
+
+    def __init__(self, client: redis.Redis, fallback: Optional[DatabaseIdempotencyStore] = None):
+        self.redis = client
+        self.fallback = fallback
+        self._swap = client.register_script(_SWAP_CLAIM)
+
+    def claim(self, key: str, fingerprint: str, lock_seconds: float) -> Claim:
+        # The claim's value is its token: unique, and carries the fingerprint
+        token = f"{_PENDING}{uuid.uuid4().hex}:{fingerprint}"
+        try:
+            if self.redis.set(key, token, nx=True, px=int(lock_seconds * 1000)):
+                return Claim("acquired", fingerprint, token)
+            raw = self.redis.get(key)
+        except redis.RedisError:
+            if self.fallback is None:
+                raise
+            logger.warning("Idempotency store Redis call failed, using the fallback", exc_info=True)
+            return self.fallback.claim(key, fingerprint, lock_seconds)
+
+        if raw is None:
+            # Expired or released since the SET; the caller polls again
+            return Claim("in_flight", fingerprint)
+        raw = raw.decode()
+        if raw.startswith(_PENDING):
+            return Claim("in_flight", raw.rpartition(":")[2])
+        stored = json.loads(raw)
+        response = StoredResponse(
+            stored["status"], [tuple(header) for header in stored["headers"]], base64.b64decode(stored["body"])
+        )
+        return Claim("done", stored["fingerprint"], response=response)
+
+    def complete(self, key: str, token: str, response: StoredResponse, ttl: float) -> None:
+        # Claims taken on the fallback have tokens without the prefix
+        if not token.startswith(_PENDING):
+            if self.fallback is not None:
+                self.fallback.complete(key, token, response, ttl)
+            return
+        value = json.dumps({
+            "fingerprint": token.rpartition(":")[2],
+            "status": response.status,
+            "headers": response.headers,
+            "body": base64.b64encode(response.body).decode(),
+        })
+        try:
+            self._swap(keys=[key], args=[token, value, int(ttl * 1000)])
+        except redis.RedisError:
+            logger.warning("Could not store the response for an idempotency key", exc_info=True)
+
+    def release(self, key: str, token: str) -> None:
+        if not token.startswith(_PENDING):
+            if self.fallback is not None:
+                self.fallback.release(key, token)
+            return
+        try:
+            self._swap(keys=[key], args=[token, "", 0])
+        except redis.RedisError:
+            # The claim expires on its own after IDEMPOTENCY_LOCK_SECONDS
+            logger.warning("Could not release an idempotency key", exc_info=True)
+
+
+def _build_store():
+    if settings.IDEMPOTENCY_STORE == "memory":
+        return MemoryIdempotencyStore()
+    database = DatabaseIdempotencyStore()
+    if settings.IDEMPOTENCY_STORE == "database":
+        return database
+    client = redis.Redis.from_url(
+        settings.REDIS_URL,
+        socket_connect_timeout=settings.RATE_LIMIT_REDIS_TIMEOUT,
+        socket_timeout=settings.RATE_LIMIT_REDIS_TIMEOUT,
+    )
+    return RedisIdempotencyStore(client, fallback=database)
+
+
+idempotency_store = _build_store()
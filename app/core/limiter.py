@@ -1,4 +1,144 @@
+import logging
+import time
+
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse
+from jose import JWTError
+from limits import RateLimitItem, parse
+from limits.storage import MemoryStorage, Storage, storage_from_string
+from limits.strategies import MovingWindowRateLimiter
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-limiter = Limiter(key_func=get_remote_address)
\ No newline at end of file
+from app.core.config import settings
+from app.core.security import decode_access_token
+
+logger = logging.getLogger("app")
+
+# While the shared storage is unreachable, how long each process counts in
+# memory before trying it again
+STORAGE_RETRY_SECONDS = 5.0
+
+
+def rate_limit_key(request: Request) -> str:
+    """Authenticated callers are limited per user, everyone else per address."""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            return f"user:{decode_access_token(token)}"
+        except JWTError:
+            # Rejected later with a 401; until then it is just an address
+            pass
+    return get_remote_address(request)
+
+
+def _storage_uri() -> str:
+    return settings.RATE_LIMIT_STORAGE_URL or settings.REDIS_URL
+
+
+def _storage_options() -> dict:
+    if not _storage_uri().startswith(("redis", "rediss")):
+        return {}
+    # Fail fast when Redis is down so requests drop to the in-memory
+    # fallback instead of waiting on the socket
+    return {
+        "socket_connect_timeout": settings.RATE_LIMIT_REDIS_TIMEOUT,
+        "socket_timeout": settings.RATE_LIMIT_REDIS_TIMEOUT,
+    }
+
+
+# Counters live in Redis so every worker process shares them; moving-window
+# runs as one Lua script per hit, so concurrent workers can't race past a
+# limit. While Redis is unreachable each process limits on its own, in
+# memory, and rechecks Redis with backoff.
+limiter = Limiter(
+    key_func=rate_limit_key,
+    strategy="moving-window",
+    storage_uri=_storage_uri(),
+    storage_options=_storage_options(),
+    in_memory_fallback_enabled=True,
+    key_prefix="ratelimit",
+)
+
+
+class OrdersBudgetExceeded(HTTPException):
+    """429 for a spent RATE_LIMIT_ORDERS budget, with Retry-After set to when a unit frees up."""
+
+    def __init__(self, item: RateLimitItem, reset_at: float):
+        retry_after = max(1, int(reset_at - time.time()) + 1)
+        super().__init__(status_code=429, detail=str(item), headers={"Retry-After": str(retry_after)})
+
+
+class OrdersBudget:
+    """The RATE_LIMIT_ORDERS budget shared by every /orders route.
+
+    Counted with the limits library's moving window on the same storage as
+    the slowapi limits. While the storage is unreachable each process
+    counts in memory and tries it again after STORAGE_RETRY_SECONDS.
+    """
+
+    def __init__(self, storage: Storage, limit: str):
+        self.item = parse(limit)
+        self.storage = storage
+        self.window = MovingWindowRateLimiter(storage)
+        self.fallback = MovingWindowRateLimiter(MemoryStorage())
+        self.retry_at = 0.0
+
+    def _strategy(self) -> MovingWindowRateLimiter:
+        return self.window if time.monotonic() >= self.retry_at else self.fallback
+
+    def hit(self, key: str) -> None:
+        """Spend one unit of key's budget. Raises OrdersBudgetExceeded if it was already spent."""
+        if not limiter.enabled:
+            return
+        args = (self.item, "ratelimit", key, "global")
+        strategy = self._strategy()
+        try:
+            allowed = strategy.hit(*args)
+        except self.storage.base_exceptions:
+            logger.warning("Rate limit storage unreachable, limiting in memory", exc_info=True)
+            self.retry_at = time.monotonic() + STORAGE_RETRY_SECONDS
+            strategy = self.fallback
+            allowed = strategy.hit(*args)
+        if not allowed:
+            reset_at, _ = strategy.get_window_stats(*args)
+            raise OrdersBudgetExceeded(self.item, reset_at)
+
+    def reset(self) -> None:
+        self.fallback.storage.reset()
+        self.retry_at = 0.0
+        if self.storage.check():
+            self.storage.reset()
+
+
+orders_budget = OrdersBudget(storage_from_string(_storage_uri(), **_storage_options()), settings.RATE_LIMIT_ORDERS)
+
+
+def limit_orders(request: Request) -> None:
+    """Router dependency spending one unit of the caller's RATE_LIMIT_ORDERS budget.
+
+    slowapi's middleware can't resolve routes inside included routers on
+    this FastAPI version, so the budget is checked from the router instead.
+    Raises OrdersBudgetExceeded (429) once it is spent.
+    """
+    orders_budget.hit(rate_limit_key(request))
+
+
+def bulk_limit() -> str:
+    return settings.RATE_LIMIT_BULK
+
+
+def export_limit() -> str:
+    return settings.RATE_LIMIT_EXPORT
+
+
+def rate_limit_exceeded_handler(request: Request, exc: HTTPException) -> JSONResponse:
+    """429 naming the limit that was hit, for route limits and the orders budget alike."""
+    return JSONResponse({"error": f"Rate limit exceeded: {exc.detail}"}, status_code=429, headers=exc.headers)
+
+
+def reset_limits() -> None:
+    """Clear all counters in the shared storage and the orders budget's in-memory fallback."""
+    orders_budget.reset()
+    if orders_budget.storage.check():
+        limiter.reset()
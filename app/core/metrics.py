@@ -0,0 +1,111 @@
+import os
+
+from fastapi import Response
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "In-process cache lookups by cache and result (hit/miss)",
+    ["cache", "result"],
+)
+
+HASH_SECONDS = Histogram(
+    "password_hash_seconds",
+    "Time spent hashing/verifying a password in the hashing pool",
+    ["operation"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+HASH_QUEUE_WAIT_SECONDS = Histogram(
+    "password_hash_queue_wait_seconds",
+    "Time a hash job waited for a free hashing worker",
+    ["operation"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "Hash jobs refused with 503 because the hashing queue was full",
+    ["operation"],
+)
+
+OUTBOX_RELAYED = Counter(
+    "outbox_messages_relayed_total",
+    "Outbox messages published to the Celery broker",
+    ["task"],
+)
+OUTBOX_LAG_SECONDS = Histogram(
+    "outbox_relay_lag_seconds",
+    "Time from an outbox row's creation to its publication on the broker",
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+OUTBOX_OLDEST_AGE_SECONDS = Gauge(
+    "outbox_oldest_message_age_seconds",
+    "Age of the oldest unpublished outbox row (0 when the outbox is empty)",
+)
+OUTBOX_RELAY_FAILURES = Counter(
+    "outbox_relay_failures_total",
+    "Relay batches that failed and were left for the next poll",
+)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by method, route template and status code",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests currently being handled",
+    multiprocess_mode="livesum",
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "SQL statements executed while handling a request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100),
+)
+DB_SECONDS_PER_REQUEST = Histogram(
+    "db_query_seconds_per_request",
+    "Time spent executing SQL statements while handling a request",
+    ["route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+# Set from the pools by app.db.instrumentation.record_pool_metrics; under
+# gunicorn each worker reports its own pools and /metrics adds them up
+DB_POOL_SIZE = Gauge("db_pool_size", "Configured pool_size", ["engine"], multiprocess_mode="livesum")
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently checked out", ["engine"], multiprocess_mode="livesum"
+)
+DB_POOL_IDLE = Gauge("db_pool_idle", "Connections idle in the pool", ["engine"], multiprocess_mode="livesum")
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow", "Connections open beyond pool_size", ["engine"], multiprocess_mode="livesum"
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["engine"],
+    buckets=(0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Connection checkouts that gave up after pool_timeout",
+    ["engine"],
+)
+
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total",
+    "Log records discarded because the logging queue was full",
+)
+
+
+# Under gunicorn (gunicorn.conf.py), set before anything here is imported
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+
+def metrics_response() -> Response:
+    if MULTIPROCESS:
+        # Under gunicorn (gunicorn.conf.py) each worker writes its values
+        # there, and whichever worker serves /metrics reports them all
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
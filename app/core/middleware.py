@@ -1,20 +1,260 @@
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import re
 import time
 import uuid
-import logging
-from fastapi import Request
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from app.core import idempotency
+from app.core.config import settings
+from app.core.idempotency import StoredResponse
+from app.core.limiter import rate_limit_key
+from app.core.logging import request_id_var
+from app.core.metrics import (
+    DB_QUERIES_PER_REQUEST,
+    DB_SECONDS_PER_REQUEST,
+    HTTP_REQUEST_SECONDS,
+    HTTP_REQUESTS_IN_FLIGHT,
+    MULTIPROCESS,
+)
+from app.db.instrumentation import QueryStats, query_stats, record_pool_metrics
 
 logger = logging.getLogger("app")
+access_logger = logging.getLogger("app.access")
+
+# Caller-supplied ids are reused so one id follows a request across services
+_REQUEST_ID = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+_IDEMPOTENCY_KEY = re.compile(r"[\x21-\x7e]{1,255}")
+_IDEMPOTENT_ROUTES = {"POST": re.compile(r"/orders"), "PATCH": re.compile(r"/orders/\d+")}
+# Interval at which a duplicate re-checks a key that is in flight
+_IDEMPOTENCY_POLL_SECONDS = 0.05
+
+
+def route_label(scope) -> str:
+    # The route template, not the raw path, keeps label cardinality bounded
+    route = scope.get("route")
+    return route.path if route is not None else "unmatched"
+
+
+def _header(scope, name: bytes) -> str | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _incoming_request_id(scope) -> str | None:
+    value = _header(scope, b"x-request-id")
+    return value if value is not None and _REQUEST_ID.fullmatch(value) else None
+
+
+class RequestLoggingMiddleware:
+    """Sets the request id for the request's logs and writes a sampled access log.
+
+    Successful requests are logged with probability ACCESS_LOG_SAMPLE_RATE;
+    4xx/5xx responses always are.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _incoming_request_id(scope) or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        status_code = 500
+
+        async def send_with_request_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", []).append((b"x-request-id", request_id.encode("latin-1")))
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            sample_rate = settings.ACCESS_LOG_SAMPLE_RATE
+            if (status_code >= 400 or sample_rate >= 1 or random.random() < sample_rate) and access_logger.isEnabledFor(logging.INFO):
+                stats = query_stats.get()
+                access_logger.info(
+                    "%s %s %s",
+                    scope["method"],
+                    scope["path"],
+                    status_code,
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "route": route_label(scope),
+                        "status": status_code,
+                        "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                        "db_queries": stats.count if stats is not None else None,
+                    },
+                )
+            request_id_var.reset(token)
+
+
+class MetricsMiddleware:
+    """Per-route latency and per-request DB metrics.
+
+    Plain ASGI rather than an @app.middleware function: it adds no task
+    hop per request, and streamed responses are timed until the last chunk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = query_stats.set(stats)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            query_stats.reset(token)
+
+            route = route_label(scope)
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route, str(status_code)).observe(duration)
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats.count)
+            DB_SECONDS_PER_REQUEST.labels(route).observe(stats.seconds)
+            if MULTIPROCESS:
+                # /metrics is served by one worker; the others publish
+                # their pools as they finish requests
+                record_pool_metrics()
+
+
+async def _send_json(send, status: int, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    """Runs an order write carrying an Idempotency-Key at most once per key.
+
+    Covers POST /orders and PATCH /orders/{id}. A key is scoped to the
+    caller (as for rate limits) and the method and path. A repeat with the
+    same body gets the first 2xx response back, with Idempotent-Replayed
+    set; one that arrives while the first is still running waits for it.
+    A repeat with a different body is rejected with a 422.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        route = _IDEMPOTENT_ROUTES.get(scope.get("method")) if scope["type"] == "http" else None
+        key = _header(scope, b"idempotency-key") if route is not None and route.fullmatch(scope["path"]) else None
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not _IDEMPOTENCY_KEY.fullmatch(key):
+            await _send_json(send, 400, "Idempotency-Key must be 1-255 printable ASCII characters")
+            return
+
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+        body_sent = False
+
+        async def receive_body():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        store = idempotency.idempotency_store
+        caller = rate_limit_key(Request(scope))
+        store_key = hashlib.sha256(f"{caller}\n{scope['method']}\n{scope['path']}\n{key}".encode()).hexdigest()
+        fingerprint = hashlib.sha256(body).hexdigest()
+
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            claim = await run_in_threadpool(store.claim, store_key, fingerprint, settings.IDEMPOTENCY_LOCK_SECONDS)
+            if claim.fingerprint != fingerprint:
+                await _send_json(send, 422, "Idempotency-Key was already used with a different request body")
+                return
+            if claim.state == "done":
+                await self._replay(claim.response, send)
+                return
+            if claim.state == "acquired":
+                break
+            if time.monotonic() >= deadline:
+                await _send_json(send, 409, "A request with this Idempotency-Key is still in progress")
+                return
+            await asyncio.sleep(_IDEMPOTENCY_POLL_SECONDS)
+
+        status_code = 500
+        headers = []
+        response_chunks = []
+
+        async def send_and_record(message):
+            nonlocal status_code, headers
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                response_chunks.append(message.get("body", b""))
+            await send(message)
 
-async def request_logging_middleware(request: Request, call_next):
-    request_id = str(uuid.uuid4())
-    start = time.time()
+        try:
+            await self.app(scope, receive_body, send_and_record)
+        except BaseException:
+            await run_in_threadpool(store.release, store_key, claim.token)
+            raise
 
-    response = await call_next(request)
+        # The response has gone out by now: a store failure only costs the
+        # replay, so it is logged rather than raised
+        try:
+            if 200 <= status_code < 300:
+                response = StoredResponse(
+                    status_code,
+                    [(name.decode("latin-1"), value.decode("latin-1")) for name, value in headers],
+                    b"".join(response_chunks),
+                )
+                await run_in_threadpool(store.complete, store_key, claim.token, response, settings.IDEMPOTENCY_TTL_SECONDS)
+            else:
+                await run_in_threadpool(store.release, store_key, claim.token)
+        except Exception:
+            logger.exception("Could not record the outcome of an idempotent request")
 
-    duration_ms = (time.time() - start) * 1000
-    logger.info(
-        f"request_id={request_id} method={request.method} path={request.url.path} "
-        f"status={response.status_code} duration_ms={duration_ms:.2f}"
-    )
-    response.headers["X-Request-Id"] = request_id
-    return response
\ No newline at end of file
+    @staticmethod
+    async def _replay(response: StoredResponse, send) -> None:
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in response.headers]
+        headers.append((b"idempotent-replayed", b"true"))
+        await send({"type": "http.response.start", "status": response.status, "headers": headers})
+        await send({"type": "http.response.body", "body": response.body})
@@ -0,0 +1,17 @@
+"""Blocking calls made from code the async routes run through run_sync.
+
+The async routes (app.api.routes.orders_async) run the sync handlers
+inside AsyncSession.run_sync, on the event loop: their database I/O is
+awaited through SQLAlchemy's greenlet bridge, but anything else that
+blocks would stall every request on the worker. Such calls go through
+run_blocking, which hands them to the threadpool there and calls them
+directly everywhere else.
+"""
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+from starlette.concurrency import run_in_threadpool
+
+
+def run_blocking(fn, *args, **kwargs):
+    if in_greenlet():
+        return await_only(run_in_threadpool(fn, *args, **kwargs))
+    return fn(*args, **kwargs)
@@ -0,0 +1,149 @@
+import json
+import logging
+from typing import Iterable, NamedTuple, Optional
+
+import redis
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.offload import run_blocking
+from app.db.models import Order
+from app.schemas.orders import TERMINAL_STATUSES
+
+logger = logging.getLogger("app")
+
+_GONE = "gone"
+
+
+class CachedResponse(NamedTuple):
+    owner_id: int
+    etag: str
+    body: bytes
+    # Extra response headers, e.g. X-Next-Cursor
+    headers: tuple[tuple[str, str], ...] = ()
+
+
+class ResponseCache:
+    """Read-through cache of serialized responses: in-process LRU, then Redis.
+
+    Invalidating a key leaves a short-lived tombstone in both tiers, so a
+    request that read the row before the write committed (or from a
+    lagging replica) can't put the old version back.
+    """
+
+    def __init__(self, local: TTLCache, redis_client: Optional[redis.Redis], tombstone_ttl: float, local_ttl: float):
+        self.local = local
+        self.redis = redis_client
+        self.tombstone_ttl = tombstone_ttl
+        # Local copies are kept briefly so other workers' invalidations
+        # (deletes included) are seen within local_ttl
+        self.local_ttl = local_ttl
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        value = self.local.get(key)
+        if value is None and self.redis is not None:
+            raw = self._redis(self.redis.get, key)
+            if raw == _GONE.encode():
+                value = _GONE
+            elif raw is not None:
+                owner_id, etag, body, headers = json.loads(raw)
+                value = CachedResponse(owner_id, etag, body.encode(), tuple(map(tuple, headers)))
+            if value is not None:
+                self.local.set(key, value, ttl=self.local_ttl)
+        return None if value == _GONE else value
+
+    def set(self, key: str, value: CachedResponse, ttl: float) -> None:
+        if self.local.get(key) == _GONE:
+            return
+        # Other workers' invalidations can't reach this copy (and without a
+        # shared tier nothing else can), so it is never kept past local_ttl;
+        # longer TTLs only apply in Redis, where invalidations land
+        self.local.set(key, value, ttl=min(ttl, self.local_ttl))
+        if self.redis is None:
+            return
+
+        encoded = json.dumps([value.owner_id, value.etag, value.body.decode(), value.headers])
+        # NX: never overwrite a tombstone
+        self._redis(self.redis.set, key, encoded, px=int(ttl * 1000), nx=True)
+
+    def invalidate(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        for key in keys:
+            self.local.set(key, _GONE, ttl=self.tombstone_ttl)
+        if self.redis is not None and keys:
+            pipe = self.redis.pipeline(transaction=False)
+            for key in keys:
+                pipe.set(key, _GONE, px=int(self.tombstone_ttl * 1000))
+            self._redis(pipe.execute)
+
+    def _redis(self, fn, *args, **kwargs):
+        # The shared tier is an optimisation; reads never fail because of it
+        try:
+            return run_blocking(fn, *args, **kwargs)
+        except redis.RedisError:
+            logger.warning("Order cache Redis call failed", exc_info=True)
+            return None
+
+
+order_cache = ResponseCache(
+    TTLCache("orders", maxsize=settings.ORDER_CACHE_MAX_SIZE, ttl=settings.ORDER_CACHE_TTL_SECONDS),
+    redis.Redis.from_url(
+        settings.REDIS_URL,
+        socket_connect_timeout=settings.RATE_LIMIT_REDIS_TIMEOUT,
+        socket_timeout=settings.RATE_LIMIT_REDIS_TIMEOUT,
+    ) if settings.ORDER_CACHE_REDIS else None,
+    tombstone_ttl=settings.READ_YOUR_WRITES_SECONDS,
+    local_ttl=settings.ORDER_CACHE_TTL_SECONDS,
+)
+
+
+def order_key(order_id: int) -> str:
+    return f"order:{order_id}"
+
+
+def order_events_key(order_id: int) -> str:
+    return f"order_events:{order_id}"
+
+
+def order_ttl(status: str) -> float:
+    if status in TERMINAL_STATUSES:
+        return settings.ORDER_CACHE_TERMINAL_TTL_SECONDS
+    return settings.ORDER_CACHE_TTL_SECONDS
+
+
+def invalidate_orders(order_ids: Iterable[int]) -> None:
+    order_cache.invalidate(
+        key for order_id in order_ids for key in (order_key(order_id), order_events_key(order_id))
+    )
+
+
+def mark_orders_changed(session: Session, order_ids: Iterable[int]) -> None:
+    """Invalidate these orders now and again when the session commits.
+
+    Called from the flush hook below; Core UPDATEs have to call it directly.
+    """
+    order_ids = set(order_ids)
+    invalidate_orders(order_ids)
+    session.info.setdefault("invalidated_order_ids", set()).update(order_ids)
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_flushed_orders(session, flush_context):
+    mark_orders_changed(
+        session,
+        (obj.id for obj in list(session.dirty) + list(session.deleted) if isinstance(obj, Order)),
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_orders(session):
+    # Evict again once the change is visible, in case a concurrent request
+    # re-cached the old row between our flush and commit
+    invalidate_orders(session.info.pop("invalidated_order_ids", ()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_order_invalidations(session):
+    session.info.pop("invalidated_order_ids", None)
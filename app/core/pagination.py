@@ -0,0 +1,43 @@
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(sort_by: str, sort_order: str, last_value, last_id: int) -> str:
+    if isinstance(last_value, datetime):
+        last_value = last_value.isoformat()
+
+    payload = {"s": sort_by, "o": sort_order, "v": last_value, "id": last_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str):
+    """Return the (last_value, last_id) keyset position stored in a cursor.
+
+    Raises ValueError if the cursor is malformed or was issued for a
+    different sort than the one requested.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        last_value = payload["v"]
+        last_id = int(payload["id"])
+        cursor_sort = (payload["s"], payload["o"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Malformed cursor") from e
+
+    if cursor_sort != (sort_by, sort_order):
+        raise ValueError("Cursor does not match sort parameters")
+
+    try:
+        if sort_by == "created_at":
+            last_value = datetime.fromisoformat(last_value)
+        elif sort_by == "relevance":
+            last_value = float(last_value)
+        else:
+            last_value = int(last_value)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Malformed cursor") from e
+
+    return last_value, last_id
@@ -3,7 +3,7 @@ from jose import jwt, JWTError
 from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 
 def hash_password(password: str) -> str:
@@ -14,18 +14,31 @@ def verify_password(password: str, hashed: str) -> bool:
     return pwd_context.verify(password, hashed)
 
 
-def create_access_token(subject: str) -> str:
+def verify_and_update_password(password: str, hashed: str) -> tuple[bool, str | None]:
+    """Verify a password, also returning a new hash if the stored one uses
+    outdated settings (e.g. a lower bcrypt cost)."""
+    return pwd_context.verify_and_update(password, hashed)
+
+
+def create_access_token(subject: str, user_id: int | None = None, role: str | None = None) -> str:
     expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     payload = {"sub": subject, "exp": expire}
+    if user_id is not None:
+        payload["uid"] = user_id
+    if role is not None:
+        payload["role"] = role
     return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
 
 
-def decode_access_token(token: str) -> str:
+def decode_access_token_claims(token: str) -> dict:
     try:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        sub = payload.get("sub")
-        if not sub:
+        if not payload.get("sub"):
             raise JWTError("Missing subject")
-        return sub
+        return payload
     except JWTError as e:
-        raise e
\ No newline at end of file
+        raise e
+
+
+def decode_access_token(token: str) -> str:
+    return decode_access_token_claims(token)["sub"]
\ No newline at end of file
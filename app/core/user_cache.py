@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import os
+import select
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.models import User
+from app.db.session import engine
+
+logger = logging.getLogger("app")
+
+_GONE = "gone"
+# Kept in place of an evicted principal, so a request that read the row
+# before the change committed can't cache the old version again
+TOMBSTONE_SECONDS = 5.0
+# How long the first lookup in a process waits for the listener to connect
+LISTEN_START_TIMEOUT = 2.0
+LISTEN_RECONNECT_SECONDS = 1.0
+# Idle interval after which the listening connection is checked
+LISTEN_PING_SECONDS = 30.0
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """The authenticated principal, detached from any DB session so it can be cached."""
+
+    id: int
+    email: str
+    role: str
+
+    @classmethod
+    def from_user(cls, user: User) -> "CurrentUser":
+        return cls(id=user.id, email=user.email, role=user.role)
+
+
+# Keyed by token subject (the user's email). Entries are evicted in every
+# worker when the users row changes, whoever changed it (see
+# UserChangeListener); the TTL only bounds how long an unchanged row is kept.
+user_cache = TTLCache(
+    "users",
+    maxsize=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+)
+
+
+class UserChangeListener:
+    """Evicts cached principals when their users row changes, in every process.
+
+    A trigger on users NOTIFYs user_changes with the old email when a role
+    or email is updated or the row is deleted; this thread LISTENs on a
+    connection of its own. The cache is only used while it is listening:
+    notifications sent while it was disconnected are lost, so the cache is
+    cleared and bypassed until it is listening again.
+    """
+
+    def __init__(self, db_engine: Engine):
+        self.engine = db_engine
+        self.listening = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+
+    def ready(self) -> bool:
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self._run, name="user-change-listener", daemon=True)
+                    self.thread.start()
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                self.listening.wait(LISTEN_START_TIMEOUT)
+            # On the event loop: don't wait, look users up until it listens
+        return self.listening.is_set()
+
+    def reset(self) -> None:
+        self.listening = threading.Event()
+        self.thread = None
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self._listen()
+            except Exception:
+                logger.warning("User change listener disconnected, bypassing the user cache", exc_info=True)
+            self.listening.clear()
+            user_cache.clear()
+            time.sleep(LISTEN_RECONNECT_SECONDS)
+
+    def _listen(self) -> None:
+        cargs, cparams = self.engine.dialect.create_connect_args(self.engine.url)
+        conn = self.engine.dialect.connect(*cargs, **cparams)
+        try:
+            conn.autocommit = True
+            cursor = conn.cursor()
+            cursor.execute("LISTEN user_changes")
+            self.listening.set()
+            while True:
+                if not select.select([conn], [], [], LISTEN_PING_SECONDS)[0]:
+                    # Quiet for a while: make sure the connection is still there
+                    cursor.execute("SELECT 1")
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    invalidate_user(conn.notifies.pop(0).payload)
+        finally:
+            conn.close()
+
+
+_listener = UserChangeListener(engine)
+
+
+def cached_user(email: str) -> Optional[CurrentUser]:
+    if not _listener.ready():
+        return None
+    principal = user_cache.get(email)
+    return None if principal == _GONE else principal
+
+
+def cache_user(user: User) -> CurrentUser:
+    principal = CurrentUser.from_user(user)
+    if _listener.ready() and user_cache.get(principal.email) != _GONE:
+        user_cache.set(principal.email, principal)
+    return principal
+
+
+def invalidate_user(email: str) -> None:
+    user_cache.set(email, _GONE, ttl=TOMBSTONE_SECONDS)
+
+
+def _after_fork_in_child():
+    # The listener thread does not survive fork; the child starts its own
+    # on first use
+    _listener.reset()
+    user_cache.clear()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+# The trigger reaches every process once the change commits; evicting on
+# flush as well makes this process see its own ORM changes immediately.
+@event.listens_for(Session, "after_flush")
+def _invalidate_flushed_users(session, flush_context):
+    emails = session.info.setdefault("invalidated_user_emails", set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            attrs = inspect(obj).attrs
+            if obj in session.deleted or attrs.role.history.has_changes() or attrs.email.history.has_changes():
+                emails.add(obj.email)
+                emails.update(attrs.email.history.deleted)
+
+    for email in emails:
+        invalidate_user(email)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session):
+    # Evict again once the change is visible, in case a concurrent request
+    # re-cached the old row between our flush and commit
+    for email in session.info.pop("invalidated_user_emails", ()):
+        invalidate_user(email)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session):
+    session.info.pop("invalidated_user_emails", None)
@@ -0,0 +1,100 @@
+"""Pool and per-request query metrics for the SQLAlchemy engines.
+
+Pool occupancy is read from the pools when /metrics is scraped and, with
+several worker processes, after every request, since the scrape only
+reaches one of them; checkout waits are timed in the pool itself. Statement counts and time accumulate
+in the QueryStats of the current request (see app.core.middleware) and
+are not tracked outside one.
+"""
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.metrics import (
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_IDLE,
+    DB_POOL_OVERFLOW,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUTS,
+    DB_POOL_WAIT_SECONDS,
+)
+
+
+class QueryStats:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+class _TimedCheckout:
+    metrics_name = "default"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.labels(engine=self.metrics_name).inc()
+            raise
+        finally:
+            DB_POOL_WAIT_SECONDS.labels(engine=self.metrics_name).observe(time.perf_counter() - started)
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep its label
+        pool = super().recreate()
+        pool.metrics_name = self.metrics_name
+        return pool
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+_engines: dict[str, Engine] = {}
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if query_stats.get() is not None:
+        conn.info["query_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("query_started", None)
+    stats = query_stats.get()
+    if started is not None and stats is not None:
+        stats.count += 1
+        stats.seconds += time.perf_counter() - started
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Label the engine's pool metrics and count its statements per request."""
+    engine.pool.metrics_name = name
+    _engines[name] = engine
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def record_pool_metrics() -> None:
+    """Copy each engine's current pool occupancy into the db_pool_* gauges."""
+    for name, engine in _engines.items():
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            continue
+        DB_POOL_SIZE.labels(name).set(pool.size())
+        DB_POOL_CHECKED_OUT.labels(name).set(pool.checkedout())
+        DB_POOL_IDLE.labels(name).set(pool.checkedin())
+        # QueuePool counts overflow from -pool_size until the pool is full
+        DB_POOL_OVERFLOW.labels(name).set(max(pool.overflow(), 0))
@@ -1,5 +1,9 @@
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy import String, Integer, DateTime, func, ForeignKey,Text
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import String, Integer, BigInteger, Computed, Date, DateTime, func, ForeignKey, LargeBinary, Text, Index
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 
 
 class Base(DeclarativeBase):
@@ -17,38 +21,133 @@ class User(Base):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # One index per list_orders sort, with and without the RBAC user_id filter
+        Index("ix_orders_user_id_id", "user_id", "id"),
+        Index("ix_orders_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_orders_user_id_quantity_id", "user_id", "quantity", "id"),
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_quantity_id", "quantity", "id"),
+        # Trigram indexes for the ilike '%term%' search
+        Index(
+            "ix_orders_customer_name_trgm",
+            "customer_name",
+            postgresql_using="gin",
+            postgresql_ops={"customer_name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_orders_item_name_trgm",
+            "item_name",
+            postgresql_using="gin",
+            postgresql_ops={"item_name": "gin_trgm_ops"},
+        ),
+        # Full-text search (search_mode=fulltext)
+        Index("ix_orders_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     customer_name: Mapped[str] = mapped_column(String(200), nullable=False)
     item_name: Mapped[str] = mapped_column(String(200), nullable=False)
     quantity: Mapped[int] = mapped_column(Integer, nullable=False)
-    status: Mapped[str] = mapped_column(String(50), nullable=False, default="PENDING")
+    status: Mapped[str] = mapped_column(String(50), nullable=False, default="PENDING", index=True)
 
     user_id: Mapped[int] = mapped_column(
         ForeignKey("users.id"),
         nullable=False,
-        index=True
     )
 
     created_at: Mapped[DateTime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now()
     )
-class OrderEvent(Base):
-    __tablename__ = "order_events"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    # 'simple' config: names and product names shouldn't be stemmed.
+    # Left unmapped (see exclude_properties): query it as
+    # Order.__table__.c.search_vector.
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed("to_tsvector('simple', customer_name || ' ' || item_name)", persisted=True),
+    )
+
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
+
+    # Set by DELETE /orders/{id}; the row stays for its audit trail until
+    # app.tasks.order_archive moves it to orders_archive
+    deleted_at: Mapped[Optional[DateTime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __mapper_args__ = {
+        # Fetch created_at with RETURNING at flush, for the stats rollup
+        "eager_defaults": True,
+        # ORM UPDATE/DELETE compare-and-swap on version and raise
+        # StaleDataError if another transaction got there first
+        "version_id_col": version,
+        # Otherwise eager_defaults would return the generated tsvector
+        # from every INSERT and UPDATE
+        "exclude_properties": ["search_vector"],
+    }
+
+
+class OrderArchive(Base):
+    """Delivered, cancelled and deleted orders moved out of orders by app.tasks.order_archive.
+
+    Same columns as orders (ids are kept), so list_orders can read both
+    through one UNION ALL.
+    """
+
+    __tablename__ = "orders_archive"
+    __table_args__ = (
+        Index("ix_orders_archive_user_id_id", "user_id", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    customer_name: Mapped[str] = mapped_column(String(200), nullable=False)
+    item_name: Mapped[str] = mapped_column(String(200), nullable=False)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[str] = mapped_column(String(50), nullable=False)
 
-    order_id: Mapped[int] = mapped_column(
-        ForeignKey("orders.id"),
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id"),
         nullable=False,
-        index=True
     )
 
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed("to_tsvector('simple', customer_name || ' ' || item_name)", persisted=True),
+    )
+
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    deleted_at: Mapped[Optional[DateTime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    archived_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now()
+    )
+
+    __mapper_args__ = {"exclude_properties": ["search_vector"]}
+
+
+class OrderEvent(Base):
+    """Audit log of status changes, range-partitioned by month on created_at.
+
+    Partitions are created ahead of time, and archived once past
+    retention, by app.tasks.event_partitions.
+    """
+
+    __tablename__ = "order_events"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
+
+    # The partition key has to be part of the primary key
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+
+    # No foreign key: the order may since have moved to orders_archive
+    order_id: Mapped[int] = mapped_column(Integer, nullable=False)
+
     changed_by_user_id: Mapped[int] = mapped_column(
         ForeignKey("users.id"),
         nullable=False,
-        index=True
     )
 
     old_status: Mapped[str] = mapped_column(String(50), nullable=False)
@@ -58,5 +157,89 @@ class OrderEvent(Base):
 
     created_at: Mapped[DateTime] = mapped_column(
         DateTime(timezone=True),
+        primary_key=True,
         server_default=func.now()
     )
+
+
+# GET /orders/{id}/events pages newest first; the only index, to keep the
+# append path cheap
+Index(
+    "ix_order_events_order_id_created_at",
+    OrderEvent.order_id,
+    OrderEvent.created_at.desc(),
+    OrderEvent.id.desc(),
+)
+
+
+class OrderStat(Base):
+    """Per-user daily rollup of orders by status and item, maintained by the write paths."""
+
+    __tablename__ = "order_stats"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    status: Mapped[str] = mapped_column(String(50), primary_key=True)
+    item_name: Mapped[str] = mapped_column(String(200), primary_key=True)
+
+    order_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    quantity_sum: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class OrderCount(Base):
+    """Per-user order totals behind GET /orders?count=cached, maintained by the write paths.
+
+    order_count is the user's orders in orders, archived_count those in
+    orders_archive; soft-deleted orders are in neither.
+    """
+
+    __tablename__ = "order_counts"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    order_count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    archived_count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class OutboxMessage(Base):
+    """A Celery task recorded in the transaction of the write that caused it.
+
+    app.tasks.relay publishes pending rows to the broker and deletes them.
+    """
+
+    __tablename__ = "outbox"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    task_name: Mapped[str] = mapped_column(String(200), nullable=False)
+    kwargs: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    # Request that wrote the row, carried into the task's logs
+    request_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now()
+    )
+
+
+class IdempotencyKey(Base):
+    """A claimed Idempotency-Key and, once the request finished, its response.
+
+    Used by app.core.idempotency when Redis is not the store (or is down).
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    # sha256 of the caller, route and key
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # sha256 of the request body, to reject a key reused for another request
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    # Identifies the claim, so a request whose claim expired can't
+    # overwrite or release the next one's
+    lock_token: Mapped[str] = mapped_column(String(32), nullable=False)
+
+    # Null while the first request is in flight
+    status_code: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    headers: Mapped[Optional[list]] = mapped_column(JSONB, nullable=True)
+    body: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+
+    # The claim's expiry while in flight, the replay window's once done
+    expires_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
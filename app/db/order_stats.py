@@ -0,0 +1,115 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Iterable, Mapping, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.db.models import OrderCount, OrderStat
+
+# (user_id, created_at, status, item_name, count_delta, quantity_delta)
+StatsChange = tuple[int, datetime, str, str, int, int]
+
+
+def stats_day(created_at: datetime):
+    return created_at.astimezone(timezone.utc).date()
+
+
+class OrderStatsDeltas:
+    """Rollup deltas summed across statements, applied to order_stats in one go.
+
+    Bulk writers gather every chunk's deltas here and apply them just
+    before committing, so the rollup rows are locked for the end of the
+    transaction only, and all at once in sorted order.
+    """
+
+    def __init__(self):
+        self.totals: dict[tuple, list[int]] = defaultdict(lambda: [0, 0])
+
+    def add(self, changes: Iterable[StatsChange]) -> None:
+        for user_id, created_at, status, item_name, count, quantity in changes:
+            total = self.totals[(user_id, stats_day(created_at), status, item_name)]
+            total[0] += count
+            total[1] += quantity
+
+    def apply(self, db: Session) -> None:
+        """Upsert the deltas in the caller's transaction and start over."""
+        totals, self.totals = self.totals, defaultdict(lambda: [0, 0])
+        if not totals:
+            return
+
+        # Sorted so concurrent writers lock rollup rows in the same order
+        rows = [
+            {
+                "user_id": user_id,
+                "day": day,
+                "status": status,
+                "item_name": item_name,
+                "order_count": count,
+                "quantity_sum": quantity,
+            }
+            for (user_id, day, status, item_name), (count, quantity) in sorted(totals.items())
+        ]
+
+        stmt = insert(OrderStat).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[OrderStat.user_id, OrderStat.day, OrderStat.status, OrderStat.item_name],
+            set_={
+                "order_count": OrderStat.order_count + stmt.excluded.order_count,
+                "quantity_sum": OrderStat.quantity_sum + stmt.excluded.quantity_sum,
+            },
+        )
+        db.execute(stmt)
+
+        # Status changes net to zero per user; creates and deletes don't
+        counts: dict[int, int] = defaultdict(int)
+        for (user_id, _, _, _), (count, _) in totals.items():
+            counts[user_id] += count
+        bump_order_counts(db, {user_id: (count, 0) for user_id, count in counts.items() if count})
+
+
+def bump_order_stats(db: Session, changes: Iterable[StatsChange]) -> None:
+    """Apply order count/quantity deltas to the order_stats rollup.
+
+    Runs in the caller's transaction, so the rollup commits or rolls back
+    together with the orders it describes.
+    """
+    deltas = OrderStatsDeltas()
+    deltas.add(changes)
+    deltas.apply(db)
+
+
+def bump_order_counts(db: Session, changes: Mapping[int, tuple[int, int]]) -> None:
+    """Apply per-user (order_count, archived_count) deltas to order_counts.
+
+    Runs in the caller's transaction, like bump_order_stats.
+    """
+    if not changes:
+        return
+
+    # Sorted so concurrent writers lock counter rows in the same order
+    rows = [
+        {"user_id": user_id, "order_count": live, "archived_count": archived}
+        for user_id, (live, archived) in sorted(changes.items())
+    ]
+    stmt = insert(OrderCount).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[OrderCount.user_id],
+        set_={
+            "order_count": OrderCount.order_count + stmt.excluded.order_count,
+            "archived_count": OrderCount.archived_count + stmt.excluded.archived_count,
+        },
+    )
+    db.execute(stmt)
+
+
+def cached_order_count(db: Session, user_id: Optional[int], include_archived: bool = False) -> int:
+    """Orders for user_id (everyone's when None) from order_counts, without touching orders."""
+    total = OrderCount.order_count
+    if include_archived:
+        total = total + OrderCount.archived_count
+    stmt = select(func.coalesce(func.sum(total), 0))
+    if user_id is not None:
+        stmt = stmt.where(OrderCount.user_id == user_id)
+    return int(db.scalar(stmt))
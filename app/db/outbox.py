@@ -0,0 +1,13 @@
+from sqlalchemy.orm import Session
+
+from app.core.logging import request_id_var
+from app.db.models import OutboxMessage
+
+
+def enqueue_task(db: Session, task_name: str, **kwargs) -> None:
+    """Record a Celery task to run once the caller's transaction commits.
+
+    Nothing touches the broker here: the row commits or rolls back with the
+    write it describes, and the outbox relay publishes it afterwards.
+    """
+    db.add(OutboxMessage(task_name=task_name, kwargs=kwargs, request_id=request_id_var.get()))
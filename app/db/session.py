@@ -1,9 +1,216 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import logging
+import os
+import random
+from typing import Optional
+
+import redis
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.offload import run_blocking
+from app.db.instrumentation import TimedAsyncQueuePool, TimedQueuePool, instrument_engine
+
+logger = logging.getLogger("app")
+
+
+def _pool_options() -> dict:
+    return {
+        "pool_pre_ping": True,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+
+def _async_url(database_url: str) -> str:
+    url = make_url(database_url)
+    if url.get_backend_name() == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+    return url.render_as_string(hide_password=False)
+
+
+def _async_database_url() -> str:
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    return _async_url(settings.DATABASE_URL)
+
+
+engine = create_engine(settings.DATABASE_URL, poolclass=TimedQueuePool, **_pool_options())
+replica_engines = [
+    create_engine(url, poolclass=TimedQueuePool, **_pool_options())
+    for url in settings.DATABASE_REPLICA_URLS
+]
+
+if settings.METRICS_ENABLED:
+    instrument_engine(engine, "sync")
+    for i, replica in enumerate(replica_engines):
+        instrument_engine(replica, f"sync-replica-{i}")
+
+# Built on first use (get_async_engine), so sync deployments open no
+# asyncpg pools and don't need an async driver for their DATABASE_URL
+_async_engine: Optional[AsyncEngine] = None
+async_replica_engines: list[AsyncEngine] = []
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        primary = create_async_engine(_async_database_url(), poolclass=TimedAsyncQueuePool, **_pool_options())
+        replicas = [
+            create_async_engine(_async_url(url), poolclass=TimedAsyncQueuePool, **_pool_options())
+            for url in settings.DATABASE_REPLICA_URLS
+        ]
+        if settings.METRICS_ENABLED:
+            instrument_engine(primary.sync_engine, "async")
+            for i, replica in enumerate(replicas):
+                instrument_engine(replica.sync_engine, f"async-replica-{i}")
+        async_replica_engines[:] = replicas
+        AsyncRoutingSession.replicas = [replica.sync_engine for replica in replicas]
+        _async_engine = primary
+    return _async_engine
+
+
+def _dispose_after_fork():
+    # Pooled connections are sockets shared with the parent (a preloading
+    # server's master, a prefork Celery worker); the child drops its copy
+    # of the pools without closing them and connects afresh
+    async_engines = [_async_engine, *async_replica_engines] if _async_engine is not None else []
+    for sync_engine in (engine, *replica_engines, *(e.sync_engine for e in async_engines)):
+        sync_engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_dispose_after_fork)
+
+
+class RecentWriters:
+    """Users who committed a write in the last `ttl` seconds.
+
+    Marked in Redis so every server worker sees them, not just the one
+    that handled the write; a user's next read often lands elsewhere. The
+    local copy answers for this worker's own writers without a round
+    trip. While Redis is unreachable everyone counts as a recent writer,
+    so reads fall back to the primary rather than to a lagging replica.
+
+    Redis is never called on the event loop: the async routes check with
+    wrote_recently_async, and marks committed there go through run_blocking.
+    """
+
+    def __init__(self, local: TTLCache, redis_client: Optional[redis.Redis], ttl: float):
+        self.local = local
+        self.redis = redis_client
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"recent_writer:{user_id}"
+
+    def mark(self, user_id: int) -> None:
+        self.local.set(user_id, True, ttl=self.ttl)
+        if self.redis is not None:
+            run_blocking(self._mark_shared, user_id)
+
+    def wrote_recently(self, user_id: Optional[int]) -> bool:
+        if user_id is None:
+            return False
+        if self.local.get(user_id) is not None:
+            return True
+        return self.redis is not None and self._wrote_shared(user_id)
+
+    async def wrote_recently_async(self, user_id: Optional[int]) -> bool:
+        if user_id is None:
+            return False
+        if self.local.get(user_id) is not None:
+            return True
+        return self.redis is not None and await run_in_threadpool(self._wrote_shared, user_id)
+
+    def _mark_shared(self, user_id: int) -> None:
+        try:
+            self.redis.set(self._key(user_id), 1, px=int(self.ttl * 1000))
+        except redis.RedisError:
+            logger.warning("Could not mark a recent writer in Redis", exc_info=True)
+
+    def _wrote_shared(self, user_id: int) -> bool:
+        try:
+            return bool(self.redis.exists(self._key(user_id)))
+        except redis.RedisError:
+            logger.warning("Could not check for a recent writer in Redis", exc_info=True)
+            return True
+
+    def clear(self) -> None:
+        self.local.clear()
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Their reads stay on the primary until replication has had time to catch
+# up. Only replicas make this matter, so Redis is only used with them.
+recent_writers = RecentWriters(
+    TTLCache("recent_writers", maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.READ_YOUR_WRITES_SECONDS),
+    redis.Redis.from_url(
+        settings.REDIS_URL,
+        socket_connect_timeout=settings.RATE_LIMIT_REDIS_TIMEOUT,
+        socket_timeout=settings.RATE_LIMIT_REDIS_TIMEOUT,
+    ) if settings.DATABASE_REPLICA_URLS else None,
+    ttl=settings.READ_YOUR_WRITES_SECONDS,
+)
+
+
+class RoutingSession(Session):
+    """Session that reads from a replica when opened with info={"read_only": True}.
+
+    Flushes and INSERT/UPDATE/DELETE statements always go to the primary
+    (the session's bind). When the session's info carries a user_id, a
+    commit that wrote anything marks that user in recent_writers. Writes
+    hidden in CTEs of a SELECT are not seen here; see mark_written.
+    """
+
+    replicas: list[Engine] = []
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        writing = self._flushing or (clause is not None and clause.is_dml)
+        if writing:
+            self.info["wrote"] = True
+        elif self.replicas and self.info.get("read_only"):
+            # One replica per session, so its queries share a replication point
+            if "replica" not in self.info:
+                self.info["replica"] = random.choice(self.replicas)
+            return self.info["replica"]
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+class SyncRoutingSession(RoutingSession):
+    replicas = replica_engines
+
+
+class AsyncRoutingSession(RoutingSession):
+    # Filled in by get_async_engine
+    replicas = []
+
+
+def mark_written(session: Session) -> None:
+    """Count the session as having written, for statements get_bind can't tell are writes."""
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_writer(session):
+    if session.info.pop("wrote", False) and session.info.get("user_id") is not None:
+        recent_writers.mark(session.info["user_id"])
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _forget_rolled_back_writes(session):
+    session.info.pop("wrote", None)
+
+
+def read_only_info(user_id: int | None) -> dict:
+    return {"read_only": not recent_writers.wrote_recently(user_id), "user_id": user_id}
+
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=SyncRoutingSession)
 
 
 def get_db():
@@ -11,4 +218,30 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def read_session(user_id: int | None = None) -> Session:
+    """A session for read-only endpoints: replica-backed unless user_id wrote recently."""
+    return SessionLocal(info=read_only_info(user_id))
+
+
+# Objects returned by the async routes are serialized after the handler
+# returns, outside the session's greenlet, so they must not expire on
+# commit. Bound per session to get_async_engine().
+AsyncSessionLocal = async_sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=AsyncRoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal(bind=get_async_engine()) as db:
+        yield db
+
+
+async def async_read_session(user_id: int | None = None) -> AsyncSession:
+    read_only = not await recent_writers.wrote_recently_async(user_id)
+    return AsyncSessionLocal(bind=get_async_engine(), info={"read_only": read_only, "user_id": user_id})
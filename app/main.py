@@ -1,18 +1,31 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 from app.core.config import settings
 from app.core.logging import setup_logging
-from app.core.middleware import request_logging_middleware
-from app.core.limiter import limiter
+from app.core.middleware import IdempotencyMiddleware, MetricsMiddleware, RequestLoggingMiddleware
+from app.core.limiter import OrdersBudgetExceeded, limiter, rate_limit_exceeded_handler
+from app.core.metrics import metrics_response
+from app.db.instrumentation import record_pool_metrics
+from app.core.hashing import hashing_pool
 
 from slowapi.errors import RateLimitExceeded
-from slowapi import _rate_limit_exceeded_handler
 
-from app.api.routes.auth import router as auth_router
-from app.api.routes.orders import router as orders_router
+from app.api.routes import auth, auth_async, orders, orders_async
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(title=settings.APP_NAME)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    hashing_pool.shutdown()
+
+
+app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
+
+# Innermost, so replayed responses still get CORS and request id headers
+app.add_middleware(IdempotencyMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,18 +36,33 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "Idempotent-Replayed"],
 )
 
 setup_logging()
-app.middleware("http")(request_logging_middleware)
+app.add_middleware(RequestLoggingMiddleware)
+if settings.METRICS_ENABLED:
+    # Added last so it wraps the logging middleware, which reads its query counts
+    app.add_middleware(MetricsMiddleware)
 
 app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
+app.add_exception_handler(OrdersBudgetExceeded, rate_limit_exceeded_handler)
 
 # include routers correctly
-app.include_router(auth_router)
-app.include_router(orders_router)
+if settings.DB_ASYNC:
+    app.include_router(auth_async.router)
+    app.include_router(orders_async.router)
+else:
+    app.include_router(auth.router)
+    app.include_router(orders.router)
 
 @app.get("/health")
 def health():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    record_pool_metrics()
+    return metrics_response()
\ No newline at end of file
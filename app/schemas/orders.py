@@ -1,6 +1,9 @@
-from pydantic import BaseModel, Field
+import orjson
+from pydantic import BaseModel, Field, computed_field
 from enum import Enum
-from datetime import datetime
+from datetime import date, datetime
+from types import MappingProxyType
+from typing import Iterable
 
 
 class OrderStatus(str, Enum):
@@ -11,6 +14,49 @@ class OrderStatus(str, Enum):
     CANCELLED = "CANCELLED"
 
 
+# The order state machine. Statuses are coded by declaration order and
+# the transitions flattened into a bytes table, so checks are an index
+# into an immutable buffer: _TRANSITIONS[current * N + target].
+_NEXT = {
+    OrderStatus.PENDING: (OrderStatus.PROCESSING, OrderStatus.CANCELLED),
+    OrderStatus.PROCESSING: (OrderStatus.SHIPPED, OrderStatus.CANCELLED),
+    OrderStatus.SHIPPED: (OrderStatus.DELIVERED,),
+    OrderStatus.DELIVERED: (),
+    OrderStatus.CANCELLED: (),
+}
+STATUSES = tuple(OrderStatus)
+STATUS_CODES = MappingProxyType({status.value: code for code, status in enumerate(STATUSES)})
+_TRANSITIONS = bytes(target in _NEXT[current] for current in STATUSES for target in STATUSES)
+
+ALLOWED_NEXT_STATUSES = MappingProxyType({
+    current.value: tuple(t for t in STATUSES if t in _NEXT[current]) for current in STATUSES
+})
+ALLOWED_PREVIOUS_STATUSES = MappingProxyType({
+    target.value: tuple(c for c in STATUSES if target in _NEXT[c]) for target in STATUSES
+})
+# Orders in these states never change again (short of deletion)
+TERMINAL_STATUSES = frozenset(status.value for status in STATUSES if not _NEXT[status])
+
+
+def can_transition(current: str, target: str) -> bool:
+    c, t = STATUS_CODES.get(current), STATUS_CODES.get(target)
+    return c is not None and t is not None and _TRANSITIONS[c * len(STATUSES) + t] == 1
+
+
+def can_transition_many(pairs: Iterable[tuple[str, str]]) -> list[bool]:
+    """Check many (current, target) status pairs in one pass.
+
+    Unknown statuses are never valid.
+    """
+    n = len(STATUSES)
+    code = STATUS_CODES.get
+    table = _TRANSITIONS
+    return [
+        c is not None and t is not None and table[c * n + t] == 1
+        for c, t in ((code(current), code(target)) for current, target in pairs)
+    ]
+
+
 class OrderCreate(BaseModel):
     customer_name: str = Field(min_length=1, max_length=200)
     item_name: str = Field(min_length=1, max_length=200)
@@ -21,6 +67,11 @@ class OrderStatusUpdate(BaseModel):
     status: OrderStatus
 
 
+class OrderStatusBatchUpdate(BaseModel):
+    ids: list[int] = Field(min_length=1)
+    status: OrderStatus
+
+
 class OrderOut(BaseModel):
     id: int
     customer_name: str
@@ -28,8 +79,34 @@ class OrderOut(BaseModel):
     quantity: int
     status: OrderStatus
 
+    @computed_field
+    @property
+    def allowed_next_statuses(self) -> list[OrderStatus]:
+        """Statuses a PATCH may move this order to."""
+        return list(ALLOWED_NEXT_STATUSES[self.status.value])
+
     class Config:
         from_attributes = True
+
+
+# OrderOut's stored fields, in declaration order
+ORDER_OUT_FIELDS = tuple(OrderOut.model_fields)
+_STATUS_INDEX = ORDER_OUT_FIELDS.index("status")
+_NEXT_STATUS_VALUES = {
+    status: [s.value for s in allowed] for status, allowed in ALLOWED_NEXT_STATUSES.items()
+}
+
+
+def dump_orders_json(rows: Iterable[tuple]) -> bytes:
+    """JSON for a list of OrderOut from rows of ORDER_OUT_FIELDS values (extra trailing columns are ignored).
+
+    Same bytes as dumping the validated models, without building them.
+    """
+    fields = ORDER_OUT_FIELDS
+    return orjson.dumps([
+        {**dict(zip(fields, row)), "allowed_next_statuses": _NEXT_STATUS_VALUES[row[_STATUS_INDEX]]}
+        for row in rows
+    ])
 class OrderEventOut(BaseModel):
     id: int
     order_id: int
@@ -40,4 +117,39 @@ class OrderEventOut(BaseModel):
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class BulkOrderCreated(BaseModel):
+    index: int
+    id: int
+
+
+class BulkOrderError(BaseModel):
+    index: int
+    errors: list[dict]
+
+
+class BulkOrderResult(BaseModel):
+    created: list[BulkOrderCreated]
+    errors: list[BulkOrderError]
+
+
+
+class OrderStatusRejection(BaseModel):
+    id: int
+    reason: str
+
+
+class OrderStatusBatchResult(BaseModel):
+    updated: list[int]
+    rejected: list[OrderStatusRejection]
+
+
+
+class OrderStatsRow(BaseModel):
+    status: OrderStatus | None = None
+    day: date | None = None
+    item_name: str | None = None
+    order_count: int
+    quantity_sum: int
@@ -0,0 +1,199 @@
+"""Keeps order_events partitions ready and archives expired ones.
+
+Run once a day, from cron or any scheduler:
+
+    python -m app.tasks.event_partitions
+
+Creates the monthly partitions for the next EVENTS_PARTITION_MONTHS_AHEAD
+months, moving in any of their rows order_events_default caught while the
+partition was missing. Then every month that ended more than
+EVENTS_RETENTION_MONTHS ago has its partition detached, written to
+EVENTS_ARCHIVE_DIR/order_events_YYYYMM.csv.gz and dropped. Expired rows
+left in order_events_default (months that never got a partition) are
+moved to EVENTS_ARCHIVE_DIR/order_events_default_<run time>.csv.gz.
+"""
+import gzip
+import logging
+import os
+import re
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+from app.core.logging import setup_logging
+from app.db.models import OrderEvent
+from app.db.session import engine
+
+logger = logging.getLogger("app")
+
+MONTHLY_PARTITION = re.compile(r"order_events_(\d{4})(\d{2})")
+DEFAULT_PARTITION = "order_events_default"
+EVENT_COLUMNS = ", ".join(col.name for col in OrderEvent.__table__.c)
+
+
+def add_months(month: date, months: int) -> date:
+    total = month.year * 12 + month.month - 1 + months
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"order_events_{month:%Y%m}"
+
+
+def partition_month(name: str) -> date | None:
+    match = MONTHLY_PARTITION.fullmatch(name)
+    return date(int(match[1]), int(match[2]), 1) if match else None
+
+
+def attached_partitions(conn: Connection) -> set[str]:
+    return set(conn.scalars(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'order_events'::regclass"
+    )))
+
+
+def monthly_tables(conn: Connection) -> list[str]:
+    # Includes partitions a failed run detached but did not drop yet
+    names = conn.scalars(text(
+        "SELECT tablename FROM pg_tables WHERE schemaname = current_schema() "
+        "AND tablename LIKE 'order\\_events\\_%'"
+    ))
+    return sorted(name for name in names if partition_month(name) is not None)
+
+
+def ensure_partitions(conn: Connection, today: date, months_ahead: int) -> list[str]:
+    """Create any missing partitions from today's month through months_ahead. Returns their names."""
+    existing = attached_partitions(conn)
+    created = []
+    for i in range(months_ahead + 1):
+        month = add_months(today.replace(day=1), i)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        create_partition(conn, month)
+        created.append(name)
+    return created
+
+
+def create_partition(conn: Connection, month: date) -> None:
+    name = partition_name(month)
+    # Bounds in UTC, like the migration that created the first ones
+    start, end = f"{month:%Y-%m-%d} 00:00:00+00", f"{add_months(month, 1):%Y-%m-%d} 00:00:00+00"
+    bounds = f"FOR VALUES FROM ('{start}') TO ('{end}')"
+    in_month = f"created_at >= '{start}' AND created_at < '{end}'"
+
+    stray = conn.scalar(text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_month})"))
+    if not stray:
+        conn.execute(text(f"CREATE TABLE {name} PARTITION OF order_events {bounds}"))
+        return
+
+    # The job fell behind and the default partition caught this month's
+    # rows, which would violate its new constraint. Detach it, create the
+    # partition, move the rows across and re-attach it, all in the
+    # caller's transaction.
+    conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+    conn.execute(text(f"ALTER TABLE order_events DETACH PARTITION {DEFAULT_PARTITION}"))
+    conn.execute(text(f"CREATE TABLE {name} PARTITION OF order_events {bounds}"))
+    moved = conn.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE {in_month} RETURNING {EVENT_COLUMNS}) "
+        f"INSERT INTO {name} ({EVENT_COLUMNS}) SELECT {EVENT_COLUMNS} FROM moved"
+    ))
+    conn.execute(text(f"ALTER TABLE order_events ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+    logger.warning("Moved %s rows from %s into new partition %s", moved.rowcount, DEFAULT_PARTITION, name)
+
+
+def copy_to_archive(raw, query: str, path: Path) -> Path:
+    """COPY a table or (query) to path as gzipped CSV, on disk once this returns."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(".gz.partial")
+    with gzip.open(partial, "wb") as f:
+        raw.cursor().copy_expert(f"COPY {query} TO STDOUT WITH (FORMAT csv, HEADER)", f)
+    with open(partial, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(partial, path)
+    return path
+
+
+def archive_partition(db_engine: Engine, name: str, archive_dir: Path) -> Path:
+    """Detach a partition, copy it to <archive_dir>/<name>.csv.gz, then drop it."""
+    with db_engine.begin() as conn:
+        if name in attached_partitions(conn):
+            # Plain DETACH briefly locks order_events (CONCURRENTLY isn't
+            # allowed with a default partition); don't queue behind long queries
+            conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+            conn.execute(text(f"ALTER TABLE order_events DETACH PARTITION {name}"))
+
+    raw = db_engine.raw_connection()
+    try:
+        path = copy_to_archive(raw, name, archive_dir / f"{name}.csv.gz")
+        raw.commit()
+    finally:
+        raw.close()
+
+    # Only once the archive is safely on disk
+    with db_engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE {name}"))
+    return path
+
+
+def archive_expired_default_rows(db_engine: Engine, cutoff: date, archive_dir: Path) -> Path | None:
+    """Move rows older than cutoff out of the default partition into an archive file.
+
+    They are deleted in the transaction that copies them out, which only
+    commits once the file is on disk.
+    """
+    expired = f"created_at < '{cutoff:%Y-%m-%d} 00:00:00+00'"
+    with db_engine.connect() as conn:
+        if not conn.scalar(text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {expired})")):
+            return None
+
+    path = archive_dir / f"{DEFAULT_PARTITION}_{datetime.now(timezone.utc):%Y%m%dT%H%M%S}.csv.gz"
+    raw = db_engine.raw_connection()
+    try:
+        copy_to_archive(raw, f"(DELETE FROM {DEFAULT_PARTITION} WHERE {expired} RETURNING {EVENT_COLUMNS})", path)
+        raw.commit()
+    finally:
+        raw.close()
+    return path
+
+
+def archive_expired_partitions(
+    db_engine: Engine,
+    today: date,
+    retention_months: int,
+    archive_dir: Path,
+) -> list[Path]:
+    cutoff = add_months(today.replace(day=1), -retention_months)
+    with db_engine.connect() as conn:
+        names = monthly_tables(conn)
+    archived = [
+        archive_partition(db_engine, name, archive_dir)
+        for name in names
+        if add_months(partition_month(name), 1) <= cutoff
+    ]
+    default_rows = archive_expired_default_rows(db_engine, cutoff, archive_dir)
+    if default_rows is not None:
+        archived.append(default_rows)
+    return archived
+
+
+def run_maintenance(db_engine: Engine = engine, today: date | None = None) -> None:
+    today = today or datetime.now(timezone.utc).date()
+
+    with db_engine.begin() as conn:
+        for name in ensure_partitions(conn, today, settings.EVENTS_PARTITION_MONTHS_AHEAD):
+            logger.info("Created partition %s", name)
+
+    archived = archive_expired_partitions(
+        db_engine, today, settings.EVENTS_RETENTION_MONTHS, Path(settings.EVENTS_ARCHIVE_DIR)
+    )
+    for path in archived:
+        logger.info("Archived partition to %s", path)
+
+
+if __name__ == "__main__":
+    setup_logging()
+    run_maintenance()
@@ -1,11 +1,58 @@
 import logging
+from typing import Optional
+
+import redis
+
 from app.core.celery_app import celery_app
+from app.core.config import settings
 
 logger = logging.getLogger("app")
 
+# Claims on the task ids of notifications already sent; the same Redis as
+# the broker, so it is up whenever tasks are being delivered
+notification_claims = redis.Redis.from_url(
+    settings.REDIS_URL,
+    socket_connect_timeout=settings.RATE_LIMIT_REDIS_TIMEOUT,
+    socket_timeout=settings.RATE_LIMIT_REDIS_TIMEOUT,
+)
+
+
+def claim_notification(task_id: str) -> bool:
+    """Atomically claim task_id. False if another delivery of it already did."""
+    try:
+        return bool(notification_claims.set(f"notif:{task_id}", 1, nx=True, ex=settings.NOTIFICATION_DEDUP_SECONDS))
+    except redis.RedisError:
+        # Sending twice beats not sending at all
+        logger.warning("Could not claim notification %s, sending without a claim", task_id, exc_info=True)
+        return True
+
+
+def release_notification(task_id: str) -> None:
+    try:
+        notification_claims.delete(f"notif:{task_id}")
+    except redis.RedisError:
+        logger.warning("Could not release notification claim %s", task_id, exc_info=True)
+
+
+@celery_app.task(name="send_order_notification", bind=True)
+def send_order_notification(
+    self, order_id: int, customer_name: str, item_name: str, status: Optional[str] = None
+) -> str:
+    # The outbox relay may publish a message again if it dies before
+    # committing; the task id is derived from the outbox row, so only the
+    # first delivery to claim it sends the notification.
+    task_id = self.request.id
+    if task_id and not claim_notification(task_id):
+        return "duplicate"
 
-@celery_app.task(name="send_order_notification")
-def send_order_notification(order_id: int, customer_name: str, item_name: str) -> str:
-    message = f"Order notification sent for order_id={order_id}, customer={customer_name}, item={item_name}"
-    logger.info(message)
-    return message
\ No newline at end of file
+    try:
+        message = f"Order notification sent for order_id={order_id}, customer={customer_name}, item={item_name}"
+        if status is not None:
+            message += f", status={status}"
+        logger.info(message)
+    except Exception:
+        # Not sent: let a redelivery try again
+        if task_id:
+            release_notification(task_id)
+        raise
+    return message
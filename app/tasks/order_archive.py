@@ -0,0 +1,88 @@
+"""Moves finished orders from orders to orders_archive.
+
+Run once a day, from cron or any scheduler:
+
+    python -m app.tasks.order_archive
+
+Delivered, cancelled and soft-deleted orders created more than
+ORDER_ARCHIVE_AFTER_DAYS ago are moved ORDER_ARCHIVE_BATCH_SIZE at a
+time, each batch in its own short transaction. They stay readable by id
+and through GET /orders?include_archived=true.
+"""
+import logging
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import setup_logging
+from app.db.models import Order, OrderArchive
+from app.db.order_stats import bump_order_counts
+from app.db.session import SessionLocal
+from app.schemas.orders import TERMINAL_STATUSES
+
+logger = logging.getLogger("app")
+
+# Columns copied as they are; search_vector is recomputed by the archive
+ARCHIVED_COLUMNS = [
+    "id", "customer_name", "item_name", "quantity", "status", "user_id", "created_at", "version", "deleted_at",
+]
+
+
+def archive_orders_batch(db: Session, cutoff: datetime, batch_size: int | None = None) -> int:
+    """Move up to batch_size finished orders created before cutoff. Returns the count."""
+    batch_size = batch_size or settings.ORDER_ARCHIVE_BATCH_SIZE
+
+    # SKIP LOCKED: rows a request is writing right now wait for the next run
+    # rather than the request waiting for us
+    locked = (
+        select(Order.id)
+        .where(
+            Order.created_at < cutoff,
+            or_(Order.status.in_(TERMINAL_STATUSES), Order.deleted_at.is_not(None)),
+        )
+        .order_by(Order.created_at, Order.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .cte("locked")
+    )
+    moved = (
+        delete(Order)
+        .where(Order.id == locked.c.id)
+        .returning(*(getattr(Order, name) for name in ARCHIVED_COLUMNS))
+        .cte("moved")
+    )
+    archived = db.execute(
+        insert(OrderArchive)
+        .from_select(ARCHIVED_COLUMNS, select(*(moved.c[name] for name in ARCHIVED_COLUMNS)))
+        .returning(OrderArchive.user_id, OrderArchive.deleted_at),
+        execution_options={"synchronize_session": False},
+    ).all()
+    # Deleted orders already left the counts when they were deleted
+    moved_per_user = Counter(user_id for user_id, deleted_at in archived if deleted_at is None)
+    bump_order_counts(db, {user_id: (-n, n) for user_id, n in moved_per_user.items()})
+    db.commit()
+    return len(archived)
+
+
+def run_archive(now: datetime | None = None) -> int:
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=settings.ORDER_ARCHIVE_AFTER_DAYS)
+
+    total = 0
+    with SessionLocal() as db:
+        while True:
+            count = archive_orders_batch(db, cutoff)
+            total += count
+            if count < settings.ORDER_ARCHIVE_BATCH_SIZE:
+                break
+
+    logger.info("Archived %d orders created before %s", total, cutoff.isoformat())
+    return total
+
+
+if __name__ == "__main__":
+    setup_logging()
+    run_archive()
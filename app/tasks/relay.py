@@ -0,0 +1,98 @@
+"""Publishes outbox rows to the Celery broker in batches.
+
+Runs as its own process next to the Celery worker:
+
+    python -m app.tasks.relay
+"""
+import logging
+import time
+from datetime import datetime, timezone
+
+from celery import Celery
+from prometheus_client import start_http_server
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.metrics import OUTBOX_LAG_SECONDS, OUTBOX_OLDEST_AGE_SECONDS, OUTBOX_RELAY_FAILURES, OUTBOX_RELAYED
+from app.db.models import OutboxMessage
+from app.db.session import SessionLocal
+
+logger = logging.getLogger("app")
+
+
+def outbox_task_id(message_id: int) -> str:
+    # Stable per row: a batch republished after a failed commit reuses its
+    # task ids, which the tasks use to drop duplicates
+    return f"outbox-{message_id}"
+
+
+def relay_outbox_batch(db: Session, app: Celery = celery_app, batch_size: int | None = None) -> int:
+    """Publish up to batch_size pending messages, then delete them. Returns the count."""
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+
+    # SKIP LOCKED lets several relays drain the table without double-sending
+    messages = db.scalars(
+        select(OutboxMessage)
+        .order_by(OutboxMessage.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not messages:
+        db.rollback()
+        return 0
+
+    # One broker connection for the whole batch
+    with app.producer_or_acquire() as producer:
+        for message in messages:
+            app.send_task(
+                message.task_name,
+                kwargs=message.kwargs,
+                task_id=outbox_task_id(message.id),
+                headers={"request_id": message.request_id},
+                producer=producer,
+            )
+
+    db.execute(delete(OutboxMessage).where(OutboxMessage.id.in_([m.id for m in messages])))
+    db.commit()
+
+    now = datetime.now(timezone.utc)
+    for message in messages:
+        OUTBOX_RELAYED.labels(task=message.task_name).inc()
+        OUTBOX_LAG_SECONDS.observe((now - message.created_at).total_seconds())
+
+    return len(messages)
+
+
+def oldest_pending_age(db: Session) -> float:
+    oldest = db.scalar(select(func.min(OutboxMessage.created_at)))
+    db.rollback()
+    if oldest is None:
+        return 0.0
+    return (datetime.now(timezone.utc) - oldest).total_seconds()
+
+
+def run_relay() -> None:
+    start_http_server(settings.OUTBOX_METRICS_PORT)
+    logger.info("Outbox relay started")
+
+    while True:
+        relayed = 0
+        with SessionLocal() as db:
+            try:
+                relayed = relay_outbox_batch(db)
+                OUTBOX_OLDEST_AGE_SECONDS.set(oldest_pending_age(db))
+            except Exception:
+                # Broker or database unavailable: the rows stay put and are
+                # retried on the next poll
+                OUTBOX_RELAY_FAILURES.inc()
+                logger.exception("Outbox relay batch failed")
+
+        # A full batch means there is a backlog, so keep draining
+        if relayed < settings.OUTBOX_BATCH_SIZE:
+            time.sleep(settings.OUTBOX_POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    run_relay()
@@ -0,0 +1,80 @@
+"""Measure per-request latency of GET /health with access logging to stdout.
+
+Drives the ASGI app in-process (no sockets), with sys.stdout replaced
+before the app configures logging:
+
+    python -m benchmarks.access_log --requests 3000 --sink slow
+
+--sink devnull discards output; --sink slow sleeps --write-delay-ms on every
+write, like a stdout pipe whose reader has fallen behind. Prints one JSON
+object with mean/p50/p99 latency in microseconds.
+"""
+import argparse
+import asyncio
+import io
+import json
+import sys
+import time
+
+import httpx
+
+from benchmarks.load_compare import percentile
+
+
+class SlowSink(io.TextIOBase):
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.writes = 0
+
+    def write(self, s: str) -> int:
+        self.writes += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return len(s)
+
+
+async def run(app, requests: int) -> list[float]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(200):
+            await client.get("/health")
+
+        latencies = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            r = await client.get("/health")
+            latencies.append(time.perf_counter() - start)
+            r.raise_for_status()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--sink", choices=["devnull", "slow"], default="slow")
+    parser.add_argument("--write-delay-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    sink = SlowSink(args.write_delay_ms / 1000 if args.sink == "slow" else 0)
+    real_stdout = sys.stdout
+    sys.stdout = sink
+    try:
+        from app.main import app
+
+        latencies = asyncio.run(run(app, args.requests))
+    finally:
+        sys.stdout = real_stdout
+
+    latencies.sort()
+    print(json.dumps({
+        "sink": args.sink,
+        "requests": args.requests,
+        "mean_us": round(sum(latencies) / len(latencies) * 1e6),
+        "p50_us": round(percentile(latencies, 50) * 1e6),
+        "p99_us": round(percentile(latencies, 99) * 1e6),
+        "sink_writes": sink.writes,
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Compare order ingestion through POST /orders vs POST /orders/bulk.
+
+    uvicorn app.main:app --port 8000
+    python -m benchmarks.bulk_insert --url http://localhost:8000 --orders 2000
+
+Prints one JSON object with orders/second for each path.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from benchmarks.load_compare import login
+
+
+def make_orders(count: int) -> list[dict]:
+    return [
+        {"customer_name": f"Bulk {i}", "item_name": "Widget", "quantity": i % 50 + 1}
+        for i in range(count)
+    ]
+
+
+async def single_path(client: httpx.AsyncClient, headers: dict, orders: list[dict], concurrency: int) -> float:
+    queue = list(orders)
+
+    async def worker():
+        while queue:
+            r = await client.post("/orders", json=queue.pop(), headers=headers)
+            r.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start
+
+
+async def bulk_path(client: httpx.AsyncClient, headers: dict, orders: list[dict], batch: int) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(orders), batch):
+        r = await client.post("/orders/bulk", json=orders[i:i + batch], headers=headers)
+        r.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def run(url: str, count: int, batch: int, concurrency: int) -> dict:
+    async with httpx.AsyncClient(base_url=url, timeout=120) as client:
+        headers = await login(client)
+        orders = make_orders(count)
+
+        single_s = await single_path(client, headers, orders, concurrency)
+        bulk_s = await bulk_path(client, headers, orders, batch)
+
+    return {
+        "orders": count,
+        "single_concurrency": concurrency,
+        "bulk_batch": batch,
+        "single_orders_per_s": round(count / single_s, 1),
+        "bulk_orders_per_s": round(count / bulk_s, 1),
+        "speedup": round(single_s / bulk_s, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args.url, args.orders, args.batch, args.concurrency))))
+
+
+if __name__ == "__main__":
+    main()
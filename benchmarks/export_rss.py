@@ -0,0 +1,119 @@
+"""Stream GET /orders/export and sample the server's RSS while it runs.
+
+Seeds --rows orders for a fresh user straight into DATABASE_URL, starts
+uvicorn as a child process so its memory can be read from /proc (Linux
+only), then downloads the whole export:
+
+    python -m benchmarks.export_rss --rows 5000000 --format ndjson
+
+Prints one JSON object with rows, throughput and RSS start/peak/end.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+from sqlalchemy import text
+
+from app.db.session import engine
+
+PORT = 8765
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def seed(email: str, rows: int) -> None:
+    with engine.begin() as conn:
+        user_id = conn.execute(text("SELECT id FROM users WHERE email = :email"), {"email": email}).scalar_one()
+        conn.execute(
+            text(
+                "INSERT INTO orders (customer_name, item_name, quantity, status, user_id) "
+                "SELECT 'Customer ' || g, 'Item ' || (g % 1000), g % 100 + 1, 'PENDING', :user_id "
+                "FROM generate_series(1, :rows) AS g"
+            ),
+            {"user_id": user_id, "rows": rows},
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    args = parser.parse_args()
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(PORT), "--log-level", "warning", "--no-access-log"],
+        env=os.environ.copy(),
+    )
+    try:
+        base = f"http://127.0.0.1:{PORT}"
+        for _ in range(50):
+            try:
+                httpx.get(f"{base}/health")
+                break
+            except httpx.HTTPError:
+                time.sleep(0.2)
+
+        email = f"export-{int(time.time())}@bench.com"
+        creds = {"email": email, "password": "bench-password"}
+        httpx.post(f"{base}/auth/register", json=creds).raise_for_status()
+        token = httpx.post(f"{base}/auth/login", json=creds).json()["access_token"]
+        seed(email, args.rows)
+
+        samples = [rss_mb(server.pid)]
+        done = threading.Event()
+
+        def sample():
+            while not done.wait(0.25):
+                samples.append(rss_mb(server.pid))
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+
+        received_bytes = 0
+        lines = 0
+        start = time.perf_counter()
+        with httpx.stream(
+            "GET",
+            f"{base}/orders/export",
+            params={"format": args.format},
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=None,
+        ) as r:
+            r.raise_for_status()
+            for chunk in r.iter_bytes():
+                received_bytes += len(chunk)
+                lines += chunk.count(b"\n")
+        elapsed = time.perf_counter() - start
+        done.set()
+        sampler.join()
+        samples.append(rss_mb(server.pid))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(json.dumps({
+        "rows": args.rows,
+        "format": args.format,
+        "lines": lines,
+        "mb_streamed": round(received_bytes / 1e6, 1),
+        "seconds": round(elapsed, 1),
+        "rows_per_s": round(args.rows / elapsed),
+        "rss_start_mb": round(samples[0], 1),
+        "rss_peak_mb": round(max(samples), 1),
+        "rss_end_mb": round(samples[-1], 1),
+    }))
+
+
+if __name__ == "__main__":
+    main()
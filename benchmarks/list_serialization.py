@@ -0,0 +1,77 @@
+"""CPU per GET /orders page with FAST_JSON_RESPONSES off and on.
+
+Runs the app in process (TestClient) against DATABASE_URL, for a fresh
+user with --rows orders, and times full 100-row pages:
+
+    python -m benchmarks.list_serialization --pages 500
+
+Prints one JSON object with the median process CPU and wall time per
+page for each mode. CPU includes the client side, which is the same in
+both modes.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+# Before the app (and its limiter) is imported
+os.environ.setdefault("RATELIMIT_ENABLED", "false")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.db.session import engine  # noqa: E402
+from app.main import app  # noqa: E402
+from benchmarks.search_compare import seed  # noqa: E402
+
+
+def user_headers(user_id: int) -> dict:
+    with engine.connect() as conn:
+        email = conn.scalar(text("SELECT email FROM users WHERE id = :id"), {"id": user_id})
+    return {"Authorization": f"Bearer {create_access_token(subject=email, user_id=user_id, role='USER')}"}
+
+
+def time_pages(client: TestClient, headers: dict, params: dict, pages: int) -> dict:
+    cpu, wall = [], []
+    client.get("/orders", params=params, headers=headers).raise_for_status()  # warm up
+    for _ in range(pages):
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        r = client.get("/orders", params=params, headers=headers)
+        cpu.append(time.process_time() - cpu_start)
+        wall.append(time.perf_counter() - wall_start)
+        r.raise_for_status()
+    return {
+        "cpu_ms": round(statistics.median(cpu) * 1000, 3),
+        "wall_ms": round(statistics.median(wall) * 1000, 3),
+        "bytes": len(r.content),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    headers = user_headers(seed(args.rows))
+    shapes = {
+        "id": {"limit": args.limit},
+        "created_at": {"limit": args.limit, "sort_by": "created_at"},
+    }
+
+    results = {}
+    with TestClient(app) as client:
+        for shape, params in shapes.items():
+            for fast in (False, True):
+                settings.FAST_JSON_RESPONSES = fast
+                results[f"{shape}.{'fast' if fast else 'models'}"] = time_pages(client, headers, params, args.pages)
+
+    print(json.dumps({"rows": args.rows, "limit": args.limit, "pages": args.pages, "results": results}))
+
+
+if __name__ == "__main__":
+    main()
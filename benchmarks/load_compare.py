@@ -0,0 +1,102 @@
+"""Closed-loop HTTP load generator for comparing DB_ASYNC=false vs true.
+
+Start the API in each mode, then point this at it, e.g.:
+
+    DB_ASYNC=false uvicorn app.main:app --port 8000
+    python -m benchmarks.load_compare --url http://localhost:8000 --concurrency 500
+
+Prints one JSON object with throughput and latency percentiles.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def login(client: httpx.AsyncClient) -> dict:
+    email = f"bench-{uuid.uuid4().hex[:12]}@test.com"
+    creds = {"email": email, "password": "bench-password"}
+    r = await client.post("/auth/register", json=creds)
+    r.raise_for_status()
+    r = await client.post("/auth/login", json=creds)
+    r.raise_for_status()
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+async def seed_orders(client: httpx.AsyncClient, headers: dict, count: int) -> None:
+    for i in range(count):
+        r = await client.post(
+            "/orders",
+            json={"customer_name": f"Bench {i}", "item_name": "Widget", "quantity": i % 50 + 1},
+            headers=headers,
+        )
+        r.raise_for_status()
+
+
+async def run(url: str, path: str, concurrency: int, duration: float, seed: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        headers = await login(client)
+        await seed_orders(client, headers, seed)
+
+        latencies: list[float] = []
+        errors = 0
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    r = await client.get(path, headers=headers)
+                    ok = r.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "url": url,
+        "path": path,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/orders?limit=20")
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=50, help="orders to create for the benchmark user")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.url, args.path, args.concurrency, args.duration, args.seed))
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
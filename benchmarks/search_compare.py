@@ -0,0 +1,107 @@
+"""Compare list_orders search modes: substring (ilike) vs fulltext (tsvector).
+
+Seeds --rows orders for a fresh user straight into DATABASE_URL, then
+times the queries list_orders builds for each search term, as an admin
+(no RBAC filter) and as the owning user:
+
+    python -m benchmarks.search_compare --rows 1000000
+
+Prints one JSON object with the median milliseconds per query.
+"""
+import argparse
+import json
+import statistics
+import time
+import uuid
+from types import SimpleNamespace
+
+from sqlalchemy import select, text
+
+from app.api.routes.orders import filter_orders_query, normalize_sort, sort_orders_query
+from app.db.models import Order
+from app.db.session import engine
+
+FIRST_NAMES = ["Anna", "Bruno", "Carla", "Dmitri", "Elena", "Farid", "Greta", "Hugo", "Ines", "Jonas"]
+LAST_NAMES = ["Meyer", "Novak", "Okafor", "Petrov", "Quinn", "Rossi", "Silva", "Tanaka", "Ueda", "Vogel"]
+ADJECTIVES = ["Wireless", "Mechanical", "Compact", "Ergonomic", "Portable", "Classic", "Smart", "Heavy"]
+NOUNS = ["Keyboard", "Mouse", "Monitor", "Lamp", "Chair", "Desk", "Headset", "Kettle", "Cable", "Speaker"]
+
+# (label, term). Substring mode matches "anna lamp" as one phrase, so
+# it finds nothing there; fulltext needs both words somewhere in the row.
+SEARCHES = [
+    ("common", "keyboard"),
+    ("prefix", "ergo"),
+    ("two_words", "anna lamp"),
+    ("no_match", "zebra"),
+]
+
+
+def seed(rows: int) -> int:
+    with engine.begin() as conn:
+        user_id = conn.execute(
+            text("INSERT INTO users (email, hashed_password, role) VALUES (:email, '-', 'USER') RETURNING id"),
+            {"email": f"search-{uuid.uuid4().hex[:8]}@bench.com"},
+        ).scalar_one()
+        conn.execute(
+            text(
+                "INSERT INTO orders (customer_name, item_name, quantity, status, user_id) "
+                "SELECT (:first)[1 + g % 10] || ' ' || (:last)[1 + (g / 10) % 10], "
+                "       (:adjectives)[1 + (g / 100) % 8] || ' ' || (:nouns)[1 + (g / 7) % 10], "
+                "       g % 100 + 1, 'PENDING', :user_id "
+                "FROM generate_series(1, :rows) AS g"
+            ),
+            {
+                "first": FIRST_NAMES,
+                "last": LAST_NAMES,
+                "adjectives": ADJECTIVES,
+                "nouns": NOUNS,
+                "user_id": user_id,
+                "rows": rows,
+            },
+        )
+        conn.execute(text("ANALYZE orders"))
+    return user_id
+
+
+def list_query(current_user, search: str, search_mode: str, sort_by: str):
+    sort_by, sort_order = normalize_sort(sort_by, "desc", search, search_mode)
+    stmt = filter_orders_query(select(Order), current_user, search, search_mode=search_mode)
+    return sort_orders_query(stmt, sort_by, sort_order, search=search).limit(21)
+
+
+def median_ms(stmt, repeat: int) -> float:
+    timings = []
+    with engine.connect() as conn:
+        conn.execute(stmt).all()  # warm the cache
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(stmt).all()
+            timings.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(timings), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    user_id = seed(args.rows)
+    principals = {
+        "admin": SimpleNamespace(id=0, role="ADMIN"),
+        "user": SimpleNamespace(id=user_id, role="USER"),
+    }
+    modes = [("substring", "id"), ("fulltext", "id"), ("fulltext", "relevance")]
+
+    results = {}
+    for role, principal in principals.items():
+        for label, term in SEARCHES:
+            for mode, sort_by in modes:
+                key = f"{role}.{label}.{mode}" + (".relevance" if sort_by == "relevance" else "")
+                results[key] = median_ms(list_query(principal, term, mode, sort_by), args.repeat)
+
+    print(json.dumps({"rows": args.rows, "median_ms": results}))
+
+
+if __name__ == "__main__":
+    main()
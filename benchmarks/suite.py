@@ -0,0 +1,437 @@
+"""Reproducible load benchmarks for the orders API.
+
+Seed a dataset into DATABASE_URL, once per fresh database. The data is
+generated deterministically from --users/--orders/--days, so two seeds
+with the same arguments measure the same shape of data:
+
+    python -m benchmarks.suite seed --users 100 --orders 2000000
+
+Start the API with rate limiting off (slowapi reads RATELIMIT_ENABLED
+from the environment) and run every scenario at a fixed concurrency:
+
+    RATELIMIT_ENABLED=false uvicorn app.main:app --port 8000
+    python -m benchmarks.suite run --url http://localhost:8000 --output current.json
+
+Compare two runs; exits 1 when any scenario got slower than --threshold:
+
+    python -m benchmarks.suite compare baseline.json current.json
+
+Runs write: create_order adds orders and update_order_status moves
+seeded PENDING orders to PROCESSING. Re-seed a fresh database when runs
+have to be strictly comparable.
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+import httpx
+from sqlalchemy import text
+
+from app.core.security import hash_password
+from app.db.session import engine
+from app.tasks.event_partitions import ensure_partitions
+from benchmarks.load_compare import percentile
+from benchmarks.search_compare import ADJECTIVES, FIRST_NAMES, LAST_NAMES, NOUNS
+
+EMAIL_DOMAIN = "bench.example.com"
+ADMIN_EMAIL = f"bench-admin@{EMAIL_DOMAIN}"
+PASSWORD = "bench-password"
+
+# Status by order number (g % 10), and the events each one has behind it
+STATUS_MIX = ["PENDING"] * 6 + ["PROCESSING"] * 2 + ["SHIPPED", "DELIVERED"]
+TRANSITIONS = [("PENDING", "PROCESSING"), ("PROCESSING", "SHIPPED"), ("SHIPPED", "DELIVERED")]
+
+# GET /orders query shapes, one scenario each; "cursor" is added from the
+# first page's X-Next-Cursor at run time
+LIST_SHAPES = {
+    "id_desc": {},
+    "quantity_asc": {"sort_by": "quantity", "sort_order": "asc"},
+    "created_at_desc": {"sort_by": "created_at"},
+    "quantity_range": {"min_qty": 10, "max_qty": 20},
+    "offset": {"offset": 1000},
+    "substring": {"search": "keyboard"},
+    "fulltext": {"search": "keyb", "search_mode": "fulltext"},
+    "relevance": {"search": "wireless keyboard", "search_mode": "fulltext", "sort_by": "relevance"},
+    "cursor": {"sort_by": "created_at"},
+    "count_exact": {"count": "exact"},
+    "count_estimated": {"count": "estimated"},
+    "count_cached": {"count": "cached"},
+    "substring_count_exact": {"search": "keyboard", "count": "exact"},
+    "substring_count_estimated": {"search": "keyboard", "count": "estimated"},
+}
+
+# +1: higher is better, -1: lower is better
+METRICS = {"rps": 1, "p50_ms": -1, "p95_ms": -1, "p99_ms": -1}
+
+
+def user_email(i: int) -> str:
+    return f"bench-{i:05d}@{EMAIL_DOMAIN}"
+
+
+def bench_user_ids(conn) -> list[int]:
+    return list(conn.scalars(
+        text("SELECT id FROM users WHERE email LIKE :pattern AND role = 'USER' ORDER BY email"),
+        {"pattern": f"bench-%@{EMAIL_DOMAIN}"},
+    ))
+
+
+# -- seed ---------------------------------------------------------------------
+
+def seed(users: int, orders: int, days: int) -> dict:
+    started = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    hashed = hash_password(PASSWORD)
+
+    with engine.begin() as conn:
+        if bench_user_ids(conn):
+            sys.exit("Benchmark data is already seeded; recreate the database to seed again")
+
+        conn.execute(
+            text("INSERT INTO users (email, hashed_password, role) VALUES (:email, :hashed, :role)"),
+            [{"email": user_email(i), "hashed": hashed, "role": "USER"} for i in range(users)]
+            + [{"email": ADMIN_EMAIL, "hashed": hashed, "role": "ADMIN"}],
+        )
+        user_ids = bench_user_ids(conn)
+        admin_id = conn.scalar(text("SELECT id FROM users WHERE email = :email"), {"email": ADMIN_EMAIL})
+
+        # Spread over the last --days, so events land in several partitions
+        oldest = (now - timedelta(days=days)).date()
+        months = (now.year - oldest.year) * 12 + now.month - oldest.month
+        ensure_partitions(conn, oldest, months)
+
+        conn.execute(
+            text(
+                "INSERT INTO orders (customer_name, item_name, quantity, status, user_id, created_at) "
+                "SELECT (:first)[1 + g % 10] || ' ' || (:last)[1 + (g / 10) % 10], "
+                "       (:adjectives)[1 + (g / 100) % 8] || ' ' || (:nouns)[1 + (g / 7) % 10], "
+                "       g % 100 + 1, (:statuses)[1 + g % 10], (:user_ids)[1 + g % :users], "
+                "       :now - make_interval(days => g % :days, secs => g % 86400) "
+                "FROM generate_series(1, :orders) AS g"
+            ),
+            {
+                "first": FIRST_NAMES,
+                "last": LAST_NAMES,
+                "adjectives": ADJECTIVES,
+                "nouns": NOUNS,
+                "statuses": STATUS_MIX,
+                "user_ids": user_ids,
+                "users": len(user_ids),
+                "days": max(days, 1),
+                "now": now,
+                "orders": orders,
+            },
+        )
+
+        # One event per transition behind the order's status, an hour apart
+        conn.execute(
+            text(
+                "INSERT INTO order_events (order_id, changed_by_user_id, old_status, new_status, note, created_at) "
+                "SELECT o.id, :admin_id, t.old_status, t.new_status, "
+                "       'Order status changed from ' || t.old_status || ' to ' || t.new_status, "
+                "       o.created_at + make_interval(hours => t.step::int) "
+                "FROM orders o "
+                "JOIN unnest(:old, :new) WITH ORDINALITY AS t(old_status, new_status, step) "
+                "  ON t.step <= array_position(:chain, o.status) - 1 "
+                "WHERE o.user_id = ANY(:user_ids)"
+            ),
+            {
+                "admin_id": admin_id,
+                "old": [old for old, _ in TRANSITIONS],
+                "new": [new for _, new in TRANSITIONS],
+                "chain": ["PENDING", "PROCESSING", "SHIPPED", "DELIVERED"],
+                "user_ids": user_ids,
+            },
+        )
+
+        # Rollup rows for the seeded orders, as the write paths would have left them
+        conn.execute(
+            text(
+                "INSERT INTO order_stats (user_id, day, status, item_name, order_count, quantity_sum) "
+                "SELECT user_id, (created_at AT TIME ZONE 'UTC')::date, status, item_name, count(*), sum(quantity) "
+                "FROM orders WHERE user_id = ANY(:user_ids) GROUP BY 1, 2, 3, 4 "
+                "ON CONFLICT (user_id, day, status, item_name) DO UPDATE SET "
+                "order_count = order_stats.order_count + excluded.order_count, "
+                "quantity_sum = order_stats.quantity_sum + excluded.quantity_sum"
+            ),
+            {"user_ids": user_ids},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO order_counts (user_id, order_count, archived_count) "
+                "SELECT user_id, count(*), 0 FROM orders WHERE user_id = ANY(:user_ids) GROUP BY 1 "
+                "ON CONFLICT (user_id) DO UPDATE SET "
+                "order_count = order_counts.order_count + excluded.order_count"
+            ),
+            {"user_ids": user_ids},
+        )
+
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("ANALYZE"))
+        summary = dataset_summary(conn)
+    summary["seconds"] = round(time.perf_counter() - started, 1)
+    return summary
+
+
+def dataset_summary(conn) -> dict:
+    user_ids = bench_user_ids(conn)
+    return {
+        "users": len(user_ids),
+        "orders": conn.scalar(text("SELECT count(*) FROM orders WHERE user_id = ANY(:ids)"), {"ids": user_ids}),
+        "events": conn.scalar(text("SELECT count(*) FROM order_events")),
+    }
+
+
+# -- run ----------------------------------------------------------------------
+
+# A request: (method, path, params or json body, headers); None stops the worker
+Request = Optional[tuple[str, str, dict, dict]]
+
+
+async def login(client: httpx.AsyncClient, email: str) -> dict:
+    r = await client.post("/auth/login", json={"email": email, "password": PASSWORD})
+    r.raise_for_status()
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+async def build_scenarios(client: httpx.AsyncClient, active_users: int, pool_size: int) -> dict[str, Callable]:
+    with engine.connect() as conn:
+        user_ids = bench_user_ids(conn)[:active_users]
+        if not user_ids:
+            sys.exit("No benchmark data; run the seed command first")
+        emails = dict(conn.execute(
+            text("SELECT id, email FROM users WHERE id = ANY(:ids)"), {"ids": user_ids}
+        ).all())
+        owned = {
+            user_id: list(conn.scalars(
+                text("SELECT id FROM orders WHERE user_id = :user_id AND deleted_at IS NULL ORDER BY id LIMIT 1000"),
+                {"user_id": user_id},
+            ))
+            for user_id in user_ids
+        }
+        pending = list(conn.scalars(
+            text(
+                "SELECT id FROM orders WHERE user_id = ANY(:ids) AND status = 'PENDING' "
+                "AND deleted_at IS NULL ORDER BY id DESC LIMIT :limit"
+            ),
+            {"ids": user_ids, "limit": pool_size},
+        ))
+
+    tokens = {user_id: await login(client, emails[user_id]) for user_id in user_ids}
+    admin = await login(client, ADMIN_EMAIL)
+
+    r = await client.get("/orders", params=LIST_SHAPES["cursor"], headers=tokens[user_ids[0]])
+    r.raise_for_status()
+    cursor_shape = {**LIST_SHAPES["cursor"], "cursor": r.headers["X-Next-Cursor"]}
+
+    def as_user(rng: random.Random) -> tuple[int, dict]:
+        user_id = rng.choice(user_ids)
+        return user_id, tokens[user_id]
+
+    def list_orders(params: dict, use_admin: bool = False) -> Callable:
+        def request(rng):
+            if use_admin:
+                return "GET", "/orders", params, admin
+            # The cursor was issued for the first user's listing
+            return "GET", "/orders", params, tokens[user_ids[0]] if "cursor" in params else as_user(rng)[1]
+        return request
+
+    def create_order(rng):
+        body = {"customer_name": "Bench Load", "item_name": rng.choice(NOUNS), "quantity": rng.randint(1, 100)}
+        return "POST", "/orders", body, as_user(rng)[1]
+
+    def get_order(rng):
+        user_id, headers = as_user(rng)
+        return "GET", f"/orders/{rng.choice(owned[user_id])}", {}, headers
+
+    def update_order_status(rng):
+        if not pending:
+            return None
+        return "PATCH", f"/orders/{pending.pop()}", {"status": "PROCESSING"}, admin
+
+    def login_request(rng):
+        return "POST", "/auth/login", {"email": emails[rng.choice(user_ids)], "password": PASSWORD}, {}
+
+    scenarios = {
+        "login": login_request,
+        "create_order": create_order,
+        "get_order": get_order,
+        "update_order_status": update_order_status,
+        "list_orders.admin": list_orders({}, use_admin=True),
+    }
+    for shape, params in LIST_SHAPES.items():
+        scenarios[f"list_orders.{shape}"] = list_orders(cursor_shape if shape == "cursor" else params)
+    return scenarios
+
+
+async def measure(
+    client: httpx.AsyncClient,
+    build_request: Callable[[random.Random], Request],
+    concurrency: int,
+    duration: float,
+    seed: int,
+) -> dict:
+    latencies: list[float] = []
+    errors: Counter = Counter()
+    deadline = time.perf_counter() + duration
+
+    async def worker(rng: random.Random):
+        while time.perf_counter() < deadline:
+            request = build_request(rng)
+            if request is None:
+                return
+            method, path, payload, headers = request
+            body = {"params": payload} if method == "GET" else {"json": payload}
+            start = time.perf_counter()
+            try:
+                r = await client.request(method, path, headers=headers, **body)
+                status = r.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            if status in (200, 201):
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors[str(status)] += 1
+
+    started = time.perf_counter()
+    # One seeded generator per worker: the same request sequence every run
+    await asyncio.gather(*(worker(random.Random(seed * 1000 + i)) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors.values()),
+        "errors_by_status": dict(errors),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        scenarios = await build_scenarios(client, args.active_users, args.pool_size)
+        selected = [
+            name for name in scenarios
+            if not args.scenarios or any(name.startswith(prefix) for prefix in args.scenarios.split(","))
+        ]
+
+        results = {}
+        for name in selected:
+            if args.warmup:
+                await measure(client, scenarios[name], args.concurrency, args.warmup, args.seed)
+            results[name] = await measure(client, scenarios[name], args.concurrency, args.duration, args.seed)
+            print(f"{name}: {json.dumps(results[name])}", file=sys.stderr)
+
+    with engine.connect() as conn:
+        dataset = dataset_summary(conn)
+    return {
+        "meta": {
+            "url": args.url,
+            "git_commit": git_commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "seed": args.seed,
+            "dataset": dataset,
+        },
+        "results": results,
+    }
+
+
+# -- compare ------------------------------------------------------------------
+
+def compare(baseline: dict, current: dict, threshold: float) -> dict:
+    """Relative change of every metric; a regression is a change for the worse beyond threshold."""
+    changes, regressions = {}, []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        changes[name] = {}
+        for metric, better in METRICS.items():
+            if not base[metric]:
+                continue
+            change = (result[metric] - base[metric]) / base[metric]
+            changes[name][metric] = round(change * 100, 1)
+            if change * better < -threshold:
+                regressions.append({
+                    "scenario": name,
+                    "metric": metric,
+                    "baseline": base[metric],
+                    "current": result[metric],
+                    "change_pct": round(change * 100, 1),
+                })
+        if result["errors"] and not base["errors"]:
+            regressions.append({"scenario": name, "metric": "errors", "baseline": 0, "current": result["errors"]})
+
+    return {"threshold_pct": threshold * 100, "regressions": regressions, "change_pct": changes}
+
+
+# -- cli ----------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_cmd = commands.add_parser("seed", help="seed users, orders, events and stats into DATABASE_URL")
+    seed_cmd.add_argument("--users", type=int, default=100)
+    seed_cmd.add_argument("--orders", type=int, default=1_000_000)
+    seed_cmd.add_argument("--days", type=int, default=180, help="spread order creation over this many days")
+
+    run_cmd = commands.add_parser("run", help="run the scenarios against a running API")
+    run_cmd.add_argument("--url", default="http://localhost:8000")
+    run_cmd.add_argument("--concurrency", type=int, default=32)
+    run_cmd.add_argument("--duration", type=float, default=20, help="measured seconds per scenario")
+    run_cmd.add_argument("--warmup", type=float, default=3, help="unmeasured seconds before each scenario")
+    run_cmd.add_argument("--scenarios", default="", help="comma-separated name prefixes, e.g. list_orders,get_order")
+    run_cmd.add_argument("--active-users", type=int, default=8, help="seeded users the requests are spread over")
+    run_cmd.add_argument("--pool-size", type=int, default=200_000, help="PENDING orders update_order_status may move")
+    run_cmd.add_argument("--seed", type=int, default=1, help="random seed for request choices")
+    run_cmd.add_argument("--output", help="also write the JSON result to this file")
+
+    compare_cmd = commands.add_parser("compare", help="flag regressions against a baseline run")
+    compare_cmd.add_argument("baseline")
+    compare_cmd.add_argument("current")
+    compare_cmd.add_argument("--threshold", type=float, default=0.10, help="allowed relative change, 0.10 = 10%%")
+
+    args = parser.parse_args()
+
+    if args.command == "seed":
+        print(json.dumps(seed(args.users, args.orders, args.days)))
+    elif args.command == "run":
+        result = asyncio.run(run(args))
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(result, f, indent=2)
+        print(json.dumps(result))
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        report = compare(baseline, current, args.threshold)
+        print(json.dumps(report, indent=2))
+        sys.exit(1 if report["regressions"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Throughput of the gunicorn production server by worker count.
+
+Starts `gunicorn -c gunicorn.conf.py` against DATABASE_URL once per
+--workers value, with rate limiting off, and drives it with the
+load_compare client at a fixed concurrency:
+
+    python -m benchmarks.worker_scaling --workers 1 2 4 --path "/orders?limit=20"
+
+Prints one JSON object with RPS and latency percentiles per worker count.
+Worker counts above the available cores only add contention; the
+"cores" field records how many there were.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.load_compare import run
+
+PORT = 8766
+
+
+def start_server(workers: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "WEB_CONCURRENCY": str(workers),
+        "PORT": str(PORT),
+        "RATELIMIT_ENABLED": "false",
+        "ACCESS_LOG_SAMPLE_RATE": "0",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--log-level", "warning", "app.main:app"],
+        env=env,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{PORT}/health").raise_for_status()
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--path", default="/orders?limit=20")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--seed", type=int, default=50, help="orders to create for the benchmark user")
+    args = parser.parse_args()
+
+    results = {}
+    for workers in args.workers:
+        server = start_server(workers)
+        try:
+            result = asyncio.run(run(f"http://127.0.0.1:{PORT}", args.path, args.concurrency, args.duration, args.seed))
+        finally:
+            server.terminate()
+            server.wait()
+        results[str(workers)] = {key: result[key] for key in ("requests", "errors", "rps", "p50_ms", "p99_ms")}
+
+    print(json.dumps({
+        "cores": len(os.sched_getaffinity(0)),
+        "path": args.path,
+        "concurrency": args.concurrency,
+        "results": results,
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Production server: gunicorn -c gunicorn.conf.py app.main:app
+
+Runs WEB_CONCURRENCY uvicorn worker processes with the app preloaded in
+the master, and replaces workers after WORKER_MAX_REQUESTS requests or
+once they grow past WORKER_MAX_MEMORY_MB. Migrations are not run here:
+run `alembic upgrade head` once per deploy before starting the server.
+"""
+import os
+import shutil
+import signal
+import tempfile
+import threading
+import time
+
+# Set before the app (and prometheus_client) is imported, so each worker
+# writes its metrics where /metrics can add them up. Values left by a
+# previous run would be added in too.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "order-api-metrics"))
+shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+
+from app.core.config import settings  # noqa: E402
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = settings.WEB_CONCURRENCY or len(os.sched_getaffinity(0))
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# Import the app once, in the master: an import error stops the server
+# before any worker starts, and workers fork with the code already loaded.
+# Engines and the logging thread reset themselves in the child after fork.
+preload_app = True
+
+max_requests = settings.WORKER_MAX_REQUESTS
+max_requests_jitter = settings.WORKER_MAX_REQUESTS_JITTER
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def post_worker_init(worker):
+    if settings.WORKER_MAX_MEMORY_MB <= 0:
+        return
+
+    def watch_memory():
+        while True:
+            time.sleep(settings.WORKER_MEMORY_CHECK_SECONDS)
+            rss = _rss_mb()
+            if rss > settings.WORKER_MAX_MEMORY_MB:
+                worker.log.warning(
+                    "Worker %s at %.0f MB RSS (limit %s MB), restarting",
+                    worker.pid, rss, settings.WORKER_MAX_MEMORY_MB,
+                )
+                # Graceful: in-flight requests finish, then the master
+                # starts a replacement
+                os.kill(worker.pid, signal.SIGTERM)
+                return
+
+    threading.Thread(target=watch_memory, name="memory-watch", daemon=True).start()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,7 +1,15 @@
 import os
+import uuid
+
 import pytest
 from alembic import command
 from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+# Per-process counters that reset_limits can always clear; the tests that
+# need Redis behaviour give the orders budget a fakeredis storage
+os.environ.setdefault("RATE_LIMIT_STORAGE_URL", "memory://")
 
 @pytest.fixture(scope="session", autouse=True)
 def apply_migrations():
@@ -11,4 +19,74 @@ def apply_migrations():
     # Run migrations
     command.upgrade(alembic_cfg, "head")
 
-    yield
\ No newline at end of file
+    yield
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    from app.core.limiter import reset_limits
+
+    # The login/register limits are per client address, and every test
+    # shares the TestClient address
+    reset_limits()
+    yield
+
+
+@pytest.fixture(scope="session")
+def client():
+    from app.main import app
+
+    return TestClient(app)
+
+
+def _register_and_login(client, role: str = "USER") -> dict:
+    from app.db.session import SessionLocal
+
+    email = f"{uuid.uuid4().hex[:12]}@test.com"
+    password = "123456"
+
+    r = client.post("/auth/register", json={"email": email, "password": password})
+    assert r.status_code == 201
+
+    if role != "USER":
+        db = SessionLocal()
+        try:
+            db.execute(text("UPDATE users SET role=:role WHERE email=:email"), {"role": role, "email": email})
+            db.commit()
+        finally:
+            db.close()
+
+    r = client.post("/auth/login", json={"email": email, "password": password})
+    assert r.status_code == 200
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+@pytest.fixture
+def user_headers(client):
+    return _register_and_login(client)
+
+
+@pytest.fixture
+def admin_headers(client):
+    return _register_and_login(client, role="ADMIN")
+
+
+@pytest.fixture
+def other_user_headers(client):
+    return _register_and_login(client)
+
+
+@pytest.fixture
+def create_order(client):
+    """Factory placing an order through the API as headers' user; returns its id."""
+
+    def create(headers, quantity: int = 1, customer_name: str = "Customer", item_name: str = "Widget") -> int:
+        r = client.post(
+            "/orders",
+            json={"customer_name": customer_name, "item_name": item_name, "quantity": quantity},
+            headers=headers,
+        )
+        assert r.status_code == 201
+        return r.json()["id"]
+
+    return create
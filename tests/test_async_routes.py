@@ -0,0 +1,142 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from slowapi.errors import RateLimitExceeded
+from sqlalchemy import text
+
+from app.api.routes import auth_async, orders_async
+from app.core.limiter import limiter, rate_limit_exceeded_handler
+from app.core.offload import run_blocking
+from app.db.session import AsyncSessionLocal, SessionLocal, get_async_engine
+
+
+@pytest.fixture(scope="module")
+def async_client():
+    app = FastAPI()
+    app.state.limiter = limiter
+    app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
+    app.include_router(auth_async.router)
+    app.include_router(orders_async.router)
+
+    # One portal for the whole module, so pooled asyncpg connections stay
+    # on the event loop that opened them
+    with TestClient(app) as client:
+        yield client
+        client.portal.call(get_async_engine().dispose)
+
+
+def _login(client, role="USER"):
+    email = f"{uuid.uuid4().hex[:12]}@test.com"
+    assert client.post("/auth/register", json={"email": email, "password": "123456"}).status_code == 201
+
+    if role != "USER":
+        db = SessionLocal()
+        try:
+            db.execute(text("UPDATE users SET role=:role WHERE email=:email"), {"role": role, "email": email})
+            db.commit()
+        finally:
+            db.close()
+
+    r = client.post("/auth/login", json={"email": email, "password": "123456"})
+    assert r.status_code == 200
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def test_async_order_lifecycle(async_client):
+    user = _login(async_client)
+    admin = _login(async_client, role="ADMIN")
+
+    r = async_client.post("/orders", json={"customer_name": "Ann", "item_name": "Mouse", "quantity": 3}, headers=user)
+    assert r.status_code == 201
+    order_id = r.json()["id"]
+
+    r = async_client.get(f"/orders/{order_id}", headers=user)
+    assert r.status_code == 200
+    assert r.json()["status"] == "PENDING"
+
+    r = async_client.patch(f"/orders/{order_id}", json={"status": "PROCESSING"}, headers=user)
+    assert r.status_code == 403
+
+    r = async_client.patch(f"/orders/{order_id}", json={"status": "PROCESSING"}, headers=admin)
+    assert r.status_code == 200
+    assert r.json()["status"] == "PROCESSING"
+
+    r = async_client.patch(f"/orders/{order_id}", json={"status": "DELIVERED"}, headers=admin)
+    assert r.status_code == 400
+
+    r = async_client.get(f"/orders/{order_id}/events", headers=user)
+    assert r.status_code == 200
+    assert [(e["old_status"], e["new_status"]) for e in r.json()] == [("PENDING", "PROCESSING")]
+
+
+def test_async_list_orders_paginates_with_cursor(async_client):
+    user = _login(async_client)
+    for qty in (1, 2, 3):
+        async_client.post("/orders", json={"customer_name": "Bo", "item_name": "Pen", "quantity": qty}, headers=user)
+
+    r = async_client.get("/orders", params={"limit": 2, "sort_by": "quantity"}, headers=user)
+    assert r.status_code == 200
+    assert [o["quantity"] for o in r.json()] == [3, 2]
+
+    r = async_client.get(
+        "/orders",
+        params={"limit": 2, "sort_by": "quantity", "cursor": r.headers["X-Next-Cursor"]},
+        headers=user,
+    )
+    assert [o["quantity"] for o in r.json()] == [1]
+
+
+def test_async_login_rejects_bad_password(async_client):
+    r = async_client.post("/auth/login", json={"email": "nobody@test.com", "password": "wrong-password"})
+    assert r.status_code == 401
+
+
+def test_async_bulk_create(async_client):
+    user = _login(async_client)
+    items = [{"customer_name": "Cy", "item_name": "Cup", "quantity": q} for q in (1, 0, 2)]
+
+    r = async_client.post("/orders/bulk", json=items, headers=user)
+    assert r.status_code == 200
+    assert [c["index"] for c in r.json()["created"]] == [0, 2]
+    assert [e["index"] for e in r.json()["errors"]] == [1]
+
+
+def test_async_export_streams_ndjson(async_client):
+    user = _login(async_client)
+    for qty in (1, 2):
+        async_client.post("/orders", json={"customer_name": "Ex", "item_name": "Fan", "quantity": qty}, headers=user)
+
+    r = async_client.get("/orders/export", headers=user)
+    assert r.status_code == 200
+    assert [json.loads(line)["quantity"] for line in r.text.splitlines()] == [1, 2]
+
+
+def test_sync_deployments_build_no_async_engine():
+    # A driver with no asyncio support would fail if the async engine
+    # were built at import
+    script = (
+        "import app.main, app.db.session as session\n"
+        "assert session._async_engine is None and not session.async_replica_engines\n"
+    )
+    env = {**os.environ, "DB_ASYNC": "false", "ASYNC_DATABASE_URL": "postgresql+psycopg2://nobody@localhost/none"}
+    result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+
+
+def test_blocking_calls_in_run_sync_leave_the_event_loop(async_client):
+    async def check():
+        async with AsyncSessionLocal(bind=get_async_engine()) as db:
+            return threading.get_ident(), await db.run_sync(lambda s: run_blocking(threading.get_ident))
+
+    loop_thread, call_thread = async_client.portal.call(check)
+
+    assert call_thread != loop_thread
+    # Outside an async route it is a plain call
+    assert run_blocking(threading.get_ident) == threading.get_ident()
@@ -0,0 +1,128 @@
+import asyncio
+import json
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from app.api.routes import orders
+from app.core.config import settings
+from app.core.security import decode_access_token
+from app.core.user_cache import CurrentUser
+from app.db.session import SessionLocal, engine
+
+
+def test_bulk_create_inserts_valid_items_and_reports_errors(client, user_headers):
+    items = [
+        {"customer_name": "A", "item_name": "Pen", "quantity": 1},
+        {"customer_name": "", "item_name": "Pen", "quantity": 1},
+        {"customer_name": "C", "item_name": "Ink", "quantity": 3},
+        {"customer_name": "D", "item_name": "Pad", "quantity": 0},
+    ]
+
+    r = client.post("/orders/bulk", json=items, headers=user_headers)
+    assert r.status_code == 200
+    body = r.json()
+
+    assert [c["index"] for c in body["created"]] == [0, 2]
+    assert [e["index"] for e in body["errors"]] == [1, 3]
+    assert body["errors"][1]["errors"][0]["loc"] == ["quantity"]
+
+    for created, item in zip(body["created"], (items[0], items[2])):
+        r = client.get(f"/orders/{created['id']}", headers=user_headers)
+        assert r.status_code == 200
+        assert r.json()["item_name"] == item["item_name"]
+        assert r.json()["status"] == "PENDING"
+
+
+def test_bulk_create_streams_ndjson_across_chunks(client, user_headers, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_CHUNK_SIZE", 2)
+
+    lines = [json.dumps({"customer_name": f"C{i}", "item_name": "Cup", "quantity": i + 1}) for i in range(5)]
+    lines.insert(3, "{not json")
+    body = "\n".join(lines) + "\n"
+
+    r = client.post(
+        "/orders/bulk",
+        content=body.encode(),
+        headers={**user_headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert r.status_code == 200
+    result = r.json()
+
+    assert [c["index"] for c in result["created"]] == [0, 1, 2, 4, 5]
+    assert result["errors"] == [{"index": 3, "errors": [{"loc": [], "msg": "Invalid JSON", "type": "json_invalid"}]}]
+
+    ids = [c["id"] for c in result["created"]]
+    assert ids == sorted(ids)
+
+    r = client.get("/orders", params={"sort_order": "asc", "limit": 100}, headers=user_headers)
+    assert [o["quantity"] for o in r.json()] == [1, 2, 3, 4, 5]
+
+
+def test_bulk_create_enforces_item_limit(client, user_headers, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_MAX_ITEMS", 2)
+    items = [{"customer_name": "A", "item_name": "Pen", "quantity": 1}] * 3
+
+    r = client.post("/orders/bulk", json=items, headers=user_headers)
+    assert r.status_code == 413
+
+    r = client.post(
+        "/orders/bulk",
+        content="\n".join(json.dumps(i) for i in items).encode(),
+        headers={**user_headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert r.status_code == 413
+
+    # Nothing from the rejected NDJSON stream was committed
+    assert client.get("/orders", headers=user_headers).json() == []
+
+
+def test_bulk_create_rejects_non_array_body(client, user_headers):
+    r = client.post("/orders/bulk", json={"customer_name": "A"}, headers=user_headers)
+    assert r.status_code == 422
+
+
+def test_bulk_create_leaves_rollup_rows_unlocked_while_uploading(client, user_headers, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_CHUNK_SIZE", 2)
+    item = {"customer_name": "Lk", "item_name": "Bowl", "quantity": 1}
+    # The user's order_stats and order_counts rows exist before the upload
+    assert client.post("/orders", json=item, headers=user_headers).status_code == 201
+    email = decode_access_token(user_headers["Authorization"].split()[1])
+    with engine.connect() as conn:
+        user_id = conn.scalar(text("SELECT id FROM users WHERE email = :email"), {"email": email})
+    locks = []
+
+    def try_locks():
+        with engine.connect() as conn:
+            for table in ("order_stats", "order_counts"):
+                try:
+                    conn.execute(text(f"SELECT 1 FROM {table} WHERE user_id = :u FOR UPDATE NOWAIT"), {"u": user_id})
+                    locks.append(table)
+                except OperationalError:
+                    locks.append(f"{table} locked")
+                conn.rollback()
+
+    # The TestClient sends a body in one piece; this one arrives in two,
+    # and the first chunk of orders is inserted before the second is read
+    chunks = [(json.dumps(item) + "\n").encode() * 2] * 2
+
+    async def receive():
+        if len(chunks) == 1:
+            await run_in_threadpool(try_locks)
+        return {"type": "http.request", "body": chunks.pop(0), "more_body": bool(chunks)}
+
+    request = Request({"type": "http", "method": "POST", "headers": [(b"content-type", b"application/x-ndjson")]}, receive)
+    principal = CurrentUser(id=user_id, email=email, role="USER")
+    db = SessionLocal()
+    try:
+        result = asyncio.run(orders.create_orders_bulk.__wrapped__(request=request, db=db, current_user=principal))
+    finally:
+        db.close()
+
+    assert len(result.created) == 4
+    # The same user's single creates would not have waited on the upload
+    assert locks == ["order_stats", "order_counts"]
+    totals = client.get("/orders/stats", headers=user_headers).json()
+    assert sum(row["order_count"] for row in totals) == 5
@@ -0,0 +1,43 @@
+import csv
+import io
+import json
+
+from app.core.config import settings
+
+
+def test_export_ndjson_streams_all_rows_in_batches(client, user_headers, admin_headers, monkeypatch, create_order):
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+    ids = [create_order(user_headers, q) for q in [1, 2, 3, 4, 5]]
+    # Another user's order must not leak into a USER export
+    create_order(admin_headers, 9)
+
+    r = client.get("/orders/export", headers=user_headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert [row["id"] for row in rows] == ids
+    assert set(rows[0]) == {"id", "customer_name", "item_name", "quantity", "status", "created_at"}
+    assert rows[0]["status"] == "PENDING"
+
+
+def test_export_csv_applies_list_filters(client, user_headers, create_order):
+    ids = [create_order(user_headers, q) for q in [1, 5, 10, 20]]
+
+    r = client.get(
+        "/orders/export",
+        params={"format": "csv", "min_qty": 5, "max_qty": 10, "sort_order": "desc"},
+        headers=user_headers,
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/csv")
+    assert 'filename="orders.csv"' in r.headers["content-disposition"]
+
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert [int(row["id"]) for row in rows] == [ids[2], ids[1]]
+    assert [row["quantity"] for row in rows] == ["10", "5"]
+
+
+def test_export_rejects_unknown_format(client, user_headers):
+    r = client.get("/orders/export", params={"format": "xml"}, headers=user_headers)
+    assert r.status_code == 422
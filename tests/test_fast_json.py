@@ -0,0 +1,86 @@
+import json
+
+import pytest
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.schemas.orders import ORDER_OUT_FIELDS, OrderOut, dump_orders_json
+
+
+@pytest.fixture
+def fast_json(monkeypatch):
+    def toggle(enabled: bool):
+        monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", enabled)
+    return toggle
+
+
+def _seed(client, headers):
+    for i, (name, item) in enumerate([("Zoë", "Café lamp"), ("Ann", "Desk"), ("Bo \"Q\"", "Lamp\\2")] * 3):
+        client.post("/orders", json={"customer_name": name, "item_name": item, "quantity": i + 1}, headers=headers)
+
+
+def test_dump_orders_json_matches_order_out():
+    models = [
+        OrderOut(id=1, customer_name="Zoë", item_name="Café", quantity=2, status="PENDING"),
+        OrderOut(id=2, customer_name="A \"b\"", item_name="c\\d", quantity=3, status="SHIPPED"),
+        OrderOut(id=3, customer_name="x", item_name="y", quantity=1, status="DELIVERED"),
+    ]
+    # Rows as list_orders selects them: ORDER_OUT_FIELDS, then the sort key
+    rows = [(*(model.model_dump(mode="json")[name] for name in ORDER_OUT_FIELDS), "sort-key") for model in models]
+
+    assert ORDER_OUT_FIELDS == tuple(OrderOut.model_fields)
+    assert dump_orders_json(rows) == TypeAdapter(list[OrderOut]).dump_json(models)
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"sort_by": "quantity", "sort_order": "asc", "limit": 4},
+    {"sort_by": "created_at", "limit": 2},
+    {"search": "lamp", "search_mode": "fulltext", "sort_by": "relevance", "limit": 2},
+    {"include_archived": True, "limit": 3},
+])
+def test_list_orders_is_identical_on_the_fast_path(client, user_headers, fast_json, params):
+    _seed(client, user_headers)
+
+    pages = {}
+    for enabled in (False, True):
+        fast_json(enabled)
+        r = client.get("/orders", params=params, headers=user_headers)
+        assert r.status_code == 200
+        pages[enabled] = r
+        if "X-Next-Cursor" in r.headers:
+            pages[enabled, "next"] = client.get(
+                "/orders", params={**params, "cursor": r.headers["X-Next-Cursor"]}, headers=user_headers
+            ).content
+
+    assert pages[True].content == pages[False].content
+    assert pages[True].headers["content-type"] == "application/json"
+    assert pages[True].headers.get("X-Next-Cursor") == pages[False].headers.get("X-Next-Cursor")
+    assert pages.get((True, "next")) == pages.get((False, "next"))
+
+
+def test_export_ndjson_is_equivalent_on_the_fast_path(client, user_headers, fast_json):
+    _seed(client, user_headers)
+
+    exports = {}
+    for enabled in (False, True):
+        fast_json(enabled)
+        r = client.get("/orders/export", headers=user_headers)
+        assert r.status_code == 200
+        exports[enabled] = [json.loads(line) for line in r.text.splitlines()]
+
+    assert exports[True] == exports[False]
+    assert "Zoë" in {row["customer_name"] for row in exports[True]}
+
+
+def test_openapi_schema_does_not_depend_on_the_fast_path(client, fast_json):
+    from app.main import app
+
+    fast_json(False)
+    app.openapi_schema = None
+    before = app.openapi()
+    fast_json(True)
+    app.openapi_schema = None
+    after = app.openapi()
+
+    assert after == before
@@ -0,0 +1,63 @@
+import time
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.hashing import HashingPool
+from app.core.security import hash_password, pwd_context
+from app.db.models import User
+from app.db.session import SessionLocal
+
+
+def test_pool_returns_worker_results():
+    pool = HashingPool(workers=1, queue_limit=4)
+    try:
+        hashed = pool.submit("hash", hash_password, "secret1").result()
+        assert pwd_context.verify("secret1", hashed)
+    finally:
+        pool.shutdown()
+
+
+def test_pool_rejects_when_queue_is_full():
+    pool = HashingPool(workers=1, queue_limit=0)
+    try:
+        running = pool.submit("hash", time.sleep, 0.5)
+
+        with pytest.raises(HTTPException) as exc:
+            pool.submit("hash", time.sleep, 0)
+        assert exc.value.status_code == 503
+
+        running.result()
+        # The slot is released once the running job finishes
+        pool.submit("hash", time.sleep, 0).result()
+    finally:
+        pool.shutdown()
+
+
+def test_login_rehashes_outdated_cost_factor(client):
+    email = f"{uuid.uuid4().hex[:12]}@test.com"
+    weak_hash = pwd_context.hash("123456", rounds=4)
+
+    db = SessionLocal()
+    try:
+        db.add(User(email=email, hashed_password=weak_hash, role="USER"))
+        db.commit()
+    finally:
+        db.close()
+
+    r = client.post("/auth/login", json={"email": email, "password": "123456"})
+    assert r.status_code == 200
+
+    db = SessionLocal()
+    try:
+        stored = db.scalar(select(User.hashed_password).where(User.email == email))
+    finally:
+        db.close()
+
+    assert stored != weak_hash
+    assert pwd_context.identify(stored) == "bcrypt"
+    assert stored.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+    assert pwd_context.verify("123456", stored)
@@ -0,0 +1,220 @@
+import threading
+import time
+import uuid
+
+import fakeredis
+import pytest
+import redis
+
+from app.core import idempotency
+from app.core.config import settings
+from app.core.idempotency import (
+    DatabaseIdempotencyStore,
+    MemoryIdempotencyStore,
+    RedisIdempotencyStore,
+    StoredResponse,
+)
+
+ORDER = {"customer_name": "Ida", "item_name": "Desk", "quantity": 2}
+
+
+@pytest.fixture(autouse=True)
+def store(monkeypatch):
+    store = MemoryIdempotencyStore()
+    monkeypatch.setattr(idempotency, "idempotency_store", store)
+    return store
+
+
+def _key() -> dict:
+    return {"Idempotency-Key": uuid.uuid4().hex}
+
+
+def _order_count(client, headers) -> int:
+    return len(client.get("/orders", params={"limit": 100}, headers=headers).json())
+
+
+def test_repeated_create_is_replayed(client, user_headers):
+    headers = {**user_headers, **_key()}
+
+    first = client.post("/orders", json=ORDER, headers=headers)
+    second = client.post("/orders", json=ORDER, headers=headers)
+
+    assert first.status_code == second.status_code == 201
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert second.headers["X-Request-ID"] != first.headers["X-Request-ID"]
+    assert _order_count(client, user_headers) == 1
+
+
+def test_key_reused_with_a_different_body_is_rejected(client, user_headers):
+    headers = {**user_headers, **_key()}
+    assert client.post("/orders", json=ORDER, headers=headers).status_code == 201
+
+    r = client.post("/orders", json={**ORDER, "quantity": 3}, headers=headers)
+
+    assert r.status_code == 422
+    assert _order_count(client, user_headers) == 1
+
+
+def test_failed_requests_are_not_stored(client, user_headers):
+    headers = {**user_headers, **_key()}
+    assert client.post("/orders", json={**ORDER, "quantity": 0}, headers=headers).status_code == 422
+
+    # The failed attempt released the key, so the corrected retry runs
+    r = client.post("/orders", json=ORDER, headers=headers)
+
+    assert r.status_code == 201
+    assert "Idempotent-Replayed" not in r.headers
+
+
+def test_keys_are_scoped_to_the_caller(client, user_headers, other_user_headers):
+    key = _key()
+
+    mine = client.post("/orders", json=ORDER, headers={**user_headers, **key})
+    theirs = client.post("/orders", json=ORDER, headers={**other_user_headers, **key})
+
+    assert mine.status_code == theirs.status_code == 201
+    assert mine.json()["id"] != theirs.json()["id"]
+    assert "Idempotent-Replayed" not in theirs.headers
+
+
+def test_requests_without_a_key_are_not_deduplicated(client, user_headers):
+    client.post("/orders", json=ORDER, headers=user_headers)
+    client.post("/orders", json=ORDER, headers=user_headers)
+
+    assert _order_count(client, user_headers) == 2
+
+
+def test_invalid_key_is_rejected(client, user_headers):
+    r = client.post("/orders", json=ORDER, headers={**user_headers, "Idempotency-Key": "x" * 256})
+
+    assert r.status_code == 400
+    assert _order_count(client, user_headers) == 0
+
+
+def test_repeated_status_change_is_replayed(client, user_headers, admin_headers):
+    order_id = client.post("/orders", json=ORDER, headers=user_headers).json()["id"]
+    headers = {**admin_headers, **_key()}
+
+    first = client.patch(f"/orders/{order_id}", json={"status": "PROCESSING"}, headers=headers)
+    # Without the key, PROCESSING -> PROCESSING would be a 400
+    second = client.patch(f"/orders/{order_id}", json={"status": "PROCESSING"}, headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["ETag"] == first.headers["ETag"] == f'"{order_id}.2"'
+    assert second.headers["Idempotent-Replayed"] == "true"
+
+
+def test_concurrent_duplicates_wait_for_the_first(client, user_headers, store, monkeypatch):
+    saw_in_flight = threading.Event()
+    claim, complete = store.claim, store.complete
+
+    def claim_and_signal(*args):
+        result = claim(*args)
+        if result.state == "in_flight":
+            saw_in_flight.set()
+        return result
+
+    def complete_after_duplicate(*args):
+        # Hold the first request open until its duplicate has found it running
+        saw_in_flight.wait(timeout=5)
+        complete(*args)
+
+    monkeypatch.setattr(store, "claim", claim_and_signal)
+    monkeypatch.setattr(store, "complete", complete_after_duplicate)
+
+    headers = {**user_headers, **_key()}
+    responses = []
+
+    def post():
+        responses.append(client.post("/orders", json=ORDER, headers=headers))
+
+    threads = [threading.Thread(target=post) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert saw_in_flight.is_set()
+    assert [r.status_code for r in responses] == [201, 201]
+    assert responses[0].json() == responses[1].json()
+    assert sorted(r.headers.get("Idempotent-Replayed", "") for r in responses) == ["", "true"]
+    assert _order_count(client, user_headers) == 1
+
+
+def test_duplicate_gives_up_with_409_while_the_first_is_still_running(client, user_headers, store, monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 0.1)
+    headers = {**user_headers, **_key()}
+    # A claim whose request is still running, as another worker would hold it
+    client.post("/orders", json=ORDER, headers=headers)
+    for key, entry in store._entries.items():
+        store._entries[key] = entry[:3] + (None,)
+
+    r = client.post("/orders", json=ORDER, headers=headers)
+
+    assert r.status_code == 409
+
+
+RESPONSE = StoredResponse(201, [("content-type", "application/json"), ("etag", '"1.1"')], b'{"id": 1}')
+
+
+@pytest.fixture(params=["memory", "redis", "database"])
+def backend(request):
+    if request.param == "memory":
+        return MemoryIdempotencyStore()
+    if request.param == "redis":
+        return RedisIdempotencyStore(fakeredis.FakeRedis())
+    return DatabaseIdempotencyStore()
+
+
+def test_store_claim_complete_and_replay(backend):
+    key = uuid.uuid4().hex
+
+    first = backend.claim(key, "fp", 30)
+    assert first.state == "acquired"
+    assert backend.claim(key, "fp", 30)[:2] == ("in_flight", "fp")
+
+    backend.complete(key, first.token, RESPONSE, 60)
+
+    done = backend.claim(key, "other", 30)
+    assert done.state == "done"
+    assert done.fingerprint == "fp"
+    assert done.response == RESPONSE
+
+
+def test_store_only_the_claim_holder_can_release(backend):
+    key = uuid.uuid4().hex
+    first = backend.claim(key, "fp", 30)
+
+    backend.release(key, "not-the-token")
+    assert backend.claim(key, "fp", 30).state == "in_flight"
+
+    backend.release(key, first.token)
+    assert backend.claim(key, "fp", 30).state == "acquired"
+
+
+def test_store_takes_over_an_expired_claim(backend):
+    key = uuid.uuid4().hex
+    stale = backend.claim(key, "fp", 0.001)
+
+    time.sleep(0.05)
+    fresh = backend.claim(key, "fp", 30)
+    assert fresh.state == "acquired"
+
+    # The abandoned request finishing late does not overwrite the new claim
+    backend.complete(key, stale.token, RESPONSE, 60)
+    assert backend.claim(key, "fp", 30).state == "in_flight"
+
+
+def test_redis_store_falls_back_when_redis_is_down():
+    fallback = MemoryIdempotencyStore()
+    store = RedisIdempotencyStore(redis.Redis(port=1, socket_connect_timeout=0.1), fallback=fallback)
+    key = uuid.uuid4().hex
+
+    claim = store.claim(key, "fp", 30)
+    assert claim.state == "acquired"
+    store.complete(key, claim.token, RESPONSE, 60)
+
+    assert fallback.claim(key, "fp", 30).response == RESPONSE
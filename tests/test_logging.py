@@ -0,0 +1,79 @@
+import json
+import logging
+import queue
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.logging import DroppingQueueHandler, JsonFormatter, request_id_var
+from app.core.metrics import LOG_RECORDS_DROPPED
+from app.db.models import OutboxMessage
+from app.db.session import SessionLocal
+
+
+def _access_records(caplog):
+    return [r for r in caplog.records if r.name == "app.access"]
+
+
+def test_json_formatter_includes_request_id_and_extra_fields():
+    record = logging.makeLogRecord({"name": "app", "levelname": "INFO", "msg": "hello %s", "args": ("there",)})
+    record.request_id = "req-1"
+    record.status = 200
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["message"] == "hello there"
+    assert entry["request_id"] == "req-1"
+    assert entry["status"] == 200
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(1))
+    before = LOG_RECORDS_DROPPED._value.get()
+
+    for _ in range(3):
+        handler.handle(logging.makeLogRecord({"msg": "x"}))
+
+    assert handler.queue.qsize() == 1
+    assert LOG_RECORDS_DROPPED._value.get() - before == 2
+
+
+def test_request_id_is_echoed_and_reaches_task_rows(client, user_headers):
+    r = client.post(
+        "/orders",
+        json={"customer_name": "Lg", "item_name": "Tape", "quantity": 1},
+        headers={**user_headers, "X-Request-Id": "trace-abc.1"},
+    )
+    assert r.headers["X-Request-Id"] == "trace-abc.1"
+
+    db = SessionLocal()
+    try:
+        message = db.scalar(
+            select(OutboxMessage).where(OutboxMessage.kwargs["order_id"].as_integer() == r.json()["id"])
+        )
+        assert message.request_id == "trace-abc.1"
+    finally:
+        db.close()
+
+    # Unusable ids are replaced, not echoed
+    r = client.get("/health", headers={"X-Request-Id": "bad id\twith spaces"})
+    assert r.headers["X-Request-Id"] != "bad id\twith spaces"
+    assert len(r.headers["X-Request-Id"]) == 32
+    assert request_id_var.get() is None
+
+
+def test_access_log_sampling_keeps_errors(client, user_headers, caplog, monkeypatch):
+    caplog.set_level(logging.INFO, logger="app.access")
+    monkeypatch.setattr(settings, "ACCESS_LOG_SAMPLE_RATE", 0.0)
+
+    client.get("/orders", headers=user_headers)
+    client.get("/orders/999999999", headers=user_headers)
+
+    records = _access_records(caplog)
+    assert [(r.route, r.status) for r in records] == [("/orders/{order_id}", 404)]
+    assert records[0].db_queries >= 1
+
+    monkeypatch.setattr(settings, "ACCESS_LOG_SAMPLE_RATE", 1.0)
+    caplog.clear()
+    client.get("/orders", headers=user_headers)
+    assert [(r.route, r.status) for r in _access_records(caplog)] == [("/orders", 200)]
@@ -0,0 +1,70 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+from prometheus_client import REGISTRY
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_request_latency_is_labelled_by_route_template(client, user_headers):
+    order_id = client.post(
+        "/orders", json={"customer_name": "Mt", "item_name": "Dial", "quantity": 1}, headers=user_headers
+    ).json()["id"]
+    labels = {"method": "GET", "route": "/orders/{order_id}", "status": "200"}
+    before = _sample("http_request_duration_seconds_count", **labels)
+
+    assert client.get(f"/orders/{order_id}", headers=user_headers).status_code == 200
+
+    assert _sample("http_request_duration_seconds_count", **labels) == before + 1
+    assert client.get("/no-such-path").status_code == 404
+    assert _sample("http_request_duration_seconds_count", method="GET", route="unmatched", status="404") >= 1
+
+
+def test_db_queries_are_counted_per_request(client, user_headers):
+    before_count = _sample("db_queries_per_request_count", route="/orders")
+    before_sum = _sample("db_queries_per_request_sum", route="/orders")
+
+    assert client.get("/orders", headers=user_headers).status_code == 200
+
+    assert _sample("db_queries_per_request_count", route="/orders") == before_count + 1
+    # Cached principal, so just the page query
+    assert _sample("db_queries_per_request_sum", route="/orders") == before_sum + 1
+    assert _sample("db_query_seconds_per_request_sum", route="/orders") > 0
+
+
+def test_metrics_endpoint_exposes_pool_stats(client, user_headers):
+    client.get("/orders", headers=user_headers)
+
+    body = client.get("/metrics").text
+    assert 'db_pool_size{engine="sync"} 5.0' in body
+    assert 'db_pool_checked_out{engine="sync"}' in body
+    assert 'db_pool_overflow{engine="sync"}' in body
+    assert 'db_pool_checkout_wait_seconds_count{engine="sync"}' in body
+    assert "http_requests_in_flight" in body
+
+
+def test_multiprocess_metrics_include_pool_stats(tmp_path):
+    # prometheus_client picks multiprocess mode when the metrics are
+    # created, so this needs a fresh interpreter, as under gunicorn
+    script = textwrap.dedent("""
+        from fastapi.testclient import TestClient
+        from app.main import app
+
+        client = TestClient(app)
+        assert client.get("/health").status_code == 200
+        print(client.get("/metrics").text)
+    """)
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+
+    body = result.stdout
+    assert 'db_pool_size{engine="sync"} 5.0' in body
+    assert 'db_pool_checked_out{engine="sync"}' in body
+    assert 'db_pool_idle{engine="sync"}' in body
+    assert 'db_pool_overflow{engine="sync"}' in body
+    assert "http_requests_in_flight" in body
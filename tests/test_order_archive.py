@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import engine
+from app.tasks.order_archive import run_archive
+
+
+def _backdate(order_id: int, days: int) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            text("UPDATE orders SET created_at = now() - make_interval(days => :days) WHERE id = :id"),
+            {"days": days, "id": order_id},
+        )
+
+
+def _listed_ids(client, headers, **params) -> set[int]:
+    r = client.get("/orders", params={"limit": 100, **params}, headers=headers)
+    assert r.status_code == 200
+    return {o["id"] for o in r.json()}
+
+
+def _archived_ids() -> set[int]:
+    with engine.connect() as conn:
+        return set(conn.scalars(text("SELECT id FROM orders_archive")))
+
+
+def test_delete_hides_the_order_and_keeps_its_events(client, user_headers, admin_headers, create_order):
+    order_id = create_order(user_headers)
+    assert client.patch(f"/orders/{order_id}", json={"status": "PROCESSING"}, headers=admin_headers).status_code == 200
+
+    # Used to fail on the order_events foreign key
+    assert client.delete(f"/orders/{order_id}", headers=admin_headers).status_code == 204
+
+    assert client.get(f"/orders/{order_id}", headers=user_headers).status_code == 404
+    assert client.get(f"/orders/{order_id}/events", headers=user_headers).status_code == 404
+    assert client.patch(f"/orders/{order_id}", json={"status": "SHIPPED"}, headers=admin_headers).status_code == 404
+    assert client.delete(f"/orders/{order_id}", headers=admin_headers).status_code == 404
+    assert order_id not in _listed_ids(client, user_headers)
+    assert order_id not in _listed_ids(client, user_headers, include_archived=True)
+
+    r = client.patch("/orders/status:batch", json={"ids": [order_id], "status": "SHIPPED"}, headers=admin_headers)
+    assert r.json()["rejected"] == [{"id": order_id, "reason": "Order not found"}]
+
+    with engine.connect() as conn:
+        events = conn.scalar(text("SELECT count(*) FROM order_events WHERE order_id = :id"), {"id": order_id})
+    assert events == 1
+
+
+def test_archive_moves_old_finished_orders(client, user_headers, admin_headers, create_order):
+    days = settings.ORDER_ARCHIVE_AFTER_DAYS + 1
+    delivered = create_order(user_headers)
+    for status in ("PROCESSING", "SHIPPED", "DELIVERED"):
+        client.patch(f"/orders/{delivered}", json={"status": status}, headers=admin_headers)
+    deleted = create_order(user_headers)
+    client.delete(f"/orders/{deleted}", headers=admin_headers)
+    pending = create_order(user_headers)
+    recent = create_order(user_headers)
+    client.patch(f"/orders/{recent}", json={"status": "CANCELLED"}, headers=admin_headers)
+    for order_id in (delivered, deleted, pending):
+        _backdate(order_id, days)
+
+    run_archive()
+
+    archived = _archived_ids()
+    assert {delivered, deleted} <= archived
+    assert not {pending, recent} & archived
+    assert _listed_ids(client, user_headers) == {pending, recent}
+
+    # Still readable, with their history
+    assert _listed_ids(client, user_headers, include_archived=True) == {delivered, pending, recent}
+    r = client.get(f"/orders/{delivered}", headers=user_headers)
+    assert r.status_code == 200
+    assert r.json()["status"] == "DELIVERED"
+    events = client.get(f"/orders/{delivered}/events", headers=user_headers).json()
+    assert [e["new_status"] for e in events] == ["DELIVERED", "SHIPPED", "PROCESSING"]
+    assert client.get(f"/orders/{deleted}", headers=user_headers).status_code == 404
+
+
+def test_include_archived_pages_across_both_tables(client, user_headers, admin_headers, create_order):
+    ids = [create_order(user_headers, item_name=f"Jar {i}") for i in range(5)]
+    for order_id in ids[::2]:
+        client.patch(f"/orders/{order_id}", json={"status": "CANCELLED"}, headers=admin_headers)
+        _backdate(order_id, settings.ORDER_ARCHIVE_AFTER_DAYS + 1)
+    run_archive()
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, "include_archived": True, "sort_by": "id", "sort_order": "asc"}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get("/orders", params=params, headers=user_headers)
+        seen += [o["id"] for o in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert seen == ids
+
+    r = client.get("/orders", params={"include_archived": True, "search": "Jar 2"}, headers=user_headers)
+    assert [o["id"] for o in r.json()] == [ids[2]]
+    r = client.get(
+        "/orders",
+        params={"include_archived": True, "search": "jar 4", "search_mode": "fulltext"},
+        headers=user_headers,
+    )
+    assert [o["id"] for o in r.json()] == [ids[4]]
@@ -0,0 +1,166 @@
+import time
+from contextlib import contextmanager
+
+import fakeredis
+from sqlalchemy import event
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.order_cache import CachedResponse, ResponseCache, order_ttl
+from app.db.session import engine
+
+
+@contextmanager
+def count_order_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if "FROM orders" in statement or "FROM order_events" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_repeat_reads_are_served_from_cache(client, user_headers, create_order):
+    order_id = create_order(user_headers)
+    first = client.get(f"/orders/{order_id}", headers=user_headers)
+    client.get(f"/orders/{order_id}/events", headers=user_headers)
+
+    with count_order_queries() as statements:
+        r = client.get(f"/orders/{order_id}", headers=user_headers)
+        events = client.get(f"/orders/{order_id}/events", headers=user_headers)
+
+    assert statements == []
+    assert r.json() == first.json()
+    assert r.headers["ETag"] == first.headers["ETag"]
+    assert events.json() == []
+
+
+def test_if_none_match_returns_304(client, user_headers, create_order):
+    order_id = create_order(user_headers)
+    etag = client.get(f"/orders/{order_id}", headers=user_headers).headers["ETag"]
+
+    for header in (etag, f"W/{etag}", f'"0.0", {etag}', "*"):
+        r = client.get(f"/orders/{order_id}", headers={**user_headers, "If-None-Match": header})
+        assert r.status_code == 304
+        assert r.headers["ETag"] == etag
+        assert r.content == b""
+
+    r = client.get(f"/orders/{order_id}", headers={**user_headers, "If-None-Match": '"0.0"'})
+    assert r.status_code == 200
+    assert r.json()["id"] == order_id
+
+
+def test_cached_order_is_still_owner_only(client, user_headers, other_user_headers, create_order):
+    order_id = create_order(user_headers)
+    assert client.get(f"/orders/{order_id}", headers=user_headers).status_code == 200
+    assert client.get(f"/orders/{order_id}/events", headers=user_headers).status_code == 200
+
+    assert client.get(f"/orders/{order_id}", headers=other_user_headers).status_code == 403
+    assert client.get(f"/orders/{order_id}/events", headers=other_user_headers).status_code == 403
+
+
+def test_writes_invalidate_cached_reads(client, user_headers, admin_headers, create_order):
+    order_id = create_order(user_headers)
+    etag = client.get(f"/orders/{order_id}", headers=user_headers).headers["ETag"]
+    assert client.get(f"/orders/{order_id}/events", headers=user_headers).json() == []
+
+    r = client.patch(f"/orders/{order_id}", json={"status": "PROCESSING"}, headers=admin_headers)
+    assert r.status_code == 200
+
+    r = client.get(f"/orders/{order_id}", headers={**user_headers, "If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.json()["status"] == "PROCESSING"
+    assert r.headers["ETag"] == f'"{order_id}.2"'
+    events = client.get(f"/orders/{order_id}/events", headers=user_headers).json()
+    assert [e["new_status"] for e in events] == ["PROCESSING"]
+
+    r = client.patch("/orders/status:batch", json={"ids": [order_id], "status": "SHIPPED"}, headers=admin_headers)
+    assert r.json()["updated"] == [order_id]
+    assert client.get(f"/orders/{order_id}", headers=user_headers).json()["status"] == "SHIPPED"
+
+
+def test_delete_invalidates_cached_order(client, user_headers, admin_headers, create_order):
+    order_id = create_order(user_headers)
+    assert client.get(f"/orders/{order_id}", headers=user_headers).status_code == 200
+
+    assert client.delete(f"/orders/{order_id}", headers=admin_headers).status_code == 204
+    assert client.get(f"/orders/{order_id}", headers=user_headers).status_code == 404
+
+
+def test_terminal_orders_are_cached_longer():
+    assert order_ttl("DELIVERED") == settings.ORDER_CACHE_TERMINAL_TTL_SECONDS
+    assert order_ttl("CANCELLED") == settings.ORDER_CACHE_TERMINAL_TTL_SECONDS
+    assert order_ttl("PENDING") == settings.ORDER_CACHE_TTL_SECONDS
+
+
+def test_invalidation_blocks_refill_with_stale_read():
+    cache = ResponseCache(TTLCache("test-orders", maxsize=10, ttl=60), None, tombstone_ttl=60, local_ttl=60)
+    old = CachedResponse(1, '"7.1"', b"{}")
+
+    cache.set("order:7", old, ttl=60)
+    cache.invalidate(["order:7"])
+    # A request that read version 1 before the write committed
+    cache.set("order:7", old, ttl=60)
+
+    assert cache.get("order:7") is None
+
+
+def test_redis_tier_shares_entries_and_invalidations():
+    server = fakeredis.FakeServer()
+
+    def worker():
+        return ResponseCache(
+            TTLCache("test-orders", maxsize=10, ttl=60),
+            fakeredis.FakeRedis(server=server),
+            tombstone_ttl=60,
+            local_ttl=60,
+        )
+
+    a, b = worker(), worker()
+    entry = CachedResponse(1, '"7.1"', b'{"id": 7}')
+
+    a.set("order:7", entry, ttl=60)
+    assert b.get("order:7") == entry
+
+    b.invalidate(["order:7"])
+    a.set("order:7", entry, ttl=60)
+    assert worker().get("order:7") is None
+
+
+def test_redis_errors_fall_back_to_the_local_tier():
+    server = fakeredis.FakeServer()
+    server.connected = False
+    cache = ResponseCache(
+        TTLCache("test-orders", maxsize=10, ttl=60),
+        fakeredis.FakeRedis(server=server),
+        tombstone_ttl=60,
+        local_ttl=60,
+    )
+    entry = CachedResponse(1, '"7.1"', b"{}")
+
+    cache.set("order:7", entry, ttl=60)
+    assert cache.get("order:7") == entry
+    cache.invalidate(["order:7"])
+    assert cache.get("order:7") is None
+
+
+def test_local_copies_outlive_another_workers_delete_by_at_most_the_short_ttl():
+    def worker():
+        return ResponseCache(TTLCache("test-orders", maxsize=10, ttl=60), None, tombstone_ttl=60, local_ttl=0.05)
+
+    a, b = worker(), worker()
+    delivered = CachedResponse(1, '"7.4"', b'{"id": 7}')
+    a.set("order:7", delivered, ttl=order_ttl("DELIVERED"))
+    b.set("order:7", delivered, ttl=order_ttl("DELIVERED"))
+
+    # Worker a handles the delete; nothing tells worker b
+    a.invalidate(["order:7"])
+    time.sleep(0.1)
+
+    assert a.get("order:7") is None
+    assert b.get("order:7") is None
@@ -0,0 +1,113 @@
+import threading
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import select
+
+from app.api.routes import orders
+from app.core.user_cache import CurrentUser
+from app.db.models import Order
+from app.db.session import SessionLocal
+from app.schemas.orders import OrderStatus, OrderStatusUpdate
+
+
+def test_get_and_patch_return_versioned_etag(client, user_headers, admin_headers, create_order):
+    order_id = create_order(user_headers)
+
+    r = client.get(f"/orders/{order_id}", headers=user_headers)
+    assert r.headers["ETag"] == f'"{order_id}.1"'
+
+    r = client.patch(f"/orders/{order_id}", json={"status": "PROCESSING"}, headers=admin_headers)
+    assert r.status_code == 200
+    assert r.headers["ETag"] == f'"{order_id}.2"'
+
+
+def test_stale_session_gets_409_instead_of_overwriting(client, user_headers, admin_headers, create_order):
+    order_id = create_order(user_headers)
+
+    db = SessionLocal()
+    try:
+        # Session A reads version 1, then another writer moves the order on
+        stale = db.scalar(select(Order).where(Order.id == order_id))
+        assert stale.version == 1
+        r = client.patch(f"/orders/{order_id}", json={"status": "PROCESSING"}, headers=admin_headers)
+        assert r.status_code == 200
+
+        with pytest.raises(HTTPException) as exc:
+            orders.update_order_status(
+                order_id=order_id,
+                payload=OrderStatusUpdate(status=OrderStatus.CANCELLED),
+                response=Response(),
+                if_match=None,
+                db=db,
+                current_user=CurrentUser(id=0, email="admin@test.com", role="ADMIN"),
+            )
+        assert exc.value.status_code == 409
+    finally:
+        db.close()
+
+    assert client.get(f"/orders/{order_id}", headers=user_headers).json()["status"] == "PROCESSING"
+    events = client.get(f"/orders/{order_id}/events", headers=user_headers).json()
+    assert [(e["old_status"], e["new_status"]) for e in events] == [("PENDING", "PROCESSING")]
+
+
+def test_if_match_precondition(client, user_headers, admin_headers, create_order):
+    order_id = create_order(user_headers)
+    etag = client.get(f"/orders/{order_id}", headers=user_headers).headers["ETag"]
+
+    r = client.patch(
+        f"/orders/{order_id}",
+        json={"status": "PROCESSING"},
+        headers={**admin_headers, "If-Match": f'"{order_id}.7", {etag}'},
+    )
+    assert r.status_code == 200
+
+    # The old tag no longer describes the order
+    r = client.patch(
+        f"/orders/{order_id}",
+        json={"status": "SHIPPED"},
+        headers={**admin_headers, "If-Match": etag},
+    )
+    assert r.status_code == 412
+
+    r = client.patch(
+        f"/orders/{order_id}",
+        json={"status": "SHIPPED"},
+        headers={**admin_headers, "If-Match": "*"},
+    )
+    assert r.status_code == 200
+
+
+def test_concurrent_transitions_keep_event_chain_consistent(client, user_headers, admin_headers, create_order):
+    workers = 4
+    targets = ["PROCESSING", "SHIPPED", "DELIVERED", "CANCELLED"]
+
+    for _ in range(3):
+        order_id = create_order(user_headers)
+        barrier = threading.Barrier(workers)
+        codes = []
+
+        def worker(i):
+            barrier.wait()
+            r = client.patch(f"/orders/{order_id}", json={"status": targets[i]}, headers=admin_headers)
+            codes.append(r.status_code)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert set(codes) <= {200, 400, 409}, codes
+
+        # Newest first from the API; walk the chain oldest first
+        events = client.get(f"/orders/{order_id}/events", headers=user_headers).json()[::-1]
+        assert len(events) == codes.count(200)
+        previous = "PENDING"
+        for e in events:
+            assert e["old_status"] == previous
+            previous = e["new_status"]
+
+        order = client.get(f"/orders/{order_id}", headers=user_headers)
+        assert order.json()["status"] == previous
+        assert order.headers["ETag"] == f'"{order_id}.{len(events) + 1}"'
@@ -0,0 +1,97 @@
+import pytest
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import engine
+from app.tasks.order_archive import run_archive
+
+
+def _total(client, headers, mode, **params) -> int:
+    r = client.get("/orders", params={"count": mode, "limit": 2, **params}, headers=headers)
+    assert r.status_code == 200
+    return int(r.headers["X-Total-Count"])
+
+
+def test_no_count_unless_asked(client, user_headers, create_order):
+    create_order(user_headers)
+
+    r = client.get("/orders", headers=user_headers)
+
+    assert "X-Total-Count" not in r.headers
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_exact_and_cached_counts_match_the_listing(client, user_headers, monkeypatch, fast, create_order):
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", fast)
+    for i in range(5):
+        create_order(user_headers, quantity=i + 1)
+
+    assert _total(client, user_headers, "exact") == 5
+    assert _total(client, user_headers, "cached") == 5
+    # The total covers every page, not the one returned
+    r = client.get("/orders", params={"count": "exact", "limit": 2}, headers=user_headers)
+    assert len(r.json()) == 2
+    assert "X-Next-Cursor" in r.headers
+
+
+def test_estimated_count_comes_from_the_planner(client, user_headers, create_order):
+    for _ in range(3):
+        create_order(user_headers)
+
+    # Only an estimate: a non-negative number, not necessarily 3
+    assert _total(client, user_headers, "estimated") >= 0
+    assert _total(client, user_headers, "estimated", search="lamp", min_qty=1) >= 0
+    assert _total(client, user_headers, "estimated", search="lamp", search_mode="fulltext") >= 0
+
+
+def test_exact_count_applies_the_filters(client, user_headers, create_order):
+    create_order(user_headers, item_name="Desk", quantity=1)
+    create_order(user_headers, item_name="Desk", quantity=5)
+    create_order(user_headers, item_name="Chair", quantity=5)
+
+    assert _total(client, user_headers, "exact", search="desk") == 2
+    assert _total(client, user_headers, "exact", min_qty=5) == 2
+    assert _total(client, user_headers, "exact", search="desk", search_mode="fulltext", max_qty=3) == 1
+
+
+def test_cached_count_rejects_filters(client, user_headers):
+    r = client.get("/orders", params={"count": "cached", "search": "desk"}, headers=user_headers)
+    assert r.status_code == 400
+
+    r = client.get("/orders", params={"count": "cached", "min_qty": 2}, headers=user_headers)
+    assert r.status_code == 400
+
+
+def test_cached_count_follows_bulk_creates_deletes_and_archival(client, user_headers, admin_headers, create_order):
+    first = create_order(user_headers)
+    r = client.post("/orders/bulk", json=[{"customer_name": "B", "item_name": "Pen", "quantity": 1}] * 3, headers=user_headers)
+    assert r.status_code == 200
+    assert _total(client, user_headers, "cached") == 4
+
+    assert client.delete(f"/orders/{first}", headers=admin_headers).status_code == 204
+    assert _total(client, user_headers, "cached") == 3
+
+    # Status changes leave the total alone; archival moves it to the archived side
+    delivered = create_order(user_headers)
+    for status in ("PROCESSING", "SHIPPED", "DELIVERED"):
+        assert client.patch(f"/orders/{delivered}", json={"status": status}, headers=admin_headers).status_code == 200
+    with engine.begin() as conn:
+        conn.execute(
+            text("UPDATE orders SET created_at = now() - make_interval(days => :days) WHERE id = ANY(:ids)"),
+            {"days": settings.ORDER_ARCHIVE_AFTER_DAYS + 1, "ids": [first, delivered]},
+        )
+    run_archive()
+
+    for mode in ("cached", "exact"):
+        assert _total(client, user_headers, mode) == 3
+        assert _total(client, user_headers, mode, include_archived=True) == 4
+
+
+def test_admin_cached_count_covers_every_user(
+    client, user_headers, other_user_headers, admin_headers, create_order
+):
+    create_order(user_headers)
+    create_order(other_user_headers)
+
+    assert _total(client, admin_headers, "cached") >= 2
+    assert _total(client, user_headers, "cached") == 1
@@ -0,0 +1,174 @@
+import csv
+import gzip
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+
+from app.api.routes import orders
+from app.core.config import settings
+from app.core.order_cache import order_cache, order_events_key
+from app.db.session import engine
+from app.tasks.event_partitions import archive_expired_partitions, ensure_partitions, run_maintenance
+
+
+def _order_with_events(client, user_headers, admin_headers):
+    r = client.post("/orders", json={"customer_name": "Ev", "item_name": "Clock", "quantity": 1}, headers=user_headers)
+    order_id = r.json()["id"]
+    for status in ("PROCESSING", "SHIPPED", "DELIVERED"):
+        assert client.patch(f"/orders/{order_id}", json={"status": status}, headers=admin_headers).status_code == 200
+    return order_id
+
+
+def test_events_paginate_newest_first(client, user_headers, admin_headers):
+    order_id = _order_with_events(client, user_headers, admin_headers)
+
+    r = client.get(f"/orders/{order_id}/events", params={"limit": 2}, headers=user_headers)
+    assert [e["new_status"] for e in r.json()] == ["DELIVERED", "SHIPPED"]
+
+    r = client.get(
+        f"/orders/{order_id}/events",
+        params={"limit": 2, "cursor": r.headers["X-Next-Cursor"]},
+        headers=user_headers,
+    )
+    assert [e["new_status"] for e in r.json()] == ["PROCESSING"]
+    assert "X-Next-Cursor" not in r.headers
+
+
+def test_cached_first_page_keeps_its_cursor(client, user_headers, admin_headers, monkeypatch):
+    monkeypatch.setattr(orders, "EVENTS_PAGE_SIZE", 2)
+    order_id = _order_with_events(client, user_headers, admin_headers)
+    # Drop the write's tombstones, which would keep the page uncached
+    order_cache.local.clear()
+
+    first = client.get(f"/orders/{order_id}/events", params={"limit": 2}, headers=user_headers)
+    cached = order_cache.get(order_events_key(order_id))
+    again = client.get(f"/orders/{order_id}/events", params={"limit": 2}, headers=user_headers)
+
+    assert dict(cached.headers)["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+    assert again.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+    assert again.json() == first.json()
+
+
+def test_events_reject_bad_cursor(client, user_headers, admin_headers):
+    order_id = _order_with_events(client, user_headers, admin_headers)
+
+    r = client.get(f"/orders/{order_id}/events", params={"cursor": "nope"}, headers=user_headers)
+
+    assert r.status_code == 400
+
+
+def test_events_land_in_the_current_month_partition(client, user_headers, admin_headers):
+    order_id = _order_with_events(client, user_headers, admin_headers)
+
+    with engine.connect() as conn:
+        partitions = conn.scalars(
+            text("SELECT DISTINCT tableoid::regclass::text FROM order_events WHERE order_id = :id"),
+            {"id": order_id},
+        ).all()
+
+    assert partitions == [f"order_events_{datetime.now(timezone.utc):%Y%m}"]
+
+
+def test_ensure_partitions_is_idempotent():
+    with engine.begin() as conn:
+        assert ensure_partitions(conn, date(2099, 1, 15), 1) == ["order_events_209901", "order_events_209902"]
+        assert ensure_partitions(conn, date(2099, 1, 15), 1) == []
+        conn.execute(text("DROP TABLE order_events_209901, order_events_209902"))
+
+
+def test_expired_partitions_are_archived_and_dropped(client, user_headers, tmp_path):
+    r = client.post("/orders", json={"customer_name": "Old", "item_name": "Radio", "quantity": 1}, headers=user_headers)
+    order_id = r.json()["id"]
+
+    with engine.begin() as conn:
+        ensure_partitions(conn, date(2001, 1, 1), 0)
+        user_id = conn.scalar(text("SELECT user_id FROM orders WHERE id = :id"), {"id": order_id})
+        conn.execute(
+            text(
+                "INSERT INTO order_events (order_id, changed_by_user_id, old_status, new_status, note, created_at) "
+                "VALUES (:order_id, :user_id, 'PENDING', 'CANCELLED', 'archived note', '2001-01-20T12:00:00+00')"
+            ),
+            {"order_id": order_id, "user_id": user_id},
+        )
+
+    # 24 months of retention from Feb 2003 keeps February 2001 onwards
+    paths = archive_expired_partitions(engine, date(2003, 2, 1), 24, tmp_path)
+
+    assert [p.name for p in paths] == ["order_events_200101.csv.gz"]
+    with gzip.open(paths[0], "rt") as f:
+        rows = list(csv.DictReader(f))
+    assert [(int(r["order_id"]), r["note"]) for r in rows] == [(order_id, "archived note")]
+
+    with engine.connect() as conn:
+        assert conn.scalar(text("SELECT to_regclass('order_events_200101')")) is None
+        assert conn.scalar(text("SELECT count(*) FROM order_events WHERE order_id = :id"), {"id": order_id}) == 0
+
+
+def test_maintenance_moves_rows_the_default_partition_caught(user_headers, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EVENTS_PARTITION_MONTHS_AHEAD", 0)
+    monkeypatch.setattr(settings, "EVENTS_RETENTION_MONTHS", 1200)
+    monkeypatch.setattr(settings, "EVENTS_ARCHIVE_DIR", str(tmp_path))
+
+    # No 2098-01 partition yet: the row lands in the default partition
+    with engine.begin() as conn:
+        user_id = conn.scalar(text("SELECT min(id) FROM users"))
+        conn.execute(
+            text(
+                "INSERT INTO order_events (order_id, changed_by_user_id, old_status, new_status, created_at) "
+                "VALUES (1, :user_id, 'PENDING', 'PROCESSING', '2098-01-20T12:00:00+00')"
+            ),
+            {"user_id": user_id},
+        )
+
+    try:
+        run_maintenance(today=date(2098, 1, 15))
+
+        with engine.connect() as conn:
+            where = "created_at >= '2098-01-01T00:00:00+00' AND created_at < '2098-02-01T00:00:00+00'"
+            assert conn.scalars(text(f"SELECT tableoid::regclass::text FROM order_events WHERE {where}")).all() == [
+                "order_events_209801"
+            ]
+            assert conn.scalar(text(f"SELECT count(*) FROM order_events_default WHERE {where}")) == 0
+            # Re-attached as the default
+            assert conn.scalar(text(
+                "SELECT partdefid = 'order_events_default'::regclass FROM pg_partitioned_table "
+                "WHERE partrelid = 'order_events'::regclass"
+            ))
+
+        # And the next run has nothing left to do
+        run_maintenance(today=date(2098, 1, 15))
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS order_events_209801"))
+
+
+def test_expired_rows_in_the_default_partition_are_archived(client, user_headers, tmp_path):
+    r = client.post("/orders", json={"customer_name": "Dflt", "item_name": "Lamp", "quantity": 1}, headers=user_headers)
+    order_id = r.json()["id"]
+
+    # 1990 never had a partition: both rows land in the default partition
+    with engine.begin() as conn:
+        user_id = conn.scalar(text("SELECT user_id FROM orders WHERE id = :id"), {"id": order_id})
+        for created_at, note in (("1990-03-05T12:00:00+00", "expired"), ("1990-06-05T12:00:00+00", "kept")):
+            conn.execute(
+                text(
+                    "INSERT INTO order_events (order_id, changed_by_user_id, old_status, new_status, note, created_at) "
+                    "VALUES (:order_id, :user_id, 'PENDING', 'PROCESSING', :note, :created_at)"
+                ),
+                {"order_id": order_id, "user_id": user_id, "note": note, "created_at": created_at},
+            )
+
+    # 3 months of retention from July 1990 keeps April 1990 onwards
+    paths = archive_expired_partitions(engine, date(1990, 7, 1), 3, tmp_path)
+
+    assert [p.name.startswith("order_events_default_") for p in paths] == [True]
+    with gzip.open(paths[0], "rt") as f:
+        rows = list(csv.DictReader(f))
+    assert [(int(r["order_id"]), r["note"]) for r in rows] == [(order_id, "expired")]
+
+    # Nothing expired is left for the next run
+    assert archive_expired_partitions(engine, date(1990, 7, 1), 3, tmp_path) == []
+
+    with engine.begin() as conn:
+        kept = conn.execute(text("DELETE FROM order_events_default WHERE order_id = :id RETURNING note"), {"id": order_id})
+        assert kept.scalars().all() == ["kept"]
@@ -0,0 +1,128 @@
+import re
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+
+from app.api.routes.orders import filter_orders_query, sort_orders_query
+from app.core.pagination import encode_cursor
+from app.db.models import Order
+from app.db.session import engine
+
+SEED_USERS = 200
+SEED_ORDERS = 100000
+
+FILTERS = {
+    "plain": {},
+    "search": {"search": "keyboard"},
+    "fulltext": {"search": "keyb", "search_mode": "fulltext"},
+    "quantity": {"min_qty": 5, "max_qty": 50},
+    "cursor": {},
+}
+
+# The index that returns each role's rows in page order
+SORT_INDEXES = {
+    ("USER", "id"): {"ix_orders_user_id_id"},
+    ("USER", "quantity"): {"ix_orders_user_id_quantity_id"},
+    ("USER", "created_at"): {"ix_orders_user_id_created_at_id"},
+    ("ADMIN", "id"): {"orders_pkey", "ix_orders_id"},
+    ("ADMIN", "quantity"): {"ix_orders_quantity_id"},
+    ("ADMIN", "created_at"): {"ix_orders_created_at_id"},
+}
+USER_INDEXES = {name for (role, _), names in SORT_INDEXES.items() if role == "USER" for name in names}
+ID_INDEXES = SORT_INDEXES["ADMIN", "id"]
+# Indexes that can find the rows a filter matches
+FILTER_INDEXES = {
+    "search": {"ix_orders_customer_name_trgm", "ix_orders_item_name_trgm"},
+    "fulltext": {"ix_orders_search_vector"},
+    "quantity": {"ix_orders_quantity_id"},
+}
+
+INDEX_USED = re.compile(r"(?:Index Scan(?: Backward)? using|Index Only Scan(?: Backward)? using|Bitmap Index Scan on) (\w+)")
+
+
+@pytest.fixture(scope="module")
+def seeded():
+    """A connection seeing SEED_ORDERS orders spread over SEED_USERS users, with fresh statistics.
+
+    Everything, the ANALYZE included, runs in one transaction that is
+    rolled back afterwards, so the other tests never see the rows. The
+    statistics target is raised so ANALYZE reads every row rather than a
+    random sample, which keeps the plans the same on every run.
+    """
+    with engine.connect() as conn:
+        conn.begin()
+        first_user = conn.scalar(text(
+            "INSERT INTO users (email, hashed_password, role) "
+            "SELECT 'index-' || u || '@test.com', 'x', 'USER' FROM generate_series(1, :n) u "
+            "RETURNING id"
+        ), {"n": SEED_USERS})
+        conn.execute(text(
+            "INSERT INTO orders (customer_name, item_name, quantity, status, user_id, created_at) "
+            "SELECT 'Customer ' || i % 2000, "
+            "(ARRAY['Desk Lamp', 'Office Chair', 'Monitor', 'Wireless Mouse', 'Notebook', 'Cable', 'Headset', "
+            "'Webcam'])[1 + i % 8] || CASE WHEN i % 500 = 0 THEN ' Keyboard' ELSE '' END, "
+            "1 + i / 7 % 100, 'PENDING', :first_user + i % :users, now() - make_interval(mins => i) "
+            "FROM generate_series(1, :n) i"
+        ), {"first_user": first_user, "users": SEED_USERS, "n": SEED_ORDERS})
+        conn.execute(text("SET LOCAL default_statistics_target = 1000"))
+        conn.execute(text("ANALYZE orders"))
+        yield conn, first_user
+        conn.rollback()
+
+
+def _explain(conn, stmt) -> str:
+    compiled = stmt.compile(dialect=postgresql.dialect())
+    rows = conn.exec_driver_sql(f"EXPLAIN {compiled}", compiled.params).all()
+    return "\n".join(row[0] for row in rows)
+
+
+def _cursor(conn, user_id, sort_by, sort_order) -> str:
+    # Resume from the middle of the user's orders
+    value, order_id = conn.execute(
+        text(f"SELECT {sort_by}, id FROM orders WHERE user_id = :user_id ORDER BY {sort_by}, id OFFSET :n LIMIT 1"),
+        {"user_id": user_id, "n": SEED_ORDERS // SEED_USERS // 2},
+    ).one()
+    return encode_cursor(sort_by, sort_order, value, order_id)
+
+
+@pytest.mark.parametrize("role", ["USER", "ADMIN"])
+@pytest.mark.parametrize("sort_by", ["id", "quantity", "created_at"])
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+@pytest.mark.parametrize("shape", list(FILTERS))
+def test_list_orders_query_shapes_use_an_index(seeded, role, sort_by, sort_order, shape):
+    conn, user_id = seeded
+    current_user = SimpleNamespace(id=user_id, role=role)
+    cursor = _cursor(conn, user_id, sort_by, sort_order) if shape == "cursor" else None
+
+    stmt = filter_orders_query(select(Order), current_user, **FILTERS[shape])
+    stmt = sort_orders_query(stmt, sort_by, sort_order, cursor).limit(21)
+
+    plan = _explain(conn, stmt)
+    used = set(INDEX_USED.findall(plan))
+
+    assert "Seq Scan" not in plan, plan
+    if shape in ("plain", "cursor"):
+        # Pages come straight off the sort index, without a Sort node
+        assert used and used <= SORT_INDEXES[role, sort_by], plan
+        assert "Sort" not in plan, plan
+    elif role == "USER":
+        # Narrowed to the user's rows through a user_id index, possibly
+        # combined with the filter's; full-text matches join back by id
+        assert used & USER_INDEXES, plan
+        assert used <= USER_INDEXES | FILTER_INDEXES[shape] | ID_INDEXES, plan
+    else:
+        assert used and used <= SORT_INDEXES[role, sort_by] | FILTER_INDEXES[shape] | ID_INDEXES, plan
+        if shape == "fulltext":
+            assert "ix_orders_search_vector" in used, plan
+
+
+def test_fulltext_search_uses_the_gin_index(seeded):
+    conn, _ = seeded
+    current_user = SimpleNamespace(id=1, role="ADMIN")
+    stmt = filter_orders_query(select(Order), current_user, search="keyb mou", search_mode="fulltext")
+
+    plan = _explain(conn, stmt)
+
+    assert "ix_orders_search_vector" in set(INDEX_USED.findall(plan)), plan
@@ -0,0 +1,74 @@
+import pytest
+
+from tests.test_pagination import _walk_cursor
+
+
+def _search(client, headers, search, **params):
+    r = client.get(
+        "/orders",
+        params={"search": search, "search_mode": "fulltext", "limit": 100, **params},
+        headers=headers,
+    )
+    assert r.status_code == 200
+    return [o["id"] for o in r.json()]
+
+
+def test_fulltext_matches_word_prefixes(client, user_headers, create_order):
+    keyboard = create_order(user_headers, customer_name="Marta Quill", item_name="Mechanical Keyboard")
+    mouse = create_order(user_headers, customer_name="Marta Quill", item_name="Wireless Mouse")
+    create_order(user_headers, customer_name="Otto Brandt", item_name="Desk Lamp")
+
+    assert _search(client, user_headers, "keyb") == [keyboard]
+    assert set(_search(client, user_headers, "MART qui")) == {keyboard, mouse}
+    # Every word must match
+    assert _search(client, user_headers, "marta lamp") == []
+    # Unlike substring mode, matches start at word boundaries
+    assert _search(client, user_headers, "board") == []
+
+
+def test_fulltext_ignores_tsquery_syntax_in_input(client, user_headers, create_order):
+    order_id = create_order(user_headers, customer_name="Nadia O'Brien", item_name="Tea Pot")
+
+    assert _search(client, user_headers, "o'brien & | ! (tea") == [order_id]
+    # Nothing searchable left: no search filter, like an empty search
+    assert order_id in _search(client, user_headers, "&|!")
+
+
+def test_fulltext_combines_with_quantity_filter_and_rbac(
+    client, user_headers, other_user_headers, admin_headers, create_order
+):
+    small = create_order(user_headers, customer_name="Ines Varga", item_name="Blue Kettle", quantity=1)
+    large = create_order(user_headers, customer_name="Ines Varga", item_name="Red Kettle", quantity=9)
+    theirs = create_order(other_user_headers, customer_name="Ines Varga", item_name="Green Kettle", quantity=9)
+
+    assert set(_search(client, user_headers, "kettle")) == {small, large}
+    assert _search(client, user_headers, "kettle", min_qty=5) == [large]
+    assert set(_search(client, admin_headers, "ines kettle", min_qty=5)) >= {large, theirs}
+
+
+def test_sort_by_relevance_ranks_better_matches_first(client, user_headers, create_order):
+    once = create_order(user_headers, customer_name="Paula Grey", item_name="Cable")
+    twice = create_order(user_headers, customer_name="Cable Grey", item_name="Cable")
+
+    assert _search(client, user_headers, "cable grey", sort_by="relevance") == [twice, once]
+    assert _search(client, user_headers, "cable grey", sort_by="relevance", sort_order="asc") == [once, twice]
+
+
+def test_relevance_without_fulltext_falls_back_to_id(client, user_headers, create_order):
+    ids = [create_order(user_headers, customer_name="Rhea Lind", item_name="Spoon") for _ in range(3)]
+
+    r = client.get("/orders", params={"search": "Rhea", "sort_by": "relevance"}, headers=user_headers)
+
+    assert [o["id"] for o in r.json()] == ids[::-1]
+
+
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+def test_relevance_cursor_pages_match_offset_listing(client, user_headers, sort_order, create_order):
+    # Equal ranks exercise the id tiebreak
+    for customer in ("Zeno Zeno", "Zeno Park", "Zeno Zeno", "Zeno Park", "Zeno Ash"):
+        create_order(user_headers, customer_name=customer, item_name="Zeno Widget")
+
+    params = {"search": "zeno", "search_mode": "fulltext", "sort_by": "relevance", "sort_order": sort_order}
+    expected = _search(client, user_headers, "zeno", sort_by="relevance", sort_order=sort_order)
+
+    assert _walk_cursor(client, user_headers, {**params, "limit": 2}) == expected
@@ -0,0 +1,61 @@
+import json
+from collections import defaultdict
+from datetime import datetime, timezone
+
+
+def _expected_stats(client, headers):
+    """Aggregate the caller's orders the slow way, from the export."""
+    totals = defaultdict(lambda: [0, 0])
+    for line in client.get("/orders/export", headers=headers).text.splitlines():
+        order = json.loads(line)
+        day = datetime.fromisoformat(order["created_at"]).astimezone(timezone.utc).date().isoformat()
+        total = totals[(order["status"], day, order["item_name"])]
+        total[0] += 1
+        total[1] += order["quantity"]
+    return [
+        {"status": s, "day": d, "item_name": i, "order_count": c, "quantity_sum": q}
+        for (s, d, i), (c, q) in sorted(totals.items())
+    ]
+
+
+def test_stats_rollup_tracks_every_write_path(client, user_headers, admin_headers):
+    ids = [
+        client.post("/orders", json={"customer_name": "S", "item_name": item, "quantity": qty}, headers=user_headers).json()["id"]
+        for item, qty in (("Pen", 1), ("Pen", 2), ("Ink", 5))
+    ]
+    bulk = client.post(
+        "/orders/bulk",
+        json=[{"customer_name": "S", "item_name": "Pen", "quantity": 3}, {"customer_name": "S", "item_name": "Pad", "quantity": 4}],
+        headers=user_headers,
+    ).json()
+    ids += [c["id"] for c in bulk["created"]]
+
+    client.patch(f"/orders/{ids[0]}", json={"status": "PROCESSING"}, headers=admin_headers)
+    client.patch("/orders/status:batch", json={"ids": [ids[1], ids[2]], "status": "CANCELLED"}, headers=admin_headers)
+    assert client.delete(f"/orders/{ids[4]}", headers=admin_headers).status_code == 204
+
+    r = client.get(
+        "/orders/stats",
+        params=[("group_by", "status"), ("group_by", "day"), ("group_by", "item")],
+        headers=user_headers,
+    )
+    assert r.status_code == 200
+    assert r.json() == _expected_stats(client, user_headers)
+
+
+def test_stats_group_by_status_is_scoped_to_user(client, user_headers, admin_headers):
+    for qty in (2, 3):
+        client.post("/orders", json={"customer_name": "S", "item_name": "Cup", "quantity": qty}, headers=user_headers)
+    client.post("/orders", json={"customer_name": "S", "item_name": "Cup", "quantity": 50}, headers=admin_headers)
+
+    r = client.get("/orders/stats", headers=user_headers)
+    assert r.status_code == 200
+    assert r.json() == [{"status": "PENDING", "order_count": 2, "quantity_sum": 5}]
+
+
+def test_stats_date_range_filter(client, user_headers):
+    client.post("/orders", json={"customer_name": "S", "item_name": "Cup", "quantity": 1}, headers=user_headers)
+
+    r = client.get("/orders/stats", params={"group_by": "day", "date_to": "2000-01-01"}, headers=user_headers)
+    assert r.status_code == 200
+    assert r.json() == []
@@ -0,0 +1,96 @@
+import fakeredis
+from celery import Celery
+from sqlalchemy import select
+
+from app.core.metrics import OUTBOX_RELAYED
+from app.db.models import OutboxMessage
+from app.db.session import SessionLocal
+from app.tasks import notifications
+from app.tasks.relay import outbox_task_id, relay_outbox_batch
+
+
+def _outbox_rows(order_id):
+    db = SessionLocal()
+    try:
+        return db.scalars(
+            select(OutboxMessage)
+            .where(OutboxMessage.kwargs["order_id"].as_integer() == order_id)
+            .order_by(OutboxMessage.id)
+        ).all()
+    finally:
+        db.close()
+
+
+def _drain_broker(app):
+    messages = []
+    with app.connection_for_read() as conn:
+        queue = conn.SimpleQueue("celery")
+        while True:
+            try:
+                message = queue.get(timeout=0.1)
+            except queue.Empty:
+                break
+            message.ack()
+            messages.append(message)
+        queue.close()
+    return messages
+
+
+def test_writes_record_notifications_in_their_transaction(client, user_headers, admin_headers):
+    r = client.post("/orders", json={"customer_name": "Ob", "item_name": "Kite", "quantity": 2}, headers=user_headers)
+    order_id = r.json()["id"]
+
+    # Rejected transition: its transaction rolls back, outbox row included
+    assert client.patch(f"/orders/{order_id}", json={"status": "DELIVERED"}, headers=admin_headers).status_code == 400
+    assert client.patch(f"/orders/{order_id}", json={"status": "PROCESSING"}, headers=admin_headers).status_code == 200
+
+    rows = _outbox_rows(order_id)
+    assert [(m.task_name, m.kwargs) for m in rows] == [
+        ("send_order_notification", {"order_id": order_id, "customer_name": "Ob", "item_name": "Kite"}),
+        (
+            "send_order_notification",
+            {"order_id": order_id, "customer_name": "Ob", "item_name": "Kite", "status": "PROCESSING"},
+        ),
+    ]
+
+
+def test_relay_publishes_batches_with_stable_task_ids(client, user_headers):
+    app = Celery("outbox-test", broker="memory://")
+    _drain_broker(app)
+
+    order_ids = [
+        client.post("/orders", json={"customer_name": "Rl", "item_name": "Bell", "quantity": q}, headers=user_headers).json()["id"]
+        for q in (1, 2, 3)
+    ]
+    expected = {outbox_task_id(m.id): m.kwargs for order_id in order_ids for m in _outbox_rows(order_id)}
+    relayed_before = OUTBOX_RELAYED.labels(task="send_order_notification")._value.get()
+
+    db = SessionLocal()
+    try:
+        relayed = 0
+        while batch := relay_outbox_batch(db, app, batch_size=2):
+            relayed += batch
+    finally:
+        db.close()
+
+    published = {m.headers["id"]: m for m in _drain_broker(app)}
+    assert len(published) == relayed
+    for task_id, kwargs in expected.items():
+        assert published[task_id].headers["task"] == "send_order_notification"
+        assert published[task_id].payload[1] == kwargs
+
+    assert all(_outbox_rows(order_id) == [] for order_id in order_ids)
+    assert OUTBOX_RELAYED.labels(task="send_order_notification")._value.get() - relayed_before == relayed
+
+
+def test_republished_notifications_are_sent_once(monkeypatch):
+    monkeypatch.setattr(notifications, "notification_claims", fakeredis.FakeRedis(server=fakeredis.FakeServer()))
+    kwargs = {"order_id": 1, "customer_name": "Rp", "item_name": "Drum"}
+
+    def deliver(task_id):
+        return notifications.send_order_notification.apply(kwargs=kwargs, task_id=task_id).get()
+
+    assert deliver(outbox_task_id(1)).startswith("Order notification sent")
+    # The relay died before deleting the row and published it again
+    assert deliver(outbox_task_id(1)) == "duplicate"
+    assert deliver(outbox_task_id(2)).startswith("Order notification sent")
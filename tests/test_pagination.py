@@ -0,0 +1,63 @@
+import pytest
+
+
+def _walk_cursor(client, headers, params):
+    seen = []
+    cursor = None
+    while True:
+        page_params = dict(params)
+        if cursor:
+            page_params["cursor"] = cursor
+        r = client.get("/orders", params=page_params, headers=headers)
+        assert r.status_code == 200
+        seen.extend(o["id"] for o in r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            return seen
+
+
+@pytest.mark.parametrize("sort_by", ["id", "quantity", "created_at"])
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+def test_cursor_pages_match_offset_listing(client, user_headers, sort_by, sort_order, create_order):
+    # Duplicate quantities exercise the id tiebreak
+    for q in [5, 3, 5, 1, 3, 5, 2]:
+        create_order(user_headers, q)
+
+    params = {"sort_by": sort_by, "sort_order": sort_order}
+    r = client.get("/orders", params={**params, "limit": 100}, headers=user_headers)
+    expected = [o["id"] for o in r.json()]
+    assert len(expected) == 7
+
+    assert _walk_cursor(client, user_headers, {**params, "limit": 3}) == expected
+
+
+def test_cursor_respects_filters(client, user_headers, create_order):
+    ids = [create_order(user_headers, q) for q in [1, 10, 20, 30, 40]]
+
+    seen = _walk_cursor(
+        client, user_headers, {"min_qty": 10, "max_qty": 30, "sort_order": "asc", "limit": 1}
+    )
+    assert seen == ids[1:4]
+
+
+def test_last_page_has_no_cursor(client, user_headers, create_order):
+    for q in [1, 2]:
+        create_order(user_headers, q)
+
+    r = client.get("/orders", params={"limit": 2}, headers=user_headers)
+    assert r.status_code == 200
+    assert "X-Next-Cursor" not in r.headers
+
+
+def test_cursor_rejects_mismatched_sort(client, user_headers, create_order):
+    for q in [1, 2, 3]:
+        create_order(user_headers, q)
+
+    r = client.get("/orders", params={"limit": 1, "sort_by": "quantity"}, headers=user_headers)
+    cursor = r.headers["X-Next-Cursor"]
+
+    r = client.get("/orders", params={"limit": 1, "cursor": cursor}, headers=user_headers)
+    assert r.status_code == 400
+
+    r = client.get("/orders", params={"cursor": "not-a-cursor"}, headers=user_headers)
+    assert r.status_code == 400
@@ -0,0 +1,69 @@
+import fakeredis
+import pytest
+import redis
+from limits import parse
+from limits.storage import RedisStorage
+from limits.strategies import MovingWindowRateLimiter
+
+from app.core.config import settings
+from app.core import limiter as limiter_module
+from app.core.limiter import OrdersBudget
+from app.core.security import decode_access_token
+
+
+def _fake_storage(server):
+    pool = redis.ConnectionPool(connection_class=fakeredis.FakeConnection, server=server)
+    return RedisStorage("redis://fake", connection_pool=pool)
+
+
+def _use_storage(monkeypatch, storage, limit="3/minute"):
+    monkeypatch.setattr(limiter_module, "orders_budget", OrdersBudget(storage, limit))
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    server = fakeredis.FakeServer()
+    _use_storage(monkeypatch, _fake_storage(server))
+    return server
+
+
+def test_budget_is_per_user_and_shared_through_redis(client, user_headers, admin_headers, fake_redis):
+    for _ in range(3):
+        assert client.get("/orders", headers=user_headers).status_code == 200
+    # One budget across all routes
+    r = client.get("/orders/stats", headers=user_headers)
+    assert r.status_code == 429
+    assert r.json() == {"error": "Rate limit exceeded: 3 per 1 minute"}
+    assert 1 <= int(r.headers["Retry-After"]) <= 61
+
+    # Other users and routes outside /orders are unaffected
+    assert client.get("/orders", headers=admin_headers).status_code == 200
+    assert client.get("/health").status_code == 200
+
+    # Another worker process on the same Redis sees the spent budget
+    email = decode_access_token(user_headers["Authorization"].split()[1])
+    other_worker = MovingWindowRateLimiter(_fake_storage(fake_redis))
+    assert not other_worker.test(parse("3/minute"), "ratelimit", f"user:{email}", "global")
+
+
+def test_bulk_and_export_have_their_own_budgets(client, user_headers, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_BULK", "1/minute")
+    monkeypatch.setattr(settings, "RATE_LIMIT_EXPORT", "1/minute")
+    items = [{"customer_name": "Rl", "item_name": "Cap", "quantity": 1}]
+
+    assert client.post("/orders/bulk", json=items, headers=user_headers).status_code == 200
+    assert client.post("/orders/bulk", json=items, headers=user_headers).status_code == 429
+
+    assert client.get("/orders/export", headers=user_headers).status_code == 200
+    assert client.get("/orders/export", headers=user_headers).status_code == 429
+
+    assert client.get("/orders", headers=user_headers).status_code == 200
+
+
+def test_unreachable_redis_falls_back_to_local_limits(client, user_headers, monkeypatch):
+    dead = RedisStorage("redis://127.0.0.1:1", socket_connect_timeout=0.2, socket_timeout=0.2)
+    _use_storage(monkeypatch, dead)
+
+    codes = [client.get("/orders", headers=user_headers).status_code for _ in range(4)]
+
+    assert codes == [200, 200, 200, 429]
@@ -0,0 +1,164 @@
+import asyncio
+import os
+import threading
+
+import fakeredis
+import pytest
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.util import greenlet_spawn
+
+from app.core.config import settings
+from app.db.models import Order
+from app.core.cache import TTLCache
+from app.db.session import RecentWriters, SessionLocal, SyncRoutingSession, engine, recent_writers
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    # Stand-in replica: same database, but every transaction is read-only,
+    # so a write routed here fails instead of passing silently
+    replica_engine = create_engine(
+        settings.DATABASE_URL,
+        connect_args={"options": "-c default_transaction_read_only=on"},
+    )
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(replica_engine, "before_cursor_execute", record)
+    monkeypatch.setattr(SyncRoutingSession, "replicas", [replica_engine])
+    recent_writers.clear()
+    yield statements
+    recent_writers.clear()
+    replica_engine.dispose()
+
+
+def test_read_only_sessions_route_reads_to_replica_and_writes_to_primary(replica):
+    db = SessionLocal(info={"read_only": True})
+    try:
+        assert db.get_bind(clause=select(Order)) is SyncRoutingSession.replicas[0]
+        assert db.get_bind(clause=insert(Order)) is engine
+    finally:
+        db.close()
+
+    db = SessionLocal()
+    try:
+        assert db.get_bind(clause=select(Order)) is engine
+    finally:
+        db.close()
+
+
+def test_read_endpoints_use_replica(client, user_headers, replica):
+    r = client.post("/orders", json={"customer_name": "Rp", "item_name": "Vase", "quantity": 1}, headers=user_headers)
+    assert r.status_code == 201
+    order_id = r.json()["id"]
+    recent_writers.clear()
+
+    for path in ("/orders", f"/orders/{order_id}", f"/orders/{order_id}/events", "/orders/stats", "/orders/export"):
+        replica.clear()
+        assert client.get(path, headers=user_headers).status_code == 200, path
+        assert replica, path
+
+
+def test_writer_reads_own_writes_from_primary(client, user_headers, admin_headers, replica):
+    r = client.post("/orders", json={"customer_name": "Ry", "item_name": "Jug", "quantity": 4}, headers=user_headers)
+    assert r.status_code == 201
+    assert replica == []
+
+    # The writer is pinned to the primary for READ_YOUR_WRITES_SECONDS...
+    assert r.json()["id"] in [o["id"] for o in client.get("/orders", headers=user_headers).json()]
+    assert replica == []
+
+    # ...other users are not
+    client.get("/orders", headers=admin_headers)
+    assert replica
+
+    # Once the window lapses the writer goes back to the replica
+    replica.clear()
+    recent_writers.clear()
+    client.get("/orders", headers=user_headers)
+    assert replica
+
+
+def test_recent_writers_are_seen_by_every_worker():
+    server = fakeredis.FakeServer()
+
+    def worker():
+        return RecentWriters(TTLCache("test-writers", maxsize=10, ttl=60), fakeredis.FakeRedis(server=server), ttl=60)
+
+    writer, reader = worker(), worker()
+    writer.mark(7)
+
+    assert reader.wrote_recently(7)
+    assert not reader.wrote_recently(8)
+
+
+def test_recent_writers_send_reads_to_the_primary_while_redis_is_down():
+    server = fakeredis.FakeServer()
+    server.connected = False
+    writers = RecentWriters(TTLCache("test-writers", maxsize=10, ttl=60), fakeredis.FakeRedis(server=server), ttl=60)
+
+    writers.mark(7)
+
+    assert writers.wrote_recently(7)
+    assert writers.wrote_recently(8)
+
+
+def test_batch_status_writer_reads_from_primary(client, user_headers, admin_headers, replica):
+    r = client.post("/orders", json={"customer_name": "Rb", "item_name": "Mug", "quantity": 1}, headers=user_headers)
+    order_id = r.json()["id"]
+    recent_writers.clear()
+
+    r = client.patch("/orders/status:batch", json={"ids": [order_id], "status": "CANCELLED"}, headers=admin_headers)
+    assert r.status_code == 200
+    replica.clear()
+
+    client.get("/orders", headers=admin_headers)
+    assert replica == []
+
+
+def test_recent_writers_keep_redis_off_the_event_loop():
+    server = fakeredis.FakeServer()
+    calls = []
+
+    class RecordingRedis(fakeredis.FakeRedis):
+        def set(self, *args, **kwargs):
+            calls.append(("set", threading.get_ident()))
+            return super().set(*args, **kwargs)
+
+        def exists(self, *args):
+            calls.append(("exists", threading.get_ident()))
+            return super().exists(*args)
+
+    def worker():
+        return RecentWriters(TTLCache("test-writers", maxsize=10, ttl=60), RecordingRedis(server=server), ttl=60)
+
+    writer, reader = worker(), worker()
+
+    async def main():
+        # Commits in the async routes run the hook the way run_sync does
+        await greenlet_spawn(writer.mark, 7)
+        assert await reader.wrote_recently_async(7)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(main())
+
+    assert {name for name, _ in calls} == {"set", "exists"}
+    assert all(thread != loop_thread for _, thread in calls)
+
+
+def test_forked_child_gets_fresh_pools():
+    with engine.connect() as conn:
+        conn.execute(select(1))
+    parent_pool = engine.pool
+
+    pid = os.fork()
+    if pid == 0:
+        # Exit without running the parent's atexit handlers or pytest teardown
+        os._exit(0 if engine.pool is not parent_pool and engine.pool.checkedin() == 0 else 1)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert engine.pool is parent_pool
+    assert parent_pool.checkedin() >= 1
@@ -0,0 +1,76 @@
+from sqlalchemy import event, text
+
+from app.db.session import engine
+
+
+def test_batch_transition_updates_allowed_rows_and_reports_rejections(
+    client, user_headers, admin_headers, create_order
+):
+    a, b, c, d = [create_order(user_headers) for _ in range(4)]
+    assert client.patch(f"/orders/{c}", json={"status": "PROCESSING"}, headers=admin_headers).status_code == 200
+    assert client.patch(f"/orders/{d}", json={"status": "CANCELLED"}, headers=admin_headers).status_code == 200
+
+    r = client.patch(
+        "/orders/status:batch",
+        json={"ids": [a, b, c, d, 999999999, a], "status": "PROCESSING"},
+        headers=admin_headers,
+    )
+    assert r.status_code == 200
+    body = r.json()
+
+    assert body["updated"] == [a, b]
+    assert body["rejected"] == [
+        {"id": c, "reason": "Invalid status transition from PROCESSING to PROCESSING"},
+        {"id": d, "reason": "Invalid status transition from CANCELLED to PROCESSING"},
+        {"id": 999999999, "reason": "Order not found"},
+    ]
+
+    for order_id in (a, b):
+        assert client.get(f"/orders/{order_id}", headers=user_headers).json()["status"] == "PROCESSING"
+        events = client.get(f"/orders/{order_id}/events", headers=user_headers).json()
+        assert [(e["old_status"], e["new_status"], e["note"]) for e in events] == [
+            ("PENDING", "PROCESSING", "Order status changed from PENDING to PROCESSING")
+        ]
+
+    assert len(client.get(f"/orders/{c}/events", headers=user_headers).json()) == 1
+
+
+def test_batch_transition_accepts_mixed_predecessors(client, user_headers, admin_headers, create_order):
+    a, b = [create_order(user_headers) for _ in range(2)]
+    client.patch(f"/orders/{b}", json={"status": "PROCESSING"}, headers=admin_headers)
+
+    r = client.patch("/orders/status:batch", json={"ids": [a, b], "status": "CANCELLED"}, headers=admin_headers)
+    assert r.json() == {"updated": [a, b], "rejected": []}
+
+    events = client.get(f"/orders/{b}/events", headers=user_headers).json()
+    assert events[0]["old_status"] == "PROCESSING"
+    assert events[0]["new_status"] == "CANCELLED"
+
+
+def test_batch_transition_requires_admin(client, user_headers, create_order):
+    a = create_order(user_headers)
+    r = client.patch("/orders/status:batch", json={"ids": [a], "status": "PROCESSING"}, headers=user_headers)
+    assert r.status_code == 403
+
+
+def test_batch_reports_orders_changed_while_it_ran(client, user_headers, admin_headers, create_order):
+    a = create_order(user_headers)
+
+    # Another writer moves the order on right after the batch's UPDATE
+    # skipped it as PENDING
+    def concurrent_update(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("WITH locked") and not conn.info.get("moved_on"):
+            conn.info["moved_on"] = True
+            with engine.begin() as other:
+                other.execute(text("UPDATE orders SET status = 'PROCESSING' WHERE id = :id"), {"id": a})
+
+    event.listen(engine, "after_cursor_execute", concurrent_update)
+    try:
+        r = client.patch("/orders/status:batch", json={"ids": [a], "status": "SHIPPED"}, headers=admin_headers)
+    finally:
+        event.remove(engine, "after_cursor_execute", concurrent_update)
+
+    assert r.json() == {
+        "updated": [],
+        "rejected": [{"id": a, "reason": "Order changed concurrently, now PROCESSING; retry"}],
+    }
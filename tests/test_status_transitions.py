@@ -0,0 +1,57 @@
+import pytest
+
+from app.schemas.orders import (
+    ALLOWED_NEXT_STATUSES,
+    ALLOWED_PREVIOUS_STATUSES,
+    OrderStatus,
+    can_transition,
+    can_transition_many,
+)
+
+EXPECTED = {
+    ("PENDING", "PROCESSING"),
+    ("PENDING", "CANCELLED"),
+    ("PROCESSING", "SHIPPED"),
+    ("PROCESSING", "CANCELLED"),
+    ("SHIPPED", "DELIVERED"),
+}
+ALL_PAIRS = [(c.value, t.value) for c in OrderStatus for t in OrderStatus]
+
+
+@pytest.mark.parametrize("current,target", ALL_PAIRS)
+def test_transition_table(current, target):
+    assert can_transition(current, target) == ((current, target) in EXPECTED)
+
+
+def test_batch_check_matches_single_checks():
+    pairs = ALL_PAIRS * 100 + [("PENDING", "LOST"), ("LOST", "PENDING")]
+
+    results = can_transition_many(pairs)
+
+    assert results == [can_transition(c, t) for c, t in pairs]
+    assert results[-2:] == [False, False]
+
+
+def test_allowed_statuses_lookups():
+    assert ALLOWED_NEXT_STATUSES["PENDING"] == (OrderStatus.PROCESSING, OrderStatus.CANCELLED)
+    assert ALLOWED_NEXT_STATUSES["DELIVERED"] == ()
+    assert ALLOWED_PREVIOUS_STATUSES["CANCELLED"] == (OrderStatus.PENDING, OrderStatus.PROCESSING)
+
+    with pytest.raises(TypeError):
+        ALLOWED_NEXT_STATUSES["DELIVERED"] = (OrderStatus.PENDING,)
+
+
+def test_order_out_lists_allowed_next_statuses(client, user_headers, admin_headers):
+    r = client.post("/orders", json={"customer_name": "Tia", "item_name": "Vase", "quantity": 1}, headers=user_headers)
+    assert r.json()["allowed_next_statuses"] == ["PROCESSING", "CANCELLED"]
+    order_id = r.json()["id"]
+
+    r = client.patch(f"/orders/{order_id}", json={"status": "CANCELLED"}, headers=admin_headers)
+    assert r.json()["allowed_next_statuses"] == []
+    assert client.get(f"/orders/{order_id}", headers=user_headers).json()["allowed_next_statuses"] == []
+
+
+def test_allowed_next_statuses_is_in_the_openapi_schema(client):
+    schema = client.get("/openapi.json").json()["components"]["schemas"]
+
+    assert "allowed_next_statuses" in schema["OrderOut"]["properties"]
@@ -0,0 +1,133 @@
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event, select, text
+
+from app.core.cache import TTLCache
+from app.core.metrics import CACHE_REQUESTS
+from app.core.security import decode_access_token
+from app.core.user_cache import cached_user, user_cache
+from app.db.models import User
+from app.db.session import SessionLocal, engine
+
+
+@contextmanager
+def count_user_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if "FROM users" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache("test-lru", maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache("test-ttl", maxsize=10, ttl=60)
+    cache.set("a", 1, ttl=0)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_counts_hits_and_misses():
+    cache = TTLCache("test-counters", maxsize=10, ttl=60)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("missing")
+
+    assert CACHE_REQUESTS.labels(cache="test-counters", result="hit")._value.get() == 1
+    assert CACHE_REQUESTS.labels(cache="test-counters", result="miss")._value.get() == 1
+
+
+def test_authenticated_requests_skip_user_lookup(client, user_headers):
+    # Login primed the cache, so no request needs the users table
+    with count_user_queries() as statements:
+        for _ in range(3):
+            assert client.get("/orders", headers=user_headers).status_code == 200
+
+    assert statements == []
+
+
+def test_cache_miss_loads_user_once(client, user_headers):
+    user_cache.clear()
+
+    with count_user_queries() as statements:
+        for _ in range(3):
+            assert client.get("/orders", headers=user_headers).status_code == 200
+
+    assert len(statements) == 1
+
+
+def test_role_change_through_orm_invalidates_cache(client, user_headers):
+    r = client.delete("/orders/999999999", headers=user_headers)
+    assert r.status_code == 403
+
+    email = decode_access_token(user_headers["Authorization"].split()[1])
+    db = SessionLocal()
+    try:
+        user = db.scalar(select(User).where(User.email == email))
+        user.role = "ADMIN"
+        db.commit()
+    finally:
+        db.close()
+
+    # Same token, but the cached USER principal must not survive the change
+    r = client.delete("/orders/999999999", headers=user_headers)
+    assert r.status_code == 404
+
+
+def _wait_for_eviction(email, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while cached_user(email) is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return cached_user(email) is None
+
+
+def test_role_change_in_raw_sql_invalidates_cache(client, user_headers):
+    email = decode_access_token(user_headers["Authorization"].split()[1])
+    assert client.delete("/orders/999999999", headers=user_headers).status_code == 403
+    assert cached_user(email) is not None
+
+    # Outside the ORM, as admin tooling would; the trigger's notification
+    # reaches every worker's listener
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE users SET role = 'ADMIN' WHERE email = :email"), {"email": email})
+
+    assert _wait_for_eviction(email)
+    assert client.delete("/orders/999999999", headers=user_headers).status_code == 404
+
+
+def test_deleted_user_is_evicted(client, user_headers):
+    email = decode_access_token(user_headers["Authorization"].split()[1])
+    assert client.get("/orders", headers=user_headers).status_code == 200
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM users WHERE email = :email"), {"email": email})
+
+    assert _wait_for_eviction(email)
+    assert client.get("/orders", headers=user_headers).status_code == 401
+
+
+def test_metrics_endpoint_exposes_cache_counters(client, user_headers):
+    client.get("/orders", headers=user_headers)
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert 'cache_requests_total{cache="users",result="hit"}' in r.text